@@ -10,7 +10,13 @@ import json
 import os
 from datetime import datetime, timedelta
 from functools import wraps
-import uuid
+
+from concert_catalog import ConcertCatalog, MAX_PAGE_SIZE, decode_cursor, paginate, parse_fields, project
+from concert_id import ensure_concert_id
+from event_time import from_epoch, parse_bound, start_of_day
+from follow_cache import FollowCache
+from http_cache import CachedBody, ResponseCache, choose_encoding, format_etag, make_etag, match_etag
+from user_store import DuplicateUserError, UserStore
 
 app = Flask(__name__)
 CORS(app, supports_credentials=True, origins=["http://localhost:8081", "http://localhost:19000", "http://192.168.0.175:8081", "http://127.0.0.1:8081", "http://127.0.0.1:19000"])
@@ -21,8 +27,10 @@ app.config['SESSION_TYPE'] = 'filesystem'
 Session(app)
 
 # 資料檔案路徑
-USERS_FILE = 'data/users.json'
 CONCERTS_FILE = 'data/concerts.json'
+DB_FILE = 'data/app.db'
+# 舊版使用者資料檔，第一次啟動時匯入 DB_FILE
+USERS_FILE = 'data/users.json'
 FOLLOWS_FILE = 'data/follows.json'
 REMINDERS_FILE = 'data/reminders.json'
 
@@ -33,10 +41,7 @@ os.makedirs('data', exist_ok=True)
 def init_data_files():
     """初始化必要的 JSON 資料檔案"""
     for file_path, default_content in [
-        (USERS_FILE, {}),
         (CONCERTS_FILE, []),
-        (FOLLOWS_FILE, {}),
-        (REMINDERS_FILE, {}),
     ]:
         if not os.path.exists(file_path):
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -44,124 +49,127 @@ def init_data_files():
 
 init_data_files()
 
-# 來源網站預設連結（當爬蟲未取得活動網址時使用）
-SOURCE_LINKS = {
-    'kktix': 'https://kktix.com',
-    '拓元': 'https://tixcraft.com',
-    'tixcraft': 'https://tixcraft.com',
-    'accupass': 'https://www.accupass.com',
-    'indievox': 'https://www.indievox.com',
-    'ticket.com.tw': 'https://www.ticket.com.tw',
-    '年代': 'https://www.ticket.com.tw',
-    'klook': 'https://www.klook.com/zh-TW',
-}
+# 行程內共用的演唱會目錄
+catalog = ConcertCatalog(CONCERTS_FILE)
+
+# 使用者 / 關注 / 提醒
+store = UserStore(DB_FILE, USERS_FILE, FOLLOWS_FILE, REMINDERS_FILE)
+follow_cache = FollowCache(store)
+
+# /api/concerts 只帶 cursor 時的預設每頁筆數
+DEFAULT_PAGE_SIZE = 50
+
+# 批次關注/提醒 API 單次最多處理的演唱會數
+MAX_BATCH_SIZE = MAX_PAGE_SIZE
+
+# 已序列化（及壓縮）的 JSON 回應，以 ETag 為鍵
+response_cache = ResponseCache()
 
 # =====================
 # 資料操作函式
 # =====================
 
-def load_json(file_path):
-    """載入 JSON 檔案"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {} if 'users' in file_path or 'follows' in file_path or 'reminders' in file_path else []
-
 def save_json(file_path, data):
-    """儲存 JSON 檔案"""
-    with open(file_path, 'w', encoding='utf-8') as f:
+    """儲存 JSON 檔案（先寫入暫存檔並 fsync，再原子替換，中途當機不會留下截斷的檔案）"""
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
 
 def load_concerts():
-    """從爬蟲或本地 JSON 載入演唱會資料，忽略非列表的狀態檔"""
+    """取得記憶體中的演唱會目錄（來源檔案變動時才重新解析）"""
+    return catalog.concerts()
 
-    def _read_if_valid(path):
-        """只有在內容為列表或包含 concerts/data 鍵時才返回，避免讀到 cookie 狀態檔"""
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                return data
-            if isinstance(data, dict):
-                if isinstance(data.get('concerts'), list):
-                    return data['concerts']
-                if isinstance(data.get('data'), list):
-                    return data['data']
-        except Exception:
-            return None
-        return None
-
-    def normalize_concert(raw_concert: dict) -> dict:
-        """補齊缺失的售票連結並生成 ID"""
-        concert = raw_concert.copy()
-        link = concert.get('網址') or concert.get('url') or concert.get('link') or ''
-        source = str(concert.get('來源網站', '')).lower()
-
-        if not link:
-            for key, default_link in SOURCE_LINKS.items():
-                if key in source:
-                    link = default_link
-                    break
-
-        if link and not link.startswith(('http://', 'https://')):
-            link = f"https://{link.lstrip('/')}"
-
-        concert['網址'] = link
-
-        if 'id' not in concert:
-            concert['id'] = generate_concert_id(concert)
-
-        return concert
-
-    def _load_and_normalize(path):
-        concerts = _read_if_valid(path)
-        return [normalize_concert(c) for c in concerts] if concerts else None
-
-    # 1) 先用 data/concerts.json（若有）
-    concerts = _load_and_normalize(CONCERTS_FILE)
-    if concerts:
-        return concerts
-
-    # 2) 忽略 cookie 狀態檔（kktix_state.json），只在內容是演唱會列表時才使用
-    concerts = _load_and_normalize('kktix_state.json')
-    if concerts:
-        return concerts
-    
-    # 3) 尋找最新的「演唱會資訊彙整_*.json」
-    json_files = [f for f in os.listdir('.') if f.startswith('演唱會資訊彙整_') and f.endswith('.json')]
-    if json_files:
-        latest_file = sorted(json_files)[-1]
-        concerts = _load_and_normalize(latest_file)
-        if concerts:
-            return concerts
-    
-    # 4) 模擬資料（用於測試）
-    fallback = [
-        {
-            "來源網站": "KKTIX",
-            "演出藝人": "五月天",
-            "演出時間": "2026-02-15",
-            "演出地點": "台北小巨蛋",
-            "網址": "https://kktix.com/events/abc123",
-            "爬取時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        },
-        {
-            "來源網站": "Indievox",
-            "演出藝人": "Coldplay",
-            "演出時間": "2026-03-20",
-            "演出地點": "台北南港展覽館",
-            "網址": "https://indievox.com/events/xyz789",
-            "爬取時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        },
-    ]
-
-    return [normalize_concert(c) for c in fallback]
-
-def generate_concert_id(concert):
-    """根據演唱會資訊生成 ID"""
-    key = f"{concert['演出藝人']}_{concert['演出時間']}_{concert['演出地點']}"
-    return str(abs(hash(key)) % (10 ** 8))
+# =====================
+# HTTP 快取與壓縮
+# =====================
+
+def _dump_json(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _cache_headers(response, private):
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def cached_json_response(build_payload, cache_key=None, private=False):
+    """
+    以強 ETag 回應 JSON，並依 Accept-Encoding 壓縮
+
+    有 cache_key（目錄內容摘要 + 查詢參數）時，不必產生內容就能算出 ETag：
+    If-None-Match 相符直接回 304，否則重用同一 ETag 已序列化/壓縮過的位元組。
+    沒有 cache_key 時（使用者資料）以回應內容計算 ETag。
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if cache_key is not None:
+        etag = make_etag(*cache_key)
+        matched = match_etag(if_none_match, etag)
+        if matched:
+            return _cache_headers(app.response_class(status=304, headers={'ETag': matched}), private)
+        entry = response_cache.get(etag) or response_cache.put(CachedBody(etag, _dump_json(build_payload())))
+    else:
+        body = _dump_json(build_payload())
+        etag = make_etag(body)
+        matched = match_etag(if_none_match, etag)
+        if matched:
+            return _cache_headers(app.response_class(status=304, headers={'ETag': matched}), private)
+        entry = response_cache.get(etag) or response_cache.put(CachedBody(etag, body))
+
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), len(entry.body))
+    response = app.response_class(entry.encoded(encoding), status=200, mimetype='application/json')
+    response.headers['ETag'] = format_etag(etag, encoding)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return _cache_headers(response, private)
+
+def parse_id_list(value):
+    """
+    解析批次 API 的演唱會 ID 列表（JSON 陣列或逗號分隔字串）
+
+    格式錯誤或超過 MAX_BATCH_SIZE 時拋出 ValueError
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        raise ValueError('ID 列表格式錯誤')
+    ids = [str(v).strip() for v in value if str(v).strip()]
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f'一次最多 {MAX_BATCH_SIZE} 筆')
+    return ids
+
+def parse_reminder_items(value, default_type):
+    """
+    解析批次提醒 API 的 set 列表：元素為 ID 字串，或 {"concert_id": ..., "type": ...}
+
+    返回 (concert_id, type) 列表；不是陣列、元素格式錯誤或超過 MAX_BATCH_SIZE 時拋出 ValueError
+    """
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError('set 必須是陣列')
+    items = []
+    for item in value:
+        if isinstance(item, str):
+            concert_id, reminder_type = item.strip(), default_type
+        elif isinstance(item, dict) and isinstance(item.get('concert_id'), str):
+            concert_id, reminder_type = item['concert_id'].strip(), item.get('type', default_type)
+        else:
+            raise ValueError('set 的元素必須是 ID 字串或含 concert_id 的物件')
+        if not isinstance(reminder_type, str):
+            raise ValueError('提醒類型格式錯誤')
+        if concert_id:
+            items.append((concert_id, reminder_type))
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f'一次最多 {MAX_BATCH_SIZE} 筆')
+    return items
+
+def _catalog_cache_key(snapshot, name, *parts):
+    """目錄類 API 的快取鍵：內容摘要 + 端點 + 查詢參數"""
+    return (name, snapshot.content_hash, *parts, tuple(sorted(request.args.items(multi=True))))
 
 # =====================
 # 中間件
@@ -204,37 +212,18 @@ def register():
     if len(password) < 6:
         return jsonify({'status': 'error', 'message': '密碼至少需要 6 個字元'}), 400
     
-    users = load_json(USERS_FILE)
-    
-    # 檢查使用者是否已存在
-    if any(u['email'] == email for u in users.values()):
-        return jsonify({'status': 'error', 'message': '信箱已被註冊'}), 400
-    
-    if any(u['username'] == username for u in users.values()):
+    # 建立使用者（信箱、使用者名稱的重複由唯一索引檢查）
+    try:
+        user = store.create_user(username, email, generate_password_hash(password))
+    except DuplicateUserError as e:
+        if e.field == 'email':
+            return jsonify({'status': 'error', 'message': '信箱已被註冊'}), 400
         return jsonify({'status': 'error', 'message': '使用者名稱已被使用'}), 400
     
-    # 建立使用者
-    user_id = str(uuid.uuid4())
-    users[user_id] = {
-        'user_id': user_id,
-        'username': username,
-        'email': email,
-        'password': generate_password_hash(password),
-        'created_at': datetime.now().isoformat(),
-        'preferences': {
-            'genres': [],  # 喜歡的類型
-            'venues': [],  # 喜歡的場地
-            'artists': [],  # 喜歡的藝人
-            'notification_enabled': True
-        }
-    }
-    
-    save_json(USERS_FILE, users)
-    
     return jsonify({
         'status': 'success',
         'message': '註冊成功',
-        'user_id': user_id
+        'user_id': user['user_id']
     }), 201
 
 @app.route('/api/auth/login', methods=['POST'])
@@ -247,10 +236,8 @@ def login():
     if not email or not password:
         return jsonify({'status': 'error', 'message': '信箱和密碼不能為空'}), 400
     
-    users = load_json(USERS_FILE)
-    
     # 查找使用者
-    user = next((u for u in users.values() if u['email'] == email), None)
+    user = store.get_user_by_email(email)
     if not user or not check_password_hash(user['password'], password):
         return jsonify({'status': 'error', 'message': '信箱或密碼錯誤'}), 401
     
@@ -278,8 +265,7 @@ def logout():
 @require_login
 def get_profile():
     """取得使用者資料"""
-    users = load_json(USERS_FILE)
-    user = users.get(session['user_id'])
+    user = store.get_user(session['user_id'])
     
     if not user:
         return jsonify({'status': 'error', 'message': '使用者不存在'}), 404
@@ -299,17 +285,12 @@ def get_profile():
 def update_profile():
     """更新使用者資料"""
     data = request.json
-    users = load_json(USERS_FILE)
-    user = users.get(session['user_id'])
-    
-    if not user:
-        return jsonify({'status': 'error', 'message': '使用者不存在'}), 404
     
     # 更新偏好設定
-    if 'preferences' in data:
-        user['preferences'].update(data['preferences'])
+    user = store.update_preferences(session['user_id'], data.get('preferences') or {})
     
-    save_json(USERS_FILE, users)
+    if not user:
+        return jsonify({'status': 'error', 'message': '使用者不存在'}), 404
     
     return jsonify({
         'status': 'success',
@@ -329,151 +310,123 @@ def update_profile():
 @app.route('/api/concerts', methods=['GET'])
 def get_concerts():
     """取得所有演唱會列表 - 優先返回真實網站爬取的資料"""
-    concerts = load_concerts()
-    
-    if not concerts:
-        return jsonify({
+    snapshot = catalog.snapshot()
+    
+    # 支援搜尋和過濾（倒排索引，q 的結果依相關度排序）
+    query = request.args.get('q', '').strip()
+    venue = request.args.get('venue', '').strip()
+    artist = request.args.get('artist', '').strip()
+    
+    # 分頁：未指定 limit/cursor 時維持一次返回全部
+    limit_param = request.args.get('limit', '').strip()
+    cursor = request.args.get('cursor', '').strip()
+    paginated = bool(limit_param or cursor)
+    if paginated:
+        try:
+            limit = int(limit_param) if limit_param else DEFAULT_PAGE_SIZE
+            if limit <= 0:
+                raise ValueError
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'status': 'error', 'message': 'limit 或 cursor 參數無效'}), 400
+    
+    # 日期範圍：from/to 為開始時間的上下限（to 只給日期時包含當天）；upcoming=1 只返回今天以後的演出
+    date_from = request.args.get('from', '').strip()
+    date_to = request.args.get('to', '').strip()
+    start = parse_bound(date_from) if date_from else None
+    end = parse_bound(date_to, end=True) if date_to else None
+    if (date_from and start is None) or (date_to and end is None):
+        return jsonify({'status': 'error', 'message': 'from 或 to 日期格式無效'}), 400
+    cache_parts = ()
+    if request.args.get('upcoming', '').strip().lower() in ('1', 'true', 'yes'):
+        today = start_of_day()
+        start = max(start, today) if start is not None else today
+        # 結果隨日期改變，快取鍵加上今天的日期
+        cache_parts = (from_epoch(today).date().isoformat(),)
+    
+    sort = request.args.get('sort', '').strip()
+    if sort not in ('', 'date'):
+        return jsonify({'status': 'error', 'message': 'sort 參數無效（可用 date）'}), 400
+    
+    # 欄位投影：fields=id,artist,date,venue
+    fields = parse_fields(request.args.get('fields', ''))
+    
+    def build():
+        if not snapshot.concerts:
+            return {
+                'status': 'success',
+                'total': 0,
+                'concerts': [],
+                'message': '暫無演唱會資料，請先執行爬蟲'
+            }
+        
+        filtered = snapshot.query(q=query, artist=artist, venue=venue, start=start, end=end,
+                                  sort_by_date=sort == 'date')
+        page, next_cursor = filtered, None
+        if paginated:
+            page, next_cursor = paginate(filtered, min(limit, MAX_PAGE_SIZE), cursor)
+        
+        return {
             'status': 'success',
-            'total': 0,
-            'concerts': [],
-            'message': '暫無演唱會資料，請先執行爬蟲'
-        }), 200
-    
-    # 添加 ID 欄位
-    for concert in concerts:
-        if 'id' not in concert:
-            concert['id'] = generate_concert_id(concert)
-    
-    # 支援搜尋和過濾
-    query = request.args.get('q', '').lower()
-    venue = request.args.get('venue', '').lower()
-    artist = request.args.get('artist', '').lower()
-    
-    filtered = concerts
-    if query:
-        filtered = [c for c in filtered if 
-                   query in str(c.get('演出藝人', '')).lower() or 
-                   query in str(c.get('演出地點', '')).lower()]
-    if venue:
-        filtered = [c for c in filtered if venue in str(c.get('演出地點', '')).lower()]
-    if artist:
-        filtered = [c for c in filtered if artist in str(c.get('演出藝人', '')).lower()]
+            'total': len(filtered),
+            'concerts': project(page, fields),
+            'next_cursor': next_cursor,
+            'data_source': '真實網站'
+        }
     
-    return jsonify({
-        'status': 'success',
-        'total': len(filtered),
-        'concerts': filtered,
-        'data_source': '真實網站'
-    }), 200
+    return cached_json_response(build, _catalog_cache_key(snapshot, 'concerts', *cache_parts))
 
 @app.route('/api/concerts/<concert_id>', methods=['GET'])
 def get_concert(concert_id):
     """取得單個演唱會詳細資訊"""
-    concerts = load_concerts()
+    snapshot = catalog.snapshot()
+    concert = snapshot.get(concert_id)
     
-    for concert in concerts:
-        if 'id' not in concert:
-            concert['id'] = generate_concert_id(concert)
-        if concert['id'] == concert_id:
-            return jsonify({
-                'status': 'success',
-                'concert': concert
-            }), 200
+    if concert:
+        return cached_json_response(
+            lambda: {'status': 'success', 'concert': concert},
+            _catalog_cache_key(snapshot, 'concert', concert_id),
+        )
     
     return jsonify({'status': 'error', 'message': '演唱會不存在'}), 404
 
 @app.route('/api/concerts/by-artist/list', methods=['GET'])
 def get_concerts_by_artist():
-    """取得按藝人分類的演唱會列表"""
-    concerts = load_concerts()
-    
-    # 為每個演唱會添加ID
-    for concert in concerts:
-        if 'id' not in concert:
-            concert['id'] = generate_concert_id(concert)
-    
-    # 按藝人名稱分類
-    artist_concerts = {}
-    for concert in concerts:
-        artist = concert.get('演出藝人', '未知藝人').strip()
-        if artist not in artist_concerts:
-            artist_concerts[artist] = []
-        artist_concerts[artist].append(concert)
-    
-    # 按藝人名稱排序
-    sorted_artists = sorted(artist_concerts.keys())
-    
-    # 構建分類結果
-    result = []
-    for artist in sorted_artists:
-        # 同一藝人的演唱會按日期排序
-        concerts_by_artist = sorted(
-            artist_concerts[artist],
-            key=lambda x: x.get('演出時間', ''),
-            reverse=True
-        )
-        result.append({
-            'artist': artist,
-            'concert_count': len(concerts_by_artist),
-            'concerts': concerts_by_artist
-        })
+    """取得按藝人分類的演唱會列表（目錄載入時已預先分組排序）"""
+    snapshot = catalog.snapshot()
+    result = snapshot.artist_groups
     
-    return jsonify({
+    return cached_json_response(lambda: {
         'status': 'success',
         'total_artists': len(result),
         'artist_list': result
-    }), 200
+    }, _catalog_cache_key(snapshot, 'by-artist-list'))
 
 @app.route('/api/concerts/artists', methods=['GET'])
 def get_artist_list():
     """取得所有藝人列表（用於搜尋和過濾）"""
-    concerts = load_concerts()
+    snapshot = catalog.snapshot()
+    sorted_artists = snapshot.artists
     
-    # 收集所有藝人
-    artists = set()
-    for concert in concerts:
-        artist = concert.get('演出藝人', '').strip()
-        if artist and artist != '未知藝人':
-            artists.add(artist)
-    
-    # 按字母順序排序
-    sorted_artists = sorted(list(artists))
-    
-    return jsonify({
+    return cached_json_response(lambda: {
         'status': 'success',
         'total': len(sorted_artists),
         'artists': sorted_artists
-    }), 200
+    }, _catalog_cache_key(snapshot, 'artists'))
 
 @app.route('/api/concerts/by-artist/<artist_name>', methods=['GET'])
 def get_concerts_by_specific_artist(artist_name):
-    """取得特定藝人的所有演唱會"""
-    concerts = load_concerts()
-    
-    # 為每個演唱會添加ID
-    for concert in concerts:
-        if 'id' not in concert:
-            concert['id'] = generate_concert_id(concert)
-    
-    # 過濾特定藝人的演唱會
-    artist_concerts = [
-        c for c in concerts 
-        if c.get('演出藝人', '').lower() == artist_name.lower()
-    ]
-    
-    # 按日期排序
-    artist_concerts = sorted(
-        artist_concerts,
-        key=lambda x: x.get('演出時間', ''),
-        reverse=True
-    )
+    """取得特定藝人的所有演唱會（已按日期排序）"""
+    snapshot = catalog.snapshot()
+    artist_concerts = snapshot.concerts_by_artist(artist_name)
     
-    return jsonify({
+    return cached_json_response(lambda: {
         'status': 'success',
         'artist': artist_name,
         'total': len(artist_concerts),
         'concerts': artist_concerts
-    }), 200
+    }, _catalog_cache_key(snapshot, 'by-artist', artist_name))
 
 # =====================
 # 關注 API
@@ -483,38 +436,21 @@ def get_concerts_by_specific_artist(artist_name):
 @require_login
 def get_follows():
     """取得使用者的關注列表"""
-    follows = load_json(FOLLOWS_FILE)
-    user_follows = follows.get(session['user_id'], [])
+    # 以 ID 索引解析關注的演唱會；關注變動或目錄重新載入前直接使用快取
+    followed_concerts = follow_cache.followed_concerts(session['user_id'], catalog.snapshot())
     
-    # 取得關注演唱會的詳細資訊
-    concerts = load_concerts()
-    followed_concerts = []
-    
-    for concert in concerts:
-        concert_id = concert.get('id') or generate_concert_id(concert)
-        if concert_id in user_follows:
-            concert['id'] = concert_id
-            concert['followed'] = True
-            followed_concerts.append(concert)
-    
-    return jsonify({
+    # 內容依使用者而異，ETag 以回應內容計算
+    return cached_json_response(lambda: {
         'status': 'success',
         'total': len(followed_concerts),
         'concerts': followed_concerts
-    }), 200
+    }, private=True)
 
 @app.route('/api/follows/<concert_id>', methods=['POST'])
 @require_login
 def follow_concert(concert_id):
     """關注演唱會"""
-    follows = load_json(FOLLOWS_FILE)
-    
-    if session['user_id'] not in follows:
-        follows[session['user_id']] = []
-    
-    if concert_id not in follows[session['user_id']]:
-        follows[session['user_id']].append(concert_id)
-        save_json(FOLLOWS_FILE, follows)
+    store.add_follow(session['user_id'], concert_id)
     
     return jsonify({
         'status': 'success',
@@ -525,11 +461,7 @@ def follow_concert(concert_id):
 @require_login
 def unfollow_concert(concert_id):
     """取消關注演唱會"""
-    follows = load_json(FOLLOWS_FILE)
-    
-    if session['user_id'] in follows and concert_id in follows[session['user_id']]:
-        follows[session['user_id']].remove(concert_id)
-        save_json(FOLLOWS_FILE, follows)
+    store.remove_follow(session['user_id'], concert_id)
     
     return jsonify({
         'status': 'success',
@@ -540,14 +472,49 @@ def unfollow_concert(concert_id):
 @require_login
 def check_follow(concert_id):
     """檢查是否已關注"""
-    follows = load_json(FOLLOWS_FILE)
-    is_followed = concert_id in follows.get(session['user_id'], [])
+    is_followed = follow_cache.is_following(session['user_id'], concert_id)
     
     return jsonify({
         'status': 'success',
         'followed': is_followed
     }), 200
 
+@app.route('/api/follows/state', methods=['GET'])
+@require_login
+def get_follow_states():
+    """一次查詢一頁演唱會的關注狀態：?ids=id1,id2,..."""
+    try:
+        concert_ids = parse_id_list(request.args.get('ids', ''))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    followed = follow_cache.follow_states(session['user_id'], concert_ids)
+    
+    return jsonify({
+        'status': 'success',
+        'followed': {concert_id: concert_id in followed for concert_id in concert_ids}
+    }), 200
+
+@app.route('/api/follows/batch', methods=['POST'])
+@require_login
+def batch_follow():
+    """批次關注 / 取消關注：{"follow": [...], "unfollow": [...]}，在同一個交易內完成"""
+    data = request.json or {}
+    try:
+        follow = parse_id_list(data.get('follow'))
+        unfollow = parse_id_list(data.get('unfollow'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    added, removed = store.apply_follow_changes(session['user_id'], follow, unfollow)
+    
+    return jsonify({
+        'status': 'success',
+        'message': '關注已更新',
+        'followed': added,
+        'unfollowed': removed
+    }), 200
+
 # =====================
 # 提醒 API
 # =====================
@@ -556,13 +523,12 @@ def check_follow(concert_id):
 @require_login
 def get_reminders():
     """取得使用者的提醒設定"""
-    reminders = load_json(REMINDERS_FILE)
-    user_reminders = reminders.get(session['user_id'], {})
+    user_reminders = store.get_reminders(session['user_id'])
     
-    return jsonify({
+    return cached_json_response(lambda: {
         'status': 'success',
         'reminders': user_reminders
-    }), 200
+    }, private=True)
 
 @app.route('/api/reminders/<concert_id>', methods=['POST'])
 @require_login
@@ -571,33 +537,41 @@ def set_reminder(concert_id):
     data = request.json or {}
     reminder_type = data.get('type', 'on_sale')  # on_sale, one_day_before, etc.
     
-    reminders = load_json(REMINDERS_FILE)
-    
-    if session['user_id'] not in reminders:
-        reminders[session['user_id']] = {}
-    
-    reminders[session['user_id']][concert_id] = {
-        'type': reminder_type,
-        'enabled': True,
-        'created_at': datetime.now().isoformat()
-    }
-    
-    save_json(REMINDERS_FILE, reminders)
+    store.set_reminder(session['user_id'], concert_id, reminder_type)
     
     return jsonify({
         'status': 'success',
         'message': '提醒已設定'
     }), 201
 
+@app.route('/api/reminders/batch', methods=['POST'])
+@require_login
+def batch_reminders():
+    """
+    批次設定 / 刪除提醒，在同一個交易內完成
+    {"set": ["id1", {"concert_id": "id2", "type": "one_day_before"}], "type": "on_sale", "delete": [...]}
+    """
+    data = request.json or {}
+    try:
+        set_items = parse_reminder_items(data.get('set'), data.get('type', 'on_sale'))
+        delete = parse_id_list(data.get('delete'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    set_count, deleted = store.apply_reminder_changes(session['user_id'], set_items, delete)
+    
+    return jsonify({
+        'status': 'success',
+        'message': '提醒已更新',
+        'set': set_count,
+        'deleted': deleted
+    }), 200
+
 @app.route('/api/reminders/<concert_id>', methods=['DELETE'])
 @require_login
 def delete_reminder(concert_id):
     """刪除演唱會提醒"""
-    reminders = load_json(REMINDERS_FILE)
-    
-    if session['user_id'] in reminders and concert_id in reminders[session['user_id']]:
-        del reminders[session['user_id']][concert_id]
-        save_json(REMINDERS_FILE, reminders)
+    store.delete_reminder(session['user_id'], concert_id)
     
     return jsonify({
         'status': 'success',
@@ -722,7 +696,7 @@ HTML 內容：
         valid_concerts = []
         for item in all_concerts:
             if item.get('artist'):
-                valid_concerts.append({
+                valid_concerts.append(ensure_concert_id({
                     '來源網站': item.get('site', '未知'),
                     '演出藝人': str(item.get('artist', '')).strip(),
                     '演出時間': str(item.get('date', '未公布')).strip(),
@@ -730,7 +704,7 @@ HTML 內容：
                     '票價': str(item.get('price', '')).strip(),
                     '網址': str(item.get('url', '')).strip(),
                     '爬取時間': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
+                }))
         
         # 保存到檔案
         os.makedirs('data', exist_ok=True)
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+效能基準測試
+使用合成資料量測後端熱點路徑，不需要啟動 Flask 或連網
+
+用法：
+    python benchmarks.py lookup
+    python benchmarks.py search
+    python benchmarks.py users
+    python benchmarks.py reminders --sizes 1000000
+    python benchmarks.py dates
+    python benchmarks.py range
+    python benchmarks.py crawl --sizes 12
+    python benchmarks.py lookup --sizes 1000 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+from urllib.parse import parse_qs, quote, urlsplit
+
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from concert_catalog import CatalogSnapshot, ConcertCatalog, normalize_concert
+from concert_search import SearchIndex
+from event_time import _parse_stamps, _record_timestamps, concert_timestamps, parse_bound, parse_timestamp
+from reminder_scheduler import ReminderScheduler
+from user_store import UserStore
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# 各測試項目的預設筆數（未列出的使用 DEFAULT_SIZES）
+CASE_SIZES = {'crawl': [4, 12]}
+
+ARTISTS = ['五月天', '周杰倫', 'Coldplay', '告五人', '草東沒有派對', 'YOASOBI', '蔡依林', 'Taylor Swift',
+           '田馥甄', '八三夭', 'ONE OK ROCK', '落日飛車', '盧廣仲', 'BLACKPINK', '陳綺貞', '麋先生']
+VENUES = ['台北小巨蛋', '台北大巨蛋', 'Legacy Taipei', 'Zepp New Taipei', '高雄巨蛋', '台中洲際棒球場',
+          '河岸留言', 'THE WALL', '南港展覽館', '臺北流行音樂中心', '高雄流行音樂中心', '國家體育場']
+SOURCES = ['KKTIX', '年代售票', 'iNDIEVOX', 'TixCraft', 'Accupass 活動通']
+
+
+def make_synthetic_concerts(n: int, seed: int = 42) -> List[dict]:
+    """產生 n 筆正規化後的合成演唱會資料"""
+    rng = random.Random(seed)
+    concerts = []
+    for i in range(n):
+        artist = f"{rng.choice(ARTISTS)} {i % 997}"
+        concerts.append(normalize_concert({
+            '來源網站': rng.choice(SOURCES),
+            '演出藝人': artist,
+            '演出時間': f"2026/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}",
+            '演出地點': rng.choice(VENUES),
+            '網址': f"https://example.com/events/{i}",
+            '爬取時間': '2026-01-01 00:00:00',
+        }))
+    return concerts
+
+
+def measure(func: Callable, repeat: int) -> float:
+    """執行 repeat 次並返回每次平均耗時（微秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench_lookup(sizes: List[int]) -> None:
+    """單筆查詢：原本的線性搜尋 vs. ID 索引"""
+    print(f"{'筆數':>8} | {'線性搜尋 (µs)':>14} | {'ID 索引 (µs)':>12} | {'建索引 (ms)':>11}")
+    print('-' * 56)
+    for n in sizes:
+        concerts = make_synthetic_concerts(n)
+        rng = random.Random(n)
+        targets = [rng.choice(concerts)['id'] for _ in range(200)]
+
+        build_start = time.perf_counter()
+        snapshot = CatalogSnapshot(concerts)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        def linear():
+            target = rng.choice(targets)
+            for concert in concerts:
+                if concert['id'] == target:
+                    return concert
+            return None
+
+        def indexed():
+            return snapshot.get(rng.choice(targets))
+
+        linear_us = measure(linear, repeat=max(20, 200000 // n))
+        indexed_us = measure(indexed, repeat=100000)
+        print(f"{n:>8} | {linear_us:>14.1f} | {indexed_us:>12.2f} | {build_ms:>11.1f}")
+
+
+SEARCH_QUERIES = ['五月天', '周杰', 'coldplay', 'cold', '台北', '小巨蛋', 'zepp', '高雄流行', '草東沒有派對 12', '不存在的藝人']
+
+
+def scan_search(concerts: List[dict], q: str = '', venue: str = '', artist: str = '') -> List[dict]:
+    """原本 get_concerts 的線性子字串掃描"""
+    query, venue, artist = q.lower(), venue.lower(), artist.lower()
+    filtered = concerts
+    if query:
+        filtered = [c for c in filtered if
+                    query in str(c.get('演出藝人', '')).lower() or
+                    query in str(c.get('演出地點', '')).lower()]
+    if venue:
+        filtered = [c for c in filtered if venue in str(c.get('演出地點', '')).lower()]
+    if artist:
+        filtered = [c for c in filtered if artist in str(c.get('演出藝人', '')).lower()]
+    return filtered
+
+
+def bench_search(sizes: List[int]) -> None:
+    """搜尋：原本的線性掃描 vs. 倒排索引（每次查詢平均；「未快取」停用結果快取）"""
+    print(f"{'筆數':>8} | {'線性掃描 (ms)':>13} | {'未快取 (ms)':>11} | {'未快取最慢 (ms)':>15} | {'快取 (ms)':>9} | {'建索引 (ms)':>11}")
+    print('-' * 84)
+    for n in sizes:
+        concerts = make_synthetic_concerts(n)
+
+        build_start = time.perf_counter()
+        index = SearchIndex(concerts)
+        build_ms = (time.perf_counter() - build_start) * 1000
+        cold_index = SearchIndex(concerts, cache_size=0)
+
+        repeat = max(3, 20000 // n)
+        scan_ms = sum(measure(lambda: scan_search(concerts, q=q), repeat) for q in SEARCH_QUERIES) / len(SEARCH_QUERIES) / 1000
+        cold = [measure(lambda: cold_index.search(q=q), repeat * 10) / 1000 for q in SEARCH_QUERIES]
+        cached = [measure(lambda: index.search(q=q), 1000) / 1000 for q in SEARCH_QUERIES]
+        print(f"{n:>8} | {scan_ms:>13.2f} | {sum(cold) / len(cold):>11.3f} | {max(cold):>15.3f} | "
+              f"{sum(cached) / len(cached):>9.4f} | {build_ms:>11.0f}")
+
+
+def make_legacy_user_files(directory: str, n: int) -> tuple:
+    """產生舊版格式的 users/follows/reminders.json（每人 3 筆關注、1 筆提醒）"""
+    users, follows, reminders = {}, {}, {}
+    for i in range(n):
+        user_id = f"user-{i}"
+        users[user_id] = {
+            'user_id': user_id,
+            'username': f"user{i}",
+            'email': f"user{i}@example.com",
+            'password': 'pbkdf2:sha256:600000$bench$' + '0' * 64,
+            'created_at': '2026-01-01T00:00:00',
+            'preferences': {'genres': [], 'venues': [], 'artists': [], 'notification_enabled': True},
+        }
+        follows[user_id] = [f"concert-{(i * 7 + k) % 5000}" for k in range(3)]
+        reminders[user_id] = {f"concert-{i % 5000}": {'type': 'on_sale', 'enabled': True,
+                                                       'created_at': '2026-01-01T00:00:00'}}
+    paths = []
+    for name, data in (('users', users), ('follows', follows), ('reminders', reminders)):
+        path = os.path.join(directory, f"{name}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        paths.append(path)
+    return tuple(paths)
+
+
+def _json_register(users_file: str, i: int) -> None:
+    """原本 register 的讀寫模式：整份載入、線性檢查、整份寫回"""
+    with open(users_file, 'r', encoding='utf-8') as f:
+        users = json.load(f)
+    email, username = f"new{i}@example.com", f"new{i}"
+    if any(u['email'] == email for u in users.values()) or any(u['username'] == username for u in users.values()):
+        return
+    users[f"new-{i}"] = {'user_id': f"new-{i}", 'username': username, 'email': email, 'password': 'x',
+                         'created_at': '2026-01-01T00:00:00', 'preferences': {}}
+    with open(users_file, 'w', encoding='utf-8') as f:
+        json.dump(users, f, ensure_ascii=False, indent=2)
+
+
+def _json_follow(follows_file: str, user_id: str, concert_id: str) -> None:
+    """原本 follow_concert 的讀寫模式"""
+    with open(follows_file, 'r', encoding='utf-8') as f:
+        follows = json.load(f)
+    if concert_id not in follows.setdefault(user_id, []):
+        follows[user_id].append(concert_id)
+        with open(follows_file, 'w', encoding='utf-8') as f:
+            json.dump(follows, f, ensure_ascii=False, indent=2)
+
+
+def _timed(func: Callable, count: int) -> float:
+    """執行 func(0..count-1)，返回總秒數"""
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return time.perf_counter() - start
+
+
+def bench_users(sizes: List[int]) -> None:
+    """註冊 / 關注吞吐量：原本的整份 JSON 讀寫 vs. SQLite 使用者儲存（ops/s）"""
+    print(f"{'使用者數':>8} | {'JSON 註冊':>9} | {'JSON 關注':>9} | {'DB 註冊':>8} | {'DB 關注':>8} | "
+          f"{'DB 登入查詢':>10} | {'匯入 (s)':>8}")
+    print('-' * 86)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            users_file, follows_file, reminders_file = make_legacy_user_files(tmp, n)
+            json_ops = max(3, min(200, 2000000 // (n * 10)))
+            json_register = json_ops / _timed(lambda i: _json_register(users_file, i), json_ops)
+            json_follow = json_ops / _timed(
+                lambda i: _json_follow(follows_file, f"user-{i % n}", f"bench-{i}"), json_ops)
+
+            import_start = time.perf_counter()
+            store = UserStore(os.path.join(tmp, 'app.db'), users_file, follows_file, reminders_file)
+            import_s = time.perf_counter() - import_start
+
+            db_ops = 2000
+            db_register = db_ops / _timed(lambda i: store.create_user(f"db{i}", f"db{i}@example.com", 'x'), db_ops)
+            db_follow = db_ops / _timed(lambda i: store.add_follow(f"user-{i % n}", f"bench-{i}"), db_ops)
+            db_login = db_ops / _timed(lambda i: store.get_user_by_email(f"user{(i * 31) % n}@example.com"), db_ops)
+            store.close()
+
+        print(f"{n:>8} | {json_register:>9.1f} | {json_follow:>9.1f} | {db_register:>8.0f} | {db_follow:>8.0f} | "
+              f"{db_login:>10.0f} | {import_s:>8.2f}")
+
+
+def bench_reminders(sizes: List[int]) -> None:
+    """提醒排程：全量建堆時間、無到期時的檢查成本、到期提醒的處理吞吐量（發送 + 逾期略過）"""
+    print(f"{'提醒數':>8} | {'建堆 (s)':>8} | {'堆積 (MB)':>9} | {'閒置 tick (µs)':>14} | {'到期筆數':>8} | {'處理 (筆/s)':>11}")
+    print('-' * 76)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            concerts = make_synthetic_concerts(5000)
+            for c in concerts[::2]:
+                c['sale_time'] = c['演出時間'].replace('/12/', '/11/') + ' 12:00'
+            concerts_file = os.path.join(tmp, 'concerts.json')
+            with open(concerts_file, 'w', encoding='utf-8') as f:
+                json.dump(concerts, f, ensure_ascii=False)
+            catalog = ConcertCatalog(concerts_file, os.path.join(tmp, 'state.json'), tmp)
+
+            store = UserStore(os.path.join(tmp, 'app.db'))
+            rng = random.Random(n)
+            types = ['on_sale', 'one_day_before', 'one_week_before']
+            with store.transaction() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO reminders (user_id, concert_id, type, enabled, created_at) "
+                    "VALUES (?, ?, ?, 1, '2026-01-01T00:00:00');",
+                    ((f"user-{i}", rng.choice(concerts)['id'], rng.choice(types)) for i in range(n)),
+                )
+
+            sent = []
+            scheduler = ReminderScheduler(store, catalog, notifier=sent.extend)
+            load_start = time.perf_counter()
+            scheduler.load()
+            load_s = time.perf_counter() - load_start
+            heap_mb = (sys.getsizeof(scheduler._heap) + sum(sys.getsizeof(v) for v in scheduler._heap)) / 1e6
+
+            # 第一個到期時間之前：只比較堆頂與套用變動紀錄
+            idle_now = scheduler.next_trigger_time() - 1
+            idle_us = measure(lambda: scheduler.tick(idle_now), 2000)
+
+            # 一月份到期的提醒
+            dispatch_now = parse_timestamp('2026/02/01')
+            dispatch_start = time.perf_counter()
+            scheduler.tick(dispatch_now)
+            dispatch_s = time.perf_counter() - dispatch_start
+            processed = scheduler.stats['dispatched'] + scheduler.stats['expired']
+            store.close()
+
+        print(f"{n:>8} | {load_s:>8.2f} | {heap_mb:>9.1f} | {idle_us:>14.1f} | {processed:>8} | "
+              f"{processed / dispatch_s if dispatch_s else 0:>11.0f}")
+
+
+def make_raw_dates(n: int, seed: int = 42) -> List[dict]:
+    """各爬蟲實際出現過的日期格式（未正規化）"""
+    rng = random.Random(seed)
+    formats = [
+        lambda m, d, h: {'演出時間': f"2026/{m:02d}/{d:02d}"},
+        lambda m, d, h: {'演出時間': f"2026 / {m} / {d}"},
+        lambda m, d, h: {'演出時間': f"{m}月{d}日"},
+        lambda m, d, h: {'start_at': f"2026-{m:02d}-{d:02d}T{h:02d}:30:00+08:00"},
+        lambda m, d, h: {'event_info': f"演出時間：2026/{m:02d}/{d:02d}（六）{h}:00 ; "
+                                       f"售票時間：2026/01/{d:02d}（一）12:00"},
+    ]
+    return [
+        {**rng.choice(formats)(rng.randint(1, 12), rng.randint(1, 28), rng.randint(12, 20)),
+         '爬取時間': '2026-01-01 00:00:00'}
+        for _ in range(n)
+    ]
+
+
+def bench_dates(sizes: List[int]) -> None:
+    """日期解析：首次解析 vs. LRU 快取命中，以及字串排序 vs. 數值排序"""
+    print(f"{'筆數':>8} | {'首次 (筆/秒)':>12} | {'快取 (筆/秒)':>12} | {'字串排序 (ms)':>13} | {'數值排序 (ms)':>13}")
+    print('-' * 72)
+    for n in sizes:
+        raw = make_raw_dates(n)
+
+        _parse_stamps.cache_clear()
+        _record_timestamps.cache_clear()
+        cold_s = _timed(lambda i: concert_timestamps(raw[i]), n)
+        warm_s = _timed(lambda i: concert_timestamps(raw[i]), n)
+
+        concerts = [{**concert, **concert_timestamps(concert)} for concert in raw]
+        start = time.perf_counter()
+        sorted(concerts, key=lambda c: str(c.get('演出時間') or c.get('start_at') or ''), reverse=True)
+        text_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        sorted(concerts, key=lambda c: c['start_ts'] if c['start_ts'] is not None else -1, reverse=True)
+        numeric_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{n:>8} | {n / cold_s:>12.0f} | {n / warm_s:>12.0f} | {text_ms:>13.1f} | {numeric_ms:>13.1f}")
+
+
+def bench_range(sizes: List[int]) -> None:
+    """「本週演出」：逐筆解析日期文字過濾（原本客戶端的做法）vs. 時間索引 bisect"""
+    print(f"{'筆數':>8} | {'逐筆過濾 (µs)':>14} | {'bisect (µs)':>12} | {'結果筆數':>8}")
+    print('-' * 54)
+    week_start, week_end = parse_bound('2026-03-01'), parse_bound('2026-03-07', end=True)
+    for n in sizes:
+        concerts = make_synthetic_concerts(n)
+        snapshot = CatalogSnapshot(concerts)
+
+        def scan():
+            return [c for c in concerts
+                    if week_start <= (parse_timestamp(c['演出時間'], c['爬取時間']) or -1) <= week_end]
+
+        def indexed():
+            return snapshot.query(start=week_start, end=week_end)
+
+        assert {c['id'] for c in scan()} == {c['id'] for c in indexed()}
+        repeat = max(1, 200000 // n)
+        print(f"{n:>8} | {measure(scan, repeat):>14.1f} | {measure(indexed, 2000):>12.2f} | {len(indexed()):>8}")
+
+
+# 本機測試伺服器每個回應的延遲（秒），模擬售票網站的回應時間
+FIXTURE_LATENCY = 0.2
+
+
+def _fixture_page(path: str, n: int) -> str:
+    """依路徑產生各站點列表頁/詳細頁的 HTML（結構與爬蟲的選擇器對應）"""
+    if path.startswith('/ticket/Concert'):
+        # 年代列表頁缺少地點，每筆都會再抓詳細頁
+        items = ''.join(f'<div class="concert-item"><a href="/activity/{i}"><h4>年代藝人 {i}</h4></a>'
+                        f'<span class="date">2026/03/{i % 28 + 1:02d}</span></div>' for i in range(n))
+        return f'<html><body>{items}</body></html>'
+    if path.startswith('/ticket/activity/'):
+        return '<html><body><h1>年代藝人</h1><span class="venue">台北小巨蛋</span></body></html>'
+    if path.startswith('/indievox/activity/list'):
+        items = ''.join(f'<li><a href="/activity/detail/{i}">iNDIEVOX 藝人 {i}</a><span class="date">2026/04/01</span>'
+                        f'<span class="venue">Legacy Taipei</span></li>' for i in range(n))
+        return f'<html><body><ul>{items}</ul></body></html>'
+    if path.startswith('/accupass/search'):
+        # 每個搜尋關鍵字回傳不同的活動，爬蟲依序搜尋多個關鍵字時不會重複
+        keyword = parse_qs(urlsplit(path).query).get('q', [''])[0]
+        items = ''.join(f'<div><a href="/event/{quote(keyword)}-{i}">Accupass {keyword} {i}</a>'
+                        f'<span class="date">2026/05/01</span><span class="venue">Zepp New Taipei</span></div>'
+                        for i in range(n))
+        return f'<html><body>{items}</body></html>'
+    return ''
+
+
+def start_fixture_server(n: int, latency: float = FIXTURE_LATENCY) -> ThreadingHTTPServer:
+    """啟動本機 HTTP 伺服器（背景執行緒），每個請求延遲 latency 秒"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = _fixture_page(self.path, n).encode('utf-8')
+            self.send_response(200 if body else 404)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_crawl(sizes: List[int]) -> None:
+    """ConcertCrawlerManager：依序 vs. 同時爬取（本機測試伺服器，sizes 為每站列表筆數）"""
+    import contextlib
+    import io
+
+    from concert_crawler import AccupassCrawler, ConcertCrawlerManager, IndievoxCrawler, TicketCrawler
+
+    # 博客來爬蟲不發出請求、固定回傳佔位資料，不列入量測
+    placeholders = {'（待公佈）', '（待開發）'}
+
+    print(f"{'每站筆數':>8} | {'依序 (s)':>9} | {'同時 (s)':>9} | {'加速':>6} | {'筆數':>6}")
+    print('-' * 52)
+    for n in sizes:
+        server = start_fixture_server(n)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        timings, counts = {}, {}
+        for concurrent in (False, True):
+            crawlers = [TicketCrawler(), IndievoxCrawler(), AccupassCrawler()]
+            for crawler, path in zip(crawlers, ('/ticket', '/indievox', '/accupass')):
+                crawler.base_url = base + path
+            manager = ConcertCrawlerManager(concurrent=concurrent)
+            start = time.perf_counter()
+            # 爬蟲本身的進度輸出不列入報表
+            with contextlib.redirect_stdout(io.StringIO()):
+                manager._run_crawlers(crawlers, delay=1)
+            timings[concurrent] = time.perf_counter() - start
+            rows = manager.all_concerts
+            # 每站都必須從測試頁解析出真實資料，而非失敗時的佔位資料或重複列
+            assert not [c for c in rows if c['演出藝人'] in placeholders], "有站點回傳佔位資料"
+            assert len({c['網址'] for c in rows}) == len(rows), "有重複的活動"
+            counts[concurrent] = len(rows)
+        server.shutdown()
+        assert counts[False] == counts[True]
+        print(f"{n:>8} | {timings[False]:>9.2f} | {timings[True]:>9.2f} | {timings[False] / timings[True]:>5.1f}x | "
+              f"{counts[True]:>6}")
+
+
+CASES = {
+    'crawl': bench_crawl,
+    'range': bench_range,
+    'dates': bench_dates,
+    'lookup': bench_lookup,
+    'search': bench_search,
+    'users': bench_users,
+    'reminders': bench_reminders,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="後端效能基準測試")
+    parser.add_argument('case', choices=sorted(CASES), help="要執行的測試項目")
+    parser.add_argument('--sizes', nargs='+', type=int, help="資料筆數")
+    args = parser.parse_args()
+
+    print(f"\n=== {args.case} ===")
+    CASES[args.case](args.sizes or CASE_SIZES.get(args.case, DEFAULT_SIZES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,416 @@
+"""
+演唱會目錄（行程內快取）
+將正規化後的演唱會資料保留在記憶體中，只有在來源檔案的 mtime/size 變動時才重新載入
+"""
+import base64
+import bisect
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from concert_id import make_concert_id
+from concert_search import SearchIndex
+from event_time import concert_timestamps
+
+# 來源網站預設連結（當爬蟲未取得活動網址時使用）
+SOURCE_LINKS = {
+    'kktix': 'https://kktix.com',
+    '拓元': 'https://tixcraft.com',
+    'tixcraft': 'https://tixcraft.com',
+    'accupass': 'https://www.accupass.com',
+    'indievox': 'https://www.indievox.com',
+    'ticket.com.tw': 'https://www.ticket.com.tw',
+    '年代': 'https://www.ticket.com.tw',
+    'klook': 'https://www.klook.com/zh-TW',
+}
+
+SUMMARY_PREFIX = '演唱會資訊彙整_'
+
+# fields= 可使用的英文別名
+FIELD_ALIASES = {
+    'artist': '演出藝人',
+    'date': '演出時間',
+    'time': '演出時間',
+    'venue': '演出地點',
+    'source': '來源網站',
+    'url': '網址',
+    'price': '票價',
+    'scraped_at': '爬取時間',
+    'start': 'start_ts',
+    'end': 'end_ts',
+    'sale': 'sale_ts',
+}
+
+# 單頁最多筆數
+MAX_PAGE_SIZE = 500
+
+
+def normalize_concert(raw_concert: dict) -> dict:
+    """補齊缺失的售票連結、生成 ID，並解析 start_ts / end_ts / sale_ts（epoch 秒）"""
+    concert = raw_concert.copy()
+
+    # ID 以原始網址計算（補預設連結之前），與爬蟲輸出和資料庫匯入一致
+    if not concert.get('id'):
+        concert['id'] = make_concert_id(raw_concert)
+
+    link = concert.get('網址') or concert.get('url') or concert.get('link') or ''
+    source = str(concert.get('來源網站', '')).lower()
+
+    if not link:
+        for key, default_link in SOURCE_LINKS.items():
+            if key in source:
+                link = default_link
+                break
+
+    if link and not link.startswith(('http://', 'https://')):
+        link = f"https://{link.lstrip('/')}"
+
+    concert['網址'] = link
+    concert.update(concert_timestamps(concert))
+    return concert
+
+
+def _content_digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _read_if_valid(path) -> Tuple[Optional[list], Optional[str]]:
+    """
+    只有在內容為列表或包含 concerts/data 鍵時才返回，避免讀到 cookie 狀態檔
+
+    Returns:
+        (演唱會列表, 檔案內容摘要)；無效時為 (None, None)
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+        if isinstance(data, dict):
+            data = data.get('concerts') if isinstance(data.get('concerts'), list) else data.get('data')
+        if isinstance(data, list):
+            return data, _content_digest(raw)
+    except Exception:
+        pass
+    return None, None
+
+
+def _file_signature(path) -> Optional[Tuple[int, int]]:
+    """取得檔案的 (mtime_ns, size)，檔案不存在時返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _time_sort_key(concert: dict) -> int:
+    # 無法解析演出時間的排在新到舊排序的最後
+    start = concert.get('start_ts')
+    return start if start is not None else -1
+
+
+def _date_asc_key(concert: dict) -> Tuple[bool, int]:
+    start = concert.get('start_ts')
+    return (start is None, start or 0)
+
+
+class CatalogSnapshot:
+    """
+    某一版本的目錄內容與索引
+
+    重新載入時整個替換，讀取端拿到的 snapshot 內的列表與索引永遠一致。
+    """
+
+    def __init__(self, concerts: List[dict], version: int = 0, source_path: Optional[str] = None,
+                 content_hash: str = ''):
+        self.concerts = concerts
+        self.version = version
+        self.source_path = source_path
+        # 來源內容摘要；各 worker 讀到相同檔案時一致，可作為 HTTP ETag 的基礎
+        self.content_hash = content_hash
+        # id → 記錄；重複 ID 時保留第一筆（與原本線性搜尋的結果相同）
+        self.by_id: Dict[str, dict] = {}
+        # 藝人名稱 → 依演出時間新到舊排序的演唱會
+        self.by_artist: Dict[str, List[dict]] = {}
+        # 小寫藝人名稱 → 同上，供 /api/concerts/by-artist/<artist_name> 不分大小寫查詢
+        self.by_artist_lower: Dict[str, List[dict]] = {}
+        # 場地名稱 → 演唱會
+        self.by_venue: Dict[str, List[dict]] = {}
+        # 依 start_ts 由早到晚排序的演唱會（不含無法解析時間的）與對應的開始時間，供 bisect 範圍查詢
+        self.by_start: List[dict] = []
+        self.start_times: List[int] = []
+        # sort=date 的完整順序：by_start 之後接無法解析時間的演唱會
+        self.by_date: List[dict] = []
+        # 排序後的藝人名稱（不含空白與「未知藝人」）
+        self.artists: List[str] = []
+        # /api/concerts/by-artist/list 的完整結果
+        self.artist_groups: List[dict] = []
+        self._build_indexes()
+        # 藝人/地點/標題的倒排索引
+        self.search_index = SearchIndex(concerts)
+
+    def _build_indexes(self) -> None:
+        for concert in self.concerts:
+            self.by_id.setdefault(concert['id'], concert)
+            artist = str(concert.get('演出藝人', '未知藝人')).strip()
+            self.by_artist.setdefault(artist, []).append(concert)
+            venue = str(concert.get('演出地點', '')).strip()
+            self.by_venue.setdefault(venue, []).append(concert)
+
+        for artist, concerts in self.by_artist.items():
+            concerts.sort(key=_time_sort_key, reverse=True)
+            self.by_artist_lower.setdefault(artist.lower(), []).extend(concerts)
+        for concerts in self.by_artist_lower.values():
+            concerts.sort(key=_time_sort_key, reverse=True)
+
+        # 同一時間的演出維持原始順序（sort 為穩定排序）
+        self.by_start = sorted((c for c in self.concerts if c.get('start_ts') is not None),
+                               key=lambda c: c['start_ts'])
+        self.start_times = [c['start_ts'] for c in self.by_start]
+        self.by_date = self.by_start + [c for c in self.concerts if c.get('start_ts') is None]
+
+        sorted_artists = sorted(self.by_artist)
+        self.artists = [a for a in sorted_artists if a and a != '未知藝人']
+        self.artist_groups = [
+            {
+                'artist': artist,
+                'concert_count': len(self.by_artist[artist]),
+                'concerts': self.by_artist[artist],
+            }
+            for artist in sorted_artists
+        ]
+
+    def get(self, concert_id: str) -> Optional[dict]:
+        return self.by_id.get(concert_id)
+
+    def search(self, q: str = '', artist: str = '', venue: str = '') -> List[dict]:
+        """以倒排索引搜尋，返回排名後的演唱會"""
+        if not (q or artist or venue):
+            return self.concerts
+        concerts = self.concerts
+        return [concerts[i] for i in self.search_index.search(q=q, artist=artist, venue=venue)]
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> List[dict]:
+        """開始時間在 [start, end] 之間的演唱會（依時間排序），O(log n + k)"""
+        lo = bisect.bisect_left(self.start_times, start) if start is not None else 0
+        hi = bisect.bisect_right(self.start_times, end) if end is not None else len(self.start_times)
+        return self.by_start[lo:hi]
+
+    def query(self, q: str = '', artist: str = '', venue: str = '', start: Optional[int] = None,
+              end: Optional[int] = None, sort_by_date: bool = False) -> List[dict]:
+        """
+        搜尋 + 日期範圍 + 排序
+
+        只有日期條件時直接切出時間索引的區段；同時有搜尋條件時在搜尋結果中過濾，
+        保留相關度排序（sort_by_date 時改依開始時間，無法解析時間的排最後）。
+        """
+        dated = start is not None or end is not None
+        if not (q or artist or venue):
+            if dated:
+                return self.between(start, end)
+            return self.by_date if sort_by_date else self.concerts
+
+        concerts = self.search(q=q, artist=artist, venue=venue)
+        if dated:
+            low = start if start is not None else float('-inf')
+            high = end if end is not None else float('inf')
+            concerts = [c for c in concerts if c.get('start_ts') is not None and low <= c['start_ts'] <= high]
+        if sort_by_date:
+            concerts = sorted(concerts, key=_date_asc_key)
+        return concerts
+
+    def concerts_by_artist(self, artist_name: str) -> List[dict]:
+        """不分大小寫取得特定藝人的演唱會（已依日期排序）"""
+        return self.by_artist_lower.get(artist_name.strip().lower(), [])
+
+
+class ConcertCatalog:
+    """
+    行程內共用的演唱會目錄
+
+    來源優先順序與原本的 load_concerts() 相同：
+    data/concerts.json → kktix_state.json（僅限演唱會列表）→ 最新的「演唱會資訊彙整_*.json」→ 模擬資料。
+    每次取用時只做幾次 stat()，簽章不變就直接返回記憶體中的資料。
+    返回的記錄為共用物件，呼叫端如需加欄位請先複製。
+    """
+
+    def __init__(self, concerts_file: str, state_file: str = 'kktix_state.json', search_dir: str = '.'):
+        self.concerts_file = concerts_file
+        self.state_file = state_file
+        self.search_dir = search_dir
+        self._signature = None
+        # 目錄簽章 → 最新的彙整檔；目錄沒有新增/刪除檔案時不重新列目錄
+        self._dir_signature = None
+        self._newest_summary = None
+        self._snapshot = CatalogSnapshot([])
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    @property
+    def source_path(self) -> Optional[str]:
+        return self._snapshot.source_path
+
+    @property
+    def content_hash(self) -> str:
+        return self._snapshot.content_hash
+
+    def _summary_files(self) -> List[str]:
+        try:
+            names = os.listdir(self.search_dir)
+        except OSError:
+            return []
+        return sorted(f for f in names if f.startswith(SUMMARY_PREFIX) and f.endswith('.json'))
+
+    def _newest_summary_file(self) -> Optional[str]:
+        """最新的彙整檔路徑；目錄 mtime 只用來判斷是否需要重新挑選"""
+        dir_signature = _file_signature(self.search_dir)
+        if dir_signature != self._dir_signature:
+            summary_files = self._summary_files()
+            self._newest_summary = os.path.join(self.search_dir, summary_files[-1]) if summary_files else None
+            self._dir_signature = dir_signature
+        return self._newest_summary
+
+    def _current_signature(self):
+        """所有候選來源的簽章；彙整檔使用檔案本身的 (mtime_ns, size)，原地覆寫時也會重新載入"""
+        summary_file = self._newest_summary_file()
+        return (
+            _file_signature(self.concerts_file),
+            _file_signature(self.state_file),
+            summary_file,
+            _file_signature(summary_file) if summary_file else None,
+        )
+
+    def _load_from_disk(self) -> Tuple[List[dict], Optional[str], str]:
+        candidates = [self.concerts_file, self.state_file]
+        summary_file = self._newest_summary_file()
+        if summary_file:
+            candidates.append(summary_file)
+
+        for path in candidates:
+            concerts, digest = _read_if_valid(path)
+            if concerts:
+                return [normalize_concert(c) for c in concerts], path, digest
+
+        # 模擬資料（用於測試）
+        fallback = [
+            {
+                "來源網站": "KKTIX",
+                "演出藝人": "五月天",
+                "演出時間": "2026-02-15",
+                "演出地點": "台北小巨蛋",
+                "網址": "https://kktix.com/events/abc123",
+                "爬取時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            },
+            {
+                "來源網站": "Indievox",
+                "演出藝人": "Coldplay",
+                "演出時間": "2026-03-20",
+                "演出地點": "台北南港展覽館",
+                "網址": "https://indievox.com/events/xyz789",
+                "爬取時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            },
+        ]
+        digest = _content_digest(json.dumps(fallback, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        return [normalize_concert(c) for c in fallback], None, digest
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        檢查來源簽章，必要時重新載入；有重新載入時返回 True
+
+        重建（含搜尋索引）只由一個執行緒進行，其他執行緒不等待，繼續使用目前的 snapshot，
+        重建完成後整個替換。只有第一次載入（還沒有資料）或 force=True 時才等待重建完成。
+        """
+        signature = self._current_signature()
+        if not force and signature == self._signature:
+            return False
+
+        if not self._lock.acquire(blocking=force or self._signature is None):
+            # 另一個執行緒正在重建
+            return False
+        try:
+            # 取得鎖之後再確認一次，避免剛重建完又重複解析
+            if not force and signature == self._signature:
+                return False
+            concerts, source_path, content_hash = self._load_from_disk()
+            self._snapshot = CatalogSnapshot(concerts, self._snapshot.version + 1, source_path, content_hash)
+            self._signature = signature
+        finally:
+            self._lock.release()
+        return True
+
+    def snapshot(self) -> CatalogSnapshot:
+        """取得目前版本的目錄與索引（必要時自動重新載入）"""
+        self.refresh()
+        return self._snapshot
+
+    def concerts(self) -> List[dict]:
+        """取得目前的演唱會列表（必要時自動重新載入）"""
+        return self.snapshot().concerts
+
+    def get(self, concert_id: str) -> Optional[dict]:
+        """以 ID 查詢單一演唱會，O(1)"""
+        return self.snapshot().get(concert_id)
+
+
+# =====================
+# 分頁與欄位投影
+# =====================
+
+def parse_fields(fields_param: str) -> Optional[List[str]]:
+    """解析 fields= 參數（逗號分隔，可用英文別名）；未指定時返回 None 表示全部欄位"""
+    if not fields_param:
+        return None
+    fields = ['id']
+    for name in fields_param.split(','):
+        name = FIELD_ALIASES.get(name.strip(), name.strip())
+        if name and name not in fields:
+            fields.append(name)
+    return fields
+
+
+def project(concerts: List[dict], fields: Optional[List[str]]) -> List[dict]:
+    """只保留指定欄位（不存在的欄位略過）"""
+    if fields is None:
+        return concerts
+    return [{f: c[f] for f in fields if f in c} for c in concerts]
+
+
+def encode_cursor(offset: int, last_id: str) -> str:
+    raw = json.dumps({'o': offset, 'id': last_id}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+    """解析游標；格式錯誤時拋出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return int(data['o']), data.get('id')
+    except Exception as e:
+        raise ValueError('無效的 cursor') from e
+
+
+def paginate(concerts: List[dict], limit: int, cursor: str = '') -> Tuple[List[dict], Optional[str]]:
+    """
+    以游標分頁，返回 (本頁資料, 下一頁游標)
+
+    游標記錄位移與上一頁最後一筆的 ID；目錄在兩次請求之間重新載入導致位移錯開時，
+    改以 ID 找回接續位置，避免重複或漏掉資料。
+    """
+    start = 0
+    if cursor:
+        offset, last_id = decode_cursor(cursor)
+        start = max(offset, 0)
+        if last_id and not (0 < start <= len(concerts) and concerts[start - 1]['id'] == last_id):
+            start = next((i + 1 for i, c in enumerate(concerts) if c['id'] == last_id), start)
+
+    page = concerts[start:start + limit]
+    end = start + len(page)
+    next_cursor = encode_cursor(end, page[-1]['id']) if page and end < len(concerts) else None
+    return page, next_cursor
@@ -6,22 +6,31 @@
 import argparse
 import glob
 import os
+import queue
 import sys
+import threading
 import time
 import json
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 
+from concert_id import ensure_concert_id
+from http_fetch import DETAIL_CONCURRENCY, DETAIL_RATE, HostThrottle, fetch, fetch_all
+
 # Gemini AI 整合
 import google.generativeai as genai
 
 gemini_model = None
 
+# 單一站點整體爬取時間上限（秒）；與每個請求的 timeout 不同，超過時不再等待該站點
+SITE_TIME_LIMIT = 180
+# 整次爬取的時間上限（秒）
+CRAWL_DEADLINE = 600
+
 
 def get_gemini_model():
     """Lazily init Gemini model using env var GEMINI_API_KEY."""
@@ -136,6 +145,71 @@ def load_state_if_exists(path: str):
     return path if os.path.exists(path) else None
 
 
+class BrowserSession:
+    """
+    一次爬取共用的 Playwright 瀏覽器
+
+    瀏覽器與 context 只啟動一次，所有網址在同一個分頁依序載入（sync API 不可跨執行緒共用），
+    storage state（登入/驗證 cookie）在結束時寫入一次。
+
+    用法：
+        with BrowserSession("kktix_state.json") as browser:
+            html = browser.page_html(url)
+    """
+
+    def __init__(self, state_file: str, force_headful: bool = False, timeout: int = 10):
+        self.state_file = state_file
+        self.force_headful = force_headful
+        self.timeout = timeout
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+
+    def __enter__(self) -> "BrowserSession":
+        self._playwright = sync_playwright().start()
+        try:
+            self._browser = launch_browser_with_fallback(self._playwright, force_headful=self.force_headful)
+            self._context = self._browser.new_context(storage_state=load_state_if_exists(self.state_file))
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def page_html(self, url: str, settle_ms: int = 5000) -> str:
+        """載入網址並返回 HTML；分頁當掉時重開一個"""
+        if self._page is None or self._page.is_closed():
+            self._page = self._context.new_page()
+        page = self._page
+        page.goto(url, timeout=self.timeout * 1000, wait_until="domcontentloaded")
+        try:
+            page.wait_for_load_state("networkidle", timeout=self.timeout * 1000)
+        except Exception:
+            page.wait_for_timeout(min(settle_ms, self.timeout * 1000))
+        return page.content()
+
+    def close(self) -> None:
+        if self._context is not None:
+            try:
+                self._context.storage_state(path=self.state_file)
+            except Exception as e:
+                print(f"  ⚠ 無法儲存瀏覽器狀態: {e}")
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+        self._playwright = self._browser = self._context = self._page = None
+
+
 def wait_manual_verification(message="請在開啟的瀏覽器完成驗證/登入後按 Enter 繼續..."):
     try:
         input(message)
@@ -245,7 +319,7 @@ class KKTIXCrawler(ConcertCrawler):
         ]
         for ju in json_urls:
             try:
-                r = requests.get(ju, headers=self.headers, timeout=self.timeout)
+                r = fetch(ju, headers=self.headers, timeout=self.timeout)
                 if r.status_code != 200:
                     continue
                 payload = r.json()
@@ -283,7 +357,7 @@ class KKTIXCrawler(ConcertCrawler):
             list_urls = [f"{self.base_url}/events", f"{self.base_url}/events?category=music"]
             for lu in list_urls:
                 try:
-                    rr = requests.get(lu, headers=self.headers, timeout=self.timeout)
+                    rr = fetch(lu, headers=self.headers, timeout=self.timeout)
                     if rr.status_code != 200:
                         continue
                     soup = BeautifulSoup(rr.text, "lxml")
@@ -328,53 +402,42 @@ class KKTIXCrawler(ConcertCrawler):
                     f"{self.base_url}/explore",  # 探索頁
                     f"{self.base_url}/events",  # 活動列表
                 ]
-                soup = None
-                for pub_url in public_urls:
-                    try:
-                        with sync_playwright() as p:
-                            browser = launch_browser_with_fallback(p, force_headful=force_headful)
-                            context = browser.new_context(storage_state=load_state_if_exists(state_file))
-                            page = context.new_page()
-                            page.goto(pub_url, timeout=self.timeout * 1000, wait_until="domcontentloaded")
-                            try:
-                                page.wait_for_load_state("networkidle", timeout=self.timeout * 1000)
-                            except Exception:
-                                page.wait_for_timeout(min(5000, self.timeout * 1000))  # 給更多時間載入
-                            soup = BeautifulSoup(page.content(), "lxml")
-                            context.storage_state(path=state_file)
-                            browser.close()
+                # 列表頁與最多 15 個詳細頁共用同一個瀏覽器，結束時才寫入 storage state
+                with BrowserSession(state_file, force_headful=force_headful, timeout=self.timeout) as browser:
+                    soup = None
+                    for pub_url in public_urls:
+                        try:
+                            soup = BeautifulSoup(browser.page_html(pub_url, settle_ms=5000), "lxml")  # 給更多時間載入
                             # 檢查是否有活動連結
                             test_links = soup.select("a[href*='/events/']")
                             if test_links:
                                 print(f"  ✓ 在 {pub_url} 找到 {len(test_links)} 個活動連結")
                                 break
-                    except Exception as e:
-                        print(f"  ⚠ {pub_url} 失敗: {e}")
-                        continue
-                
-                if not soup:
-                    raise RuntimeError("無法載入任何 KKTIX 頁面")
-                links = soup.select("a[href*='/events/']")[:15]
-                for a in links:
-                    url = a.get("href") or ""
-                    if url and not url.startswith("http"):
-                        url = self.base_url + url
+                        except Exception as e:
+                            print(f"  ⚠ {pub_url} 失敗: {e}")
+                            continue
+
+                    if not soup:
+                        raise RuntimeError("無法載入任何 KKTIX 頁面")
+                    links = soup.select("a[href*='/events/']")[:15]
+                    details = []
+                    for a in links:
+                        url = a.get("href") or ""
+                        if url and not url.startswith("http"):
+                            url = self.base_url + url
+                        detail = None
+                        if url:
+                            try:
+                                detail = BeautifulSoup(browser.page_html(url, settle_ms=3000), "lxml")
+                            except Exception:
+                                pass
+                        details.append((a, url, detail))
+
+                for a, url, detail in details:
                     title = a.get_text(strip=True)
                     date = venue = ""
-                    if url:
+                    if detail is not None:
                         try:
-                            with sync_playwright() as p:
-                                browser = launch_browser_with_fallback(p, force_headful=force_headful)
-                                context = browser.new_context(storage_state=load_state_if_exists(state_file))
-                                pg = context.new_page()
-                                pg.goto(url, timeout=self.timeout * 1000, wait_until="domcontentloaded")
-                                try:
-                                    pg.wait_for_load_state("networkidle", timeout=self.timeout * 1000)
-                                except Exception:
-                                    pg.wait_for_timeout(min(3000, self.timeout * 1000))
-                                detail = BeautifulSoup(pg.content(), "lxml")
-                                context.storage_state(path=state_file)
-                                browser.close()
                             t_el = detail.select_one("time[datetime], .event-date, .date, .time")
                             date = t_el.get("datetime") if (t_el and t_el.has_attr("datetime")) else (
                                 t_el.get_text(strip=True) if t_el else ""
@@ -418,10 +481,14 @@ class KKTIXCrawler(ConcertCrawler):
 class TicketCrawler(ConcertCrawler):
     """年代售票爬蟲 (等級1)"""
 
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, detail_concurrency: int = DETAIL_CONCURRENCY,
+                 detail_rate: float = DETAIL_RATE):
         super().__init__(timeout=timeout)
         self.base_url = "https://ticket.com.tw"
         self.site_name = "年代售票"
+        # 詳細頁：同時請求數與每秒請求數上限
+        self.detail_concurrency = detail_concurrency
+        self.throttle = HostThrottle(detail_concurrency, detail_rate)
 
     def crawl(self) -> List[dict]:
         print(f"\n[等級1] 開始爬取 {self.site_name}...")
@@ -435,7 +502,7 @@ class TicketCrawler(ConcertCrawler):
         html = None
         for lu in list_urls:
             try:
-                resp = requests.get(lu, headers=self.headers, timeout=self.timeout)
+                resp = fetch(lu, headers=self.headers, timeout=self.timeout)
                 if resp.status_code == 200 and "html" in resp.headers.get("Content-Type", "").lower():
                     html = resp.text
                     break
@@ -470,6 +537,7 @@ class TicketCrawler(ConcertCrawler):
         def norm(el):
             return el.get_text(strip=True) if el else ""
 
+        cards = []
         for c in candidates:
             try:
                 a = c.find("a") or (c if c.name == "a" else None)
@@ -479,34 +547,39 @@ class TicketCrawler(ConcertCrawler):
                 title = norm(c.find("h4")) or norm(c.find("h3")) or norm(c.find("h2"))
                 date = norm(c.select_one(".date")) or norm(c.select_one(".time"))
                 venue = norm(c.select_one(".place")) or norm(c.select_one(".venue"))
-
-                if link and (not title or not date or not venue):
-                    try:
-                        dresp = requests.get(link, headers=self.headers, timeout=self.timeout)
-                        if dresp.status_code == 200:
-                            dsoup = BeautifulSoup(dresp.text, "lxml")
-                            title = title or norm(dsoup.select_one("h1, h2.page-title"))
-                            date = date or norm(dsoup.select_one(".date, .event-date, time"))
-                            venue = venue or norm(dsoup.select_one(".place, .venue, .location"))
-                    except Exception:
-                        pass
-
-                if not any([title, date, venue, link]):
-                    continue
-                self.concerts.append(
-                    {
-                        "來源網站": self.site_name,
-                        "演出藝人": title or "未知藝人",
-                        "演出時間": date or "未公布",
-                        "演出地點": venue or "未公布",
-                        "網址": link or self.base_url,
-                        "爬取時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    }
-                )
+                cards.append([link, title, date, venue])
             except Exception as e:
                 print(f"  ⚠ 解析單筆資料時發生錯誤: {e}")
                 continue
 
+        # 缺少標題/日期/地點的卡片，詳細頁同時抓取（共用連線池，受同時數與速率限制）
+        incomplete = [card for card in cards if card[0] and not all(card[1:])]
+        responses = fetch_all([card[0] for card in incomplete], headers=self.headers, timeout=self.timeout,
+                              max_workers=self.detail_concurrency, throttle=self.throttle)
+        for card, dresp in zip(incomplete, responses):
+            try:
+                if dresp is not None and dresp.status_code == 200:
+                    dsoup = BeautifulSoup(dresp.text, "lxml")
+                    card[1] = card[1] or norm(dsoup.select_one("h1, h2.page-title"))
+                    card[2] = card[2] or norm(dsoup.select_one(".date, .event-date, time"))
+                    card[3] = card[3] or norm(dsoup.select_one(".place, .venue, .location"))
+            except Exception:
+                pass
+
+        for link, title, date, venue in cards:
+            if not any([title, date, venue, link]):
+                continue
+            self.concerts.append(
+                {
+                    "來源網站": self.site_name,
+                    "演出藝人": title or "未知藝人",
+                    "演出時間": date or "未公布",
+                    "演出地點": venue or "未公布",
+                    "網址": link or self.base_url,
+                    "爬取時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }
+            )
+
         print(f"✓ {self.site_name} 爬取完成，共 {len(self.concerts)} 筆資料")
         if not self.concerts:
             return self._fallback_placeholder()
@@ -540,7 +613,7 @@ class IndievoxCrawler(ConcertCrawler):
 
         try:
             url = f"{self.base_url}/activity/list"
-            resp = requests.get(url, headers=self.headers, timeout=self.timeout)
+            resp = fetch(url, headers=self.headers, timeout=self.timeout)
             if resp.status_code != 200:
                 return self._fallback_placeholder()
 
@@ -597,7 +670,7 @@ class IndievoxCrawler(ConcertCrawler):
     def _extract_detail(self, detail_url: str) -> dict:
         """從詳細頁面抽取完整資訊（標題、日期、場地）"""
         try:
-            resp = requests.get(detail_url, headers=self.headers, timeout=10)
+            resp = fetch(detail_url, headers=self.headers, timeout=10)
             if resp.status_code != 200:
                 return {}
             
@@ -678,7 +751,7 @@ class AccupassCrawler(ConcertCrawler):
             try:
                 # Accupass 搜尋 URL
                 url = f"{self.base_url}/search?q={keyword}"
-                resp = requests.get(url, headers=self.headers, timeout=self.timeout)
+                resp = fetch(url, headers=self.headers, timeout=self.timeout)
                 if resp.status_code != 200:
                     continue
 
@@ -781,10 +854,26 @@ class BooksTicketCrawler(ConcertCrawler):
 
 
 class ConcertCrawlerManager:
-    """演唱會爬蟲管理器"""
+    """
+    演唱會爬蟲管理器
+
+    預設各站點同時爬取（每站一個執行緒），總耗時約為最慢的站點而非所有站點相加。
+    超過 site_time_limit 或整體 deadline 仍未完成的站點不再等待，結果以 timeout 記錄在 site_stats。
+    """
 
-    def __init__(self, per_site_timeout: int = 10):
+    def __init__(self, per_site_timeout: int = 10, concurrent: bool = True,
+                 site_time_limit: float = SITE_TIME_LIMIT, deadline: float = CRAWL_DEADLINE):
         self.all_concerts: List[dict] = []
+        self.concurrent = concurrent
+        self.site_time_limit = site_time_limit
+        self.deadline = deadline
+        # 每個站點的執行結果：site / status(ok|error|timeout|busy) / count / seconds
+        self.site_stats: List[dict] = []
+        # 站點 → 上次爬取結束的時間（monotonic），用於同一站點兩次爬取之間的間隔
+        self._last_visit: Dict[str, float] = {}
+        # 逾時後仍在背景執行的站點，下次爬取時跳過，避免兩個執行緒共用同一個爬蟲物件
+        self._running: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
         # 等級定義：
         # 1 = 主流售票：拓元/年代/KKTIX（核心流量）
         # 2 = 次主流與獨立：Indievox、Accupass 等
@@ -793,13 +882,104 @@ class ConcertCrawlerManager:
         self.level2_crawlers = [IndievoxCrawler(timeout=per_site_timeout), AccupassCrawler(timeout=per_site_timeout)]
         self.level3_crawlers = [BooksTicketCrawler(timeout=per_site_timeout)]
 
-    def _run_crawlers(self, crawlers: List[ConcertCrawler], delay: int) -> None:
+    def _wait_politely(self, crawler: ConcertCrawler, delay: float) -> None:
+        """同一站點兩次爬取之間至少間隔 delay 秒；只在該站點自己的執行緒等待"""
+        with self._lock:
+            last = self._last_visit.get(crawler.site_name)
+        if last is not None:
+            wait = last + delay - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+    def _crawl_site(self, crawler: ConcertCrawler, delay: float) -> dict:
+        self._wait_politely(crawler, delay)
+        start = time.monotonic()
+        try:
+            concerts, status = crawler.crawl() or [], "ok"
+        except Exception as e:
+            print(f"✗ {crawler.site_name} 爬取失敗: {e}")
+            concerts, status = [], "error"
+        finally:
+            with self._lock:
+                self._last_visit[crawler.site_name] = time.monotonic()
+        return {
+            "site": crawler.site_name,
+            "status": status,
+            "count": len(concerts),
+            "seconds": round(time.monotonic() - start, 2),
+            "concerts": concerts,
+        }
+
+    def _run_sequential(self, crawlers: List[ConcertCrawler], delay: float) -> List[dict]:
+        results = []
         for crawler in crawlers:
-            concerts = crawler.crawl()
-            self.all_concerts.extend(concerts)
+            results.append(self._crawl_site(crawler, delay))
             time.sleep(delay)
+        return results
+
+    def _run_concurrent(self, crawlers: List[ConcertCrawler], delay: float) -> List[dict]:
+        """各站點在各自的 daemon 執行緒爬取；逾時的站點留在背景結束，不阻塞程式退出"""
+        started = time.monotonic()
+        deadline = started + self.deadline
+        done: "queue.Queue[tuple]" = queue.Queue()
+        results: List[Optional[dict]] = [None] * len(crawlers)
+        limits: Dict[int, float] = {}
 
-    def crawl_by_level(self, level: int | str = 1, delay: int = 1) -> List[dict]:
+        def worker(index: int, crawler: ConcertCrawler) -> None:
+            try:
+                done.put((index, self._crawl_site(crawler, delay)))
+            finally:
+                with self._lock:
+                    self._running.pop(crawler.site_name, None)
+
+        for index, crawler in enumerate(crawlers):
+            with self._lock:
+                busy = crawler.site_name in self._running
+                if not busy:
+                    thread = threading.Thread(target=worker, args=(index, crawler),
+                                              name=f"crawl-{crawler.site_name}", daemon=True)
+                    self._running[crawler.site_name] = thread
+            if busy:
+                print(f"⚠ {crawler.site_name} 上次逾時的爬取仍在執行，本次略過")
+                results[index] = {"site": crawler.site_name, "status": "busy", "count": 0,
+                                  "seconds": 0.0, "concerts": []}
+                continue
+            limits[index] = min(time.monotonic() + self.site_time_limit, deadline)
+            thread.start()
+
+        while limits:
+            try:
+                index, result = done.get(timeout=max(min(limits.values()) - time.monotonic(), 0))
+                if index in limits:
+                    del limits[index]
+                    results[index] = result
+            except queue.Empty:
+                now = time.monotonic()
+                for index in [i for i, limit in limits.items() if limit <= now]:
+                    del limits[index]
+                    site = crawlers[index].site_name
+                    print(f"⏱ {site} 超過時間上限，不再等待")
+                    results[index] = {"site": site, "status": "timeout", "count": 0,
+                                      "seconds": round(now - started, 2), "concerts": []}
+        return results
+
+    def _run_crawlers(self, crawlers: List[ConcertCrawler], delay: float) -> None:
+        started = time.monotonic()
+        runner = self._run_concurrent if self.concurrent else self._run_sequential
+        results = runner(crawlers, delay)
+
+        # 依站點順序合併，輸出順序與完成先後無關
+        self.site_stats = []
+        for result in results:
+            self.all_concerts.extend(ensure_concert_id(c) for c in result.pop("concerts"))
+            self.site_stats.append(result)
+
+        icons = {"ok": "✓", "error": "✗", "timeout": "⏱", "busy": "⚠"}
+        print(f"\n{'同時' if self.concurrent else '依序'}爬取 {len(crawlers)} 個站點，總耗時 {time.monotonic() - started:.1f} 秒")
+        for stat in self.site_stats:
+            print(f"  {icons[stat['status']]} {stat['site']}: {stat['count']} 筆，{stat['seconds']:.1f} 秒")
+
+    def crawl_by_level(self, level: int | str = 1, delay: float = 1) -> List[dict]:
         level_str = str(level)
         self.all_concerts = []
 
@@ -818,7 +998,7 @@ class ConcertCrawlerManager:
         return self.all_concerts
 
     def save_results(self, fmt: str = "excel") -> str:
-        columns = ["來源網站", "演出藝人", "演出時間", "演出地點", "網址", "爬取時間"]
+        columns = ["id", "來源網站", "演出藝人", "演出時間", "演出地點", "網址", "爬取時間"]
         df = pd.DataFrame(self.all_concerts, columns=columns)
         df = df.drop_duplicates(subset=["演出藝人", "演出時間", "演出地點"])
 
@@ -856,13 +1036,17 @@ def parse_args() -> argparse.Namespace:
         help="等級：1=主流(拓元/年代/KKTIX)、2=次主流(Indievox/Accupass)、3=補充、all=全部"
     )
     parser.add_argument("--format", default="excel", choices=["excel", "json", "both"], help="輸出格式")
-    parser.add_argument("--delay", default=1, type=int, help="爬蟲間延遲秒數")
+    parser.add_argument("--delay", default=1, type=float, help="同一站點兩次爬取之間的間隔秒數")
+    parser.add_argument("--sequential", action="store_true", help="依序爬取各站點（預設同時爬取）")
+    parser.add_argument("--site-timeout", default=SITE_TIME_LIMIT, type=float, help="單一站點整體時間上限（秒）")
+    parser.add_argument("--deadline", default=CRAWL_DEADLINE, type=float, help="整次爬取時間上限（秒）")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    manager = ConcertCrawlerManager()
+    manager = ConcertCrawlerManager(concurrent=not args.sequential, site_time_limit=args.site_timeout,
+                                    deadline=args.deadline)
 
     manager.crawl_by_level(args.mode, delay=args.delay)
     manager.save_results(fmt=args.format)
@@ -0,0 +1,52 @@
+"""
+演唱會 ID 產生器
+以 來源網站 + 網址 + 演出藝人 + 演出時間 的內容摘要產生固定 ID，
+不受 Python hash() 隨機化影響，重啟或多個 worker 之間都一致，
+可作為關注/提醒、索引與快取的永久鍵值。
+"""
+import hashlib
+import unicodedata
+
+# 16 個十六進位字元（64 bit），十萬筆資料的碰撞機率約 3e-10
+ID_DIGEST_SIZE = 8
+
+
+def _norm_text(value) -> str:
+    """NFKC 正規化、去除多餘空白並轉小寫"""
+    if value is None:
+        return ''
+    text = unicodedata.normalize('NFKC', str(value))
+    return ' '.join(text.split()).lower()
+
+
+def _norm_url(value) -> str:
+    """去除協定與結尾斜線，讓 http/https 與有無斜線的網址視為同一個"""
+    url = _norm_text(value)
+    for prefix in ('https://', 'http://'):
+        if url.startswith(prefix):
+            url = url[len(prefix):]
+            break
+    return url.strip('/')
+
+
+def make_concert_id(concert: dict) -> str:
+    """
+    根據演唱會內容產生固定 ID
+
+    支援正規化後的中文欄位（來源網站/網址/演出藝人/演出時間），
+    也相容 crawlers/ 產生的英文欄位（source/url/title/date）。
+    """
+    source = concert.get('來源網站') or concert.get('source') or ''
+    url = concert.get('網址') or concert.get('url') or concert.get('link') or ''
+    artist = concert.get('演出藝人') or concert.get('artist') or concert.get('title') or ''
+    event_time = concert.get('演出時間') or concert.get('date') or ''
+
+    key = '\x1f'.join([_norm_text(source), _norm_url(url), _norm_text(artist), _norm_text(event_time)])
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=ID_DIGEST_SIZE).hexdigest()
+
+
+def ensure_concert_id(concert: dict) -> dict:
+    """若記錄尚無 id 則補上，返回同一個 dict"""
+    if not concert.get('id'):
+        concert['id'] = make_concert_id(concert)
+    return concert
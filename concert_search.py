@@ -0,0 +1,233 @@
+"""
+演唱會全文搜尋索引
+對 演出藝人 / 演出地點 / title 建立倒排索引：
+中日韓文字以單字 + 二元組（bigram）切詞，拉丁字母與數字以整個單字切詞（查詢時做前綴比對）。
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+# 搜尋欄位：欄位名稱 → 記錄中的鍵；排列順序即排名優先順序
+SEARCH_FIELDS = {
+    'artist': '演出藝人',
+    'title': 'title',
+    'venue': '演出地點',
+}
+
+_CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'  # 假名、中日韓漢字、諺文
+_TOKEN_RE = re.compile(f'[{_CJK_CHARS}]+|[0-9a-z]+')
+
+# 前綴展開結果的快取上限（每個欄位）
+PREFIX_CACHE_SIZE = 1024
+# 搜尋結果快取上限；索引建立後不再變動，快取不需要失效處理
+RESULT_CACHE_SIZE = 256
+
+
+def normalize_text(value) -> str:
+    """NFKC 正規化後轉小寫（全形英數會轉成半形）"""
+    if value is None:
+        return ''
+    return unicodedata.normalize('NFKC', str(value)).lower()
+
+
+def _is_cjk(token: str) -> bool:
+    return not ('0' <= token[0] <= '9' or 'a' <= token[0] <= 'z')
+
+
+def index_terms(text: str) -> Set[str]:
+    """文件端切詞：CJK 單字與二元組、拉丁單字"""
+    terms = set()
+    for token in _TOKEN_RE.findall(text):
+        if _is_cjk(token):
+            terms.update(token)
+            terms.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.add(token)
+    return terms
+
+
+def parse_query(text: str) -> Tuple[List[str], List[str], List[str]]:
+    """
+    查詢端切詞
+
+    Returns:
+        (精確詞, 前綴詞, 需要回頭驗證的 CJK 片段)
+        長度 >= 3 的 CJK 片段拆成二元組後可能誤判，需對候選結果做子字串驗證
+    """
+    exact, prefixes, verify = [], [], []
+    for token in _TOKEN_RE.findall(text):
+        if not _is_cjk(token):
+            prefixes.append(token)
+        elif len(token) == 1:
+            exact.append(token)
+        else:
+            exact.extend(token[i:i + 2] for i in range(len(token) - 1))
+            if len(token) >= 3:
+                verify.append(token)
+    return exact, prefixes, verify
+
+
+class SearchIndex:
+    """
+    以記錄在目錄中的位置（int）為文件編號的倒排索引
+
+    每個欄位分兩層：詞 → 含有該詞的相異欄位文字（文字編號），文字編號 → 已排序的文件編號。
+    同一場地/藝人名稱的大量記錄只切詞、比對一次；查詢結果由各文字已排序的文件編號合併而成，不需每次排序整個結果。
+    """
+
+    def __init__(self, concerts: List[dict], cache_size: int = RESULT_CACHE_SIZE):
+        self.size = len(concerts)
+        self.cache_size = cache_size
+        self._result_cache: Dict[Tuple[str, str, str], List[int]] = {}
+        # 每個欄位的相異文字、文字 → 文字編號、文字編號 → 文件編號（依加入順序，已排序）
+        self._texts: Dict[str, List[str]] = {field: [] for field in SEARCH_FIELDS}
+        self._text_ids: Dict[str, Dict[str, int]] = {field: {} for field in SEARCH_FIELDS}
+        self._docs: Dict[str, List[List[int]]] = {field: [] for field in SEARCH_FIELDS}
+        self._postings: Dict[str, Dict[str, Set[int]]] = {field: {} for field in SEARCH_FIELDS}
+        # 正規化後的完整藝人名稱 → 藝人文字編號，用於把完全相符的結果排最前面
+        self._exact_artist: Dict[str, Set[int]] = {}
+        self._latin_tokens: Dict[str, List[str]] = {}
+        self._prefix_cache: Dict[str, Dict[str, Set[int]]] = {field: {} for field in SEARCH_FIELDS}
+
+        for doc_id, concert in enumerate(concerts):
+            for field, key in SEARCH_FIELDS.items():
+                text = normalize_text(concert.get(key, ''))
+                text_ids = self._text_ids[field]
+                text_id = text_ids.get(text)
+                if text_id is None:
+                    text_id = text_ids[text] = len(self._texts[field])
+                    self._texts[field].append(text)
+                    self._docs[field].append([])
+                    postings = self._postings[field]
+                    for term in index_terms(text):
+                        postings.setdefault(term, set()).add(text_id)
+                    if field == 'artist':
+                        self._exact_artist.setdefault(text.strip(), set()).add(text_id)
+                self._docs[field][text_id].append(doc_id)
+
+        for field, postings in self._postings.items():
+            self._latin_tokens[field] = sorted(t for t in postings if not _is_cjk(t))
+
+    def _prefix_postings(self, field: str, prefix: str) -> Set[int]:
+        """所有以 prefix 開頭的拉丁單字的 posting 聯集（文字編號）"""
+        cache = self._prefix_cache[field]
+        cached = cache.get(prefix)
+        if cached is not None:
+            return cached
+
+        tokens = self._latin_tokens[field]
+        postings = self._postings[field]
+        result: Set[int] = set()
+        i = bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            result |= postings[tokens[i]]
+            i += 1
+
+        if len(cache) >= PREFIX_CACHE_SIZE:
+            cache.clear()
+        cache[prefix] = result
+        return result
+
+    def _match_texts(self, field: str, query: str) -> Set[int]:
+        """在單一欄位中找出包含查詢所有詞的相異文字（文字編號）"""
+        text = normalize_text(query).strip()
+        exact, prefixes, verify = parse_query(text)
+        texts = self._texts[field]
+
+        if not exact and not prefixes:
+            # 查詢中沒有可索引的字元（例如只有符號），退回子字串掃描（每個相異文字一次）
+            return {i for i, t in enumerate(texts) if text in t}
+
+        postings = self._postings[field]
+        sets = [postings.get(term, set()) for term in exact]
+        sets.extend(self._prefix_postings(field, p) for p in prefixes)
+        sets.sort(key=len)
+
+        result = sets[0]
+        for s in sets[1:]:
+            if not result:
+                break
+            result = result & s
+
+        for needle in verify:
+            if not result:
+                break
+            result = {i for i in result if needle in texts[i]}
+        return result
+
+    def _doc_ids(self, field: str, text_ids: Set[int]) -> List[int]:
+        """文字編號 → 依目錄順序排列的文件編號；各文字的文件編號已排序，合併即可"""
+        docs = self._docs[field]
+        if len(text_ids) == 1:
+            return docs[next(iter(text_ids))]
+        merged: List[int] = []
+        for text_id in text_ids:
+            merged.extend(docs[text_id])
+        # 由多段已排序的區段組成，Timsort 以合併區段完成
+        merged.sort()
+        return merged
+
+    def match_field(self, field: str, query: str) -> List[int]:
+        """
+        在單一欄位中找出包含查詢所有詞的文件，依目錄順序返回
+
+        返回的列表可能是索引內部的資料，呼叫端不可修改。
+        """
+        return self._doc_ids(field, self._match_texts(field, query))
+
+    def search(self, q: str = '', artist: str = '', venue: str = '') -> List[int]:
+        """
+        搜尋並排名，返回文件編號
+
+        排名：藝人名稱完全相符 → 藝人符合 → 標題符合 → 地點符合；同一層依目錄順序。
+        artist / venue 為額外的欄位過濾條件。
+        返回的列表可能來自快取，呼叫端不可修改。
+        """
+        key = (q, artist, venue)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._search(q, artist, venue)
+        if self.cache_size:
+            if len(self._result_cache) >= self.cache_size:
+                self._result_cache.clear()
+            self._result_cache[key] = result
+        return result
+
+    def _search(self, q: str, artist: str, venue: str) -> List[int]:
+        candidates: Optional[Set[int]] = None
+        if artist:
+            candidates = set(self.match_field('artist', artist))
+        if venue:
+            venue_docs = self.match_field('venue', venue)
+            candidates = set(venue_docs) if candidates is None else candidates.intersection(venue_docs)
+
+        if not q:
+            return sorted(candidates) if candidates is not None else list(range(self.size))
+
+        # 完全相符與藝人符合是同一欄位的文字，在文字層級分開即可，不需逐筆排除
+        exact_texts = self._exact_artist.get(normalize_text(q).strip(), set())
+        artist_texts = self._match_texts('artist', q)
+        tiers: List[List[int]] = [
+            self._doc_ids('artist', exact_texts) if exact_texts else [],
+            self._doc_ids('artist', artist_texts - exact_texts) if artist_texts - exact_texts else [],
+        ]
+        tiers.extend(self.match_field(field, q) for field in SEARCH_FIELDS if field != 'artist')
+
+        ordered: List[int] = []
+        seen: Optional[Set[int]] = None
+        for tier in tiers:
+            if not tier:
+                continue
+            if candidates is not None:
+                tier = [i for i in tier if i in candidates]
+            if ordered:
+                # 不同欄位的結果可能重疊（藝人與標題都符合），只有這時才逐筆排除
+                if seen is None:
+                    seen = set(ordered)
+                tier = [i for i in tier if i not in seen]
+                seen.update(tier)
+            ordered.extend(tier)
+        return ordered
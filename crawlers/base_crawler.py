@@ -5,7 +5,7 @@
 import os
 import json
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 import google.generativeai as genai
 
 
@@ -15,7 +15,60 @@ class BaseTicketCrawler(ABC):
     def __init__(self):
         self.site_name = self.__class__.__name__.replace('Crawler', '')
         self.gemini_model = None
+        # 瀏覽器驅動：由 run_all_crawlers 指定共用的 DriverPool 時向池借用，否則自行啟動
+        self.driver = None
+        self.driver_pool = None
         self._init_gemini()
+
+    def _get_driver(self):
+        """取得或創建瀏覽器驅動（SeleniumBase）；無法啟動時返回 None"""
+        if self.driver is None:
+            try:
+                if self.driver_pool is not None:
+                    self.driver = self.driver_pool.acquire()
+                else:
+                    from crawlers.driver_pool import create_driver
+                    print(f"[設定] {self.site_name}: 初始化瀏覽器驅動...")
+                    self.driver = create_driver()
+            except ImportError:
+                print(f"[失敗] {self.site_name}: seleniumbase 未安裝")
+                return None
+            except Exception as e:
+                print(f"[錯誤] {self.site_name}: 無法啟動瀏覽器: {e}")
+                return None
+        return self.driver
+
+    def _close_driver(self):
+        """關閉瀏覽器驅動（借自驅動池時歸還）"""
+        driver, self.driver = self.driver, None
+        if driver is None:
+            return
+        if self.driver_pool is not None:
+            self.driver_pool.release(driver)
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _scrape_details(self, scrape: Callable[[str, Optional[object]], Optional[Dict]],
+                        urls: List[str]) -> List[Optional[Dict]]:
+        """
+        抓取詳細頁，依網址順序返回 scrape(url, driver) 的結果（失敗為 None）
+
+        有驅動池時先歸還列表頁用的驅動，由多個瀏覽器同時處理；否則依序使用自己的驅動。
+        """
+        if self.driver_pool is not None:
+            self._close_driver()
+            return self.driver_pool.map(lambda driver, url: scrape(url, driver), urls)
+        results = []
+        for url in urls:
+            try:
+                results.append(scrape(url, None))
+            except Exception as e:
+                print(f"[錯誤] {str(e)[:50]}")
+                results.append(None)
+        return results
     
     def _init_gemini(self):
         """初始化 Gemini API"""
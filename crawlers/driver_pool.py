@@ -0,0 +1,228 @@
+"""
+SeleniumBase 瀏覽器驅動池
+由 run_all_crawlers 建立並擁有，各爬蟲借用已啟動的 Chrome，不再各自冷啟動。
+驅動載入超過 max_pages 個頁面後回收重開（避免記憶體累積），失去回應（崩潰）時丟棄並重開；
+map() 以多個驅動同時處理詳細頁網址，結果依輸入順序返回。
+"""
+import os
+import threading
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar('T')
+
+# 同時開啟的瀏覽器數
+DRIVER_POOL_SIZE = int(os.environ.get('DRIVER_POOL_SIZE', '2'))
+# 每個瀏覽器載入多少頁面後重開
+DRIVER_MAX_PAGES = 50
+
+
+def create_driver():
+    """預設的驅動建立方式（與各爬蟲原本的設定相同）"""
+    from seleniumbase import Driver
+    return Driver(uc=True, headless=True)
+
+
+class PooledDriver:
+    """包裝驅動以計算載入的頁面數，其餘屬性直接轉給原驅動"""
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages = 0
+
+    def get(self, url: str):
+        self.pages += 1
+        return self._driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class DriverPool:
+    """
+    執行緒安全的瀏覽器驅動池
+
+    用法：
+        with DriverPool(size=2) as pool:
+            driver = pool.acquire()
+            try:
+                driver.get(url)
+            finally:
+                pool.release(driver)
+    """
+
+    def __init__(self, size: int = DRIVER_POOL_SIZE, max_pages: int = DRIVER_MAX_PAGES,
+                 factory: Callable[[], object] = create_driver):
+        self.size = max(size, 1)
+        self.max_pages = max_pages
+        self.factory = factory
+        self._idle: List[PooledDriver] = []
+        self._created = 0
+        # warm() 已計入 _created、仍在背景啟動中的驅動數
+        self._warming = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # undetected-chromedriver 啟動時會修改驅動檔案，同時啟動多個會互相干擾
+        self._create_lock = threading.Lock()
+        self.stats = {'started': 0, 'recycled': 0, 'crashed': 0}
+
+    def __enter__(self) -> 'DriverPool':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _start(self) -> PooledDriver:
+        with self._create_lock:
+            driver = PooledDriver(self.factory())
+            self.stats['started'] += 1
+        return driver
+
+    def warm(self, count: int = 1) -> None:
+        """在背景先啟動 count 個驅動，第一個爬蟲取用時不必等待 Chrome 冷啟動"""
+        def start_one():
+            with self._cond:
+                if self._closed or self._created >= self.size:
+                    return
+                self._created += 1
+                self._warming += 1
+            try:
+                driver = self._start()
+            except Exception as e:
+                print(f"[警告] 預先啟動瀏覽器失敗: {e}")
+                with self._cond:
+                    self._created -= 1
+                    self._warming -= 1
+                    # 等待中的 acquire() 改為自己啟動
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._warming -= 1
+            self._put_back(driver)
+
+        for _ in range(min(count, self.size)):
+            threading.Thread(target=start_one, name='driver-warm', daemon=True).start()
+
+    def acquire(self) -> PooledDriver:
+        """
+        取得一個驅動；全部借出時等待歸還。無法啟動瀏覽器時拋出例外（例如 seleniumbase 未安裝）
+
+        有 warm() 的驅動仍在啟動時等它完成，不另外冷啟動一個（啟動互斥，另開只會更慢）。
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError('DriverPool 已關閉')
+                if self._idle:
+                    return self._idle.pop()
+                if self._warming:
+                    self._cond.wait()
+                    continue
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                self._cond.wait()
+        try:
+            return self._start()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    @staticmethod
+    def _alive(driver: PooledDriver) -> bool:
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def _retire(self, driver: PooledDriver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _put_back(self, driver: PooledDriver) -> None:
+        with self._cond:
+            if not self._closed:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+        self._retire(driver)
+
+    def release(self, driver: Optional[PooledDriver]) -> None:
+        """歸還驅動；頁面數達上限或已失去回應時關閉，之後需要時再重開"""
+        if driver is None:
+            return
+        if not self._alive(driver):
+            self._count('crashed')
+            self._retire(driver)
+        elif driver.pages >= self.max_pages:
+            self._count('recycled')
+            self._retire(driver)
+        else:
+            self._put_back(driver)
+
+    def _count(self, key: str) -> None:
+        with self._cond:
+            self.stats[key] += 1
+
+    def map(self, func: Callable[[PooledDriver, str], T], urls: Sequence[str],
+            workers: Optional[int] = None) -> List[Optional[T]]:
+        """
+        以多個驅動同時處理網址，依輸入順序返回 func(driver, url) 的結果
+
+        func 拋出例外的網址對應 None；處理過程中驅動崩潰或達頁面上限時換一個再繼續。
+        """
+        results: List[Optional[T]] = [None] * len(urls)
+        pending = iter(range(len(urls)))
+        lock = threading.Lock()
+
+        def worker() -> None:
+            try:
+                driver = self.acquire()
+            except Exception as e:
+                print(f"[警告] 無法取得瀏覽器: {e}")
+                return
+            try:
+                while True:
+                    with lock:
+                        index = next(pending, None)
+                    if index is None:
+                        return
+                    try:
+                        results[index] = func(driver, urls[index])
+                    except Exception:
+                        results[index] = None
+                    if driver.pages >= self.max_pages or not self._alive(driver):
+                        self.release(driver)
+                        driver = None
+                        try:
+                            driver = self.acquire()
+                        except Exception as e:
+                            # 剩下的網址由其他 worker 處理
+                            print(f"[警告] 無法重新啟動瀏覽器: {e}")
+                            return
+            finally:
+                self.release(driver)
+
+        count = min(workers or self.size, len(urls))
+        threads = [threading.Thread(target=worker, name=f'driver-worker-{i}', daemon=True) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def close(self) -> None:
+        """關閉所有閒置的驅動；借出中的驅動在歸還時關閉"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._retire(driver)
@@ -9,39 +9,15 @@ import sys
 from typing import List, Dict
 from bs4 import BeautifulSoup
 from crawlers.base_crawler import BaseTicketCrawler
+from event_time import from_epoch, parse_event_info
 
 
 class TicketComCrawler(BaseTicketCrawler):
     """年代售票 - SeleniumBase 瀏覽器自動化爬蟲"""
     
-    def __init__(self):
-        super().__init__()
-        self.driver = None
-    
     def get_target_url(self) -> str:
         return 'https://ticket.com.tw/dm.html'
     
-    def _get_driver(self):
-        """取得或創建瀏覽器驅動"""
-        if self.driver is None:
-            try:
-                from seleniumbase import Driver
-                print(f"[設定] {self.site_name}: 初始化瀏覽器驅動...")
-                self.driver = Driver(uc=True, headless=True)
-            except ImportError:
-                print(f"[失敗] {self.site_name}: seleniumbase 未安裝")
-                return None
-        return self.driver
-    
-    def _close_driver(self):
-        """關閉瀏覽器驅動"""
-        if self.driver:
-            try:
-                self.driver.quit()
-                self.driver = None
-            except:
-                pass
-    
     def _extract_event_urls_with_browser(self) -> List[str]:
         """使用瀏覽器提取所有活動 URL"""
         driver = self._get_driver()
@@ -91,9 +67,9 @@ class TicketComCrawler(BaseTicketCrawler):
             print(f"[警告] 提取 URL 失敗: {e}")
             return []
     
-    def _scrape_event_detail(self, url: str) -> Dict:
-        """使用瀏覽器抓取單一活動詳細資訊"""
-        driver = self._get_driver()
+    def _scrape_event_detail(self, url: str, driver=None) -> Dict:
+        """使用瀏覽器抓取單一活動詳細資訊（driver 未指定時使用自己的驅動）"""
+        driver = driver or self._get_driver()
         if not driver:
             return None
         
@@ -211,10 +187,10 @@ class TicketComCrawler(BaseTicketCrawler):
             
             all_events = []
             success_count = 0
+            events = self._scrape_details(self._scrape_event_detail, filtered_urls)
             
-            for i, event_url in enumerate(filtered_urls, 1):
+            for i, event in enumerate(events, 1):
                 try:
-                    event = self._scrape_event_detail(event_url)
                     if event and event['title'] != '未知' and len(event['title']) > 3:
                         all_events.append(event)
                         success_count += 1
@@ -240,33 +216,11 @@ class KKTIXCrawler(BaseTicketCrawler):
     
     def __init__(self):
         super().__init__()
-        self.driver = None
         self.base_url = "https://kktix.com/events?utf8=%E2%9C%93&search=&max_price=&min_price=&start_at=&end_at=&event_tag_ids_in=1%2C7"
     
     def get_target_url(self) -> str:
         return self.base_url
     
-    def _get_driver(self):
-        """取得或創建瀏覽器驅動"""
-        if self.driver is None:
-            try:
-                from seleniumbase import Driver
-                print(f"[設定] {self.site_name}: 初始化浏覽器驅動...")
-                self.driver = Driver(uc=True, headless=True)
-            except ImportError:
-                print(f"[失敗] {self.site_name}: seleniumbase 未安裝")
-                return None
-        return self.driver
-    
-    def _close_driver(self):
-        """關閉瀏覽器驅動"""
-        if self.driver:
-            try:
-                self.driver.quit()
-                self.driver = None
-            except:
-                pass
-    
     def _get_global_events(self) -> List[str]:
         """自動翻頁巡航：抓取所有音樂類標籤下的活動網址"""
         driver = self._get_driver()
@@ -309,9 +263,9 @@ class KKTIXCrawler(BaseTicketCrawler):
         
         return list(all_urls)
     
-    def _scrape_event_detail(self, url: str) -> Dict:
-        """抓取單一活動詳細資訊"""
-        driver = self._get_driver()
+    def _scrape_event_detail(self, url: str, driver=None) -> Dict:
+        """抓取單一活動詳細資訊（driver 未指定時使用自己的驅動）"""
+        driver = driver or self._get_driver()
         if not driver:
             return None
         
@@ -404,10 +358,10 @@ class KKTIXCrawler(BaseTicketCrawler):
             
             all_events = []
             success_count = 0
+            events = self._scrape_details(self._scrape_event_detail, event_urls)
             
-            for i, url in enumerate(event_urls, 1):
+            for i, event_data in enumerate(events, 1):
                 try:
-                    event_data = self._scrape_event_detail(url)
                     if event_data:
                         all_events.append(event_data)
                         success_count += 1
@@ -459,21 +413,31 @@ class TixCraftCrawler(BaseTicketCrawler):
             # 轉換為標準格式
             events = result.get('events', [])
             all_events = []
+            scrape_time = result.get('scrape_time')
             
             for event in events:
                 try:
-                    # 從 event_info 中提取日期
+                    # 從 event_info 中分出演出時間與售票時間（售票片段的日期不再被當成演出日期）
                     date_text = '未公布'
+                    start_at = ''
+                    sale_time = event.get('sale_time', '')
                     event_info = event.get('event_info', '')
                     if event_info and event_info != '未找到':
-                        date_match = re.search(r'(202[0-9]/[0-9]{1,2}/[0-9]{1,2}|[0-9]{1,2}月[0-9]{1,2}日|[0-9]{1,2}:\d{2})', event_info)
-                        if date_match:
-                            date_text = date_match.group(1)
+                        times = parse_event_info(event_info, scrape_time)
+                        start = from_epoch(times['start_ts'])
+                        if start:
+                            # date 維持 YYYY/MM/DD（演唱會 ID 以此計算），完整時刻放在 start_at
+                            date_text = start.strftime('%Y/%m/%d')
+                            start_at = start.isoformat()
+                        if times['sale_ts'] and (not sale_time or sale_time == '未找到'):
+                            sale_time = from_epoch(times['sale_ts']).strftime('%Y/%m/%d %H:%M')
                     
                     # 轉換格式
                     converted_event = {
                         'title': event.get('title', '未知'),
                         'date': date_text,
+                        'start_at': start_at,
+                        'sale_time': sale_time if sale_time != '未找到' else '',
                         'location': event.get('location', '未公布'),
                         'artist': event.get('title', '未知').split('-')[0].strip()[:30],  # 簡化藝人提取
                         'url': event.get('url', ''),
@@ -6,41 +6,22 @@ import re
 from typing import List, Dict
 from bs4 import BeautifulSoup
 from crawlers.base_crawler import BaseTicketCrawler
+from http_fetch import DETAIL_CONCURRENCY, DETAIL_RATE, HostThrottle, map_urls
 
 
 class IndievoxCrawler(BaseTicketCrawler):
     """iNDIEVOX 獨立音樂售票平台 - 使用瀏覽器滾動加載"""
     
-    def __init__(self):
+    def __init__(self, detail_concurrency: int = DETAIL_CONCURRENCY, detail_rate: float = DETAIL_RATE):
         super().__init__()
         self.site_name = "Indievox"
-        self.driver = None
+        # 詳細頁：同時請求數與每秒請求數上限（取代逐頁固定 sleep）
+        self.detail_concurrency = detail_concurrency
+        self.throttle = HostThrottle(detail_concurrency, detail_rate)
     
     def get_target_url(self) -> str:
         return 'https://www.indievox.com/activity/list'
     
-    def _get_driver(self):
-        """獲取瀏覽器驅動（使用 SeleniumBase）"""
-        if self.driver:
-            return self.driver
-        
-        try:
-            from seleniumbase import Driver
-            self.driver = Driver(uc=True, headless=True)
-            return self.driver
-        except Exception as e:
-            print(f"[錯誤] 無法啟動瀏覽器: {e}")
-            return None
-    
-    def _close_driver(self):
-        """關閉瀏覽器"""
-        if self.driver:
-            try:
-                self.driver.quit()
-                self.driver = None
-            except:
-                pass
-    
     def _extract_event_urls_with_scroll(self) -> List[str]:
         """使用瀏覽器滾動加載更多活動"""
         driver = self._get_driver()
@@ -169,16 +150,17 @@ class IndievoxCrawler(BaseTicketCrawler):
                 print("[失敗] 找不到活動 URL")
                 return []
             
+            # 詳細頁以有限的同時請求數抓取，速率由令牌桶限制（防止過度請求）
+            print(f"[抓取] {len(event_urls)} 個活動頁（同時 {self.detail_concurrency} 個）")
+            pages = map_urls(self.fetch_html, event_urls, throttle=self.throttle,
+                             max_workers=self.detail_concurrency)
+            
             # 解析每個活動
             all_events = []
             success_count = 0
             
-            for i, event_url in enumerate(event_urls, 1):
+            for event_url, event_html in zip(event_urls, pages):
                 try:
-                    print(f"[抓取] [{i}/{len(event_urls)}] {event_url.split('/')[-1]}")
-                    event_html = self.fetch_html(event_url)
-                    time.sleep(0.5)  # 防止過度請求
-                    
                     if event_html:
                         event = self._parse_event_detail(event_html, event_url)
                         if event and event['title'] != '未知':
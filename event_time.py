@@ -0,0 +1,275 @@
+"""
+演出 / 售票時間解析
+各爬蟲的日期都是自由文字（2026/03/15、2026 / 3 / 8、3月15日、03/04（三）12:00、
+KKTIX 的 ISO start_at、TixCraft 的 event_info 整段文字），在這裡統一轉成帶時區的 datetime
+與 epoch 秒，讓排序與日期範圍過濾都以數值比較。
+
+正規表示式預先編譯，相同文字的解析結果以 LRU 快取（目錄中大量演唱會共用相同日期）。
+台灣沒有日光節約時間，使用固定 UTC+8，不依賴系統時區資料庫。
+"""
+import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+TAIPEI_TZ = timezone(timedelta(hours=8))
+
+PARSE_CACHE_SIZE = 65536
+
+# 沒有年份的日期（03/04、3月15日）：與參考日期（爬取時間）相差超過此天數就視為明年
+_YEAR_ROLLOVER_DAYS = 183
+
+_ISO_RE = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?')
+_DATE_RE = re.compile(
+    r'(?<!\d)(?P<year>\d{4})\s*[/\-.年]\s*(?P<month>\d{1,2})\s*[/\-.月]\s*(?P<day>\d{1,2})(?!\d)'
+    r'|(?<![\d/.])(?P<short_month>\d{1,2})\s*(?:/|月)\s*(?P<short_day>\d{1,2})(?![\d/])'
+)
+_TIME_RE = re.compile(r'(?P<ampm>上午|中午|下午|晚上|AM|PM|am|pm)?\s*(?<!\d)(?P<hour>\d{1,2})\s*[:：]\s*(?P<minute>\d{2})(?!\d)')
+_SEGMENT_RE = re.compile(r'\s*[;；\n]\s*')
+# 比對關鍵字前移除空白與零寬字元（「預 售」、「•\u2060 全面開賣」）
+_KEYWORD_NOISE_RE = re.compile(r'[\s\u200b-\u200d\u2060\ufeff]+')
+
+_SALE_KEYWORDS = ('售票', '開賣', '預售', '啟售', '開售', '購票', '會員購', '抽選', '登記')
+_EVENT_KEYWORDS = ('演出', '活動', '日期', '時間', '開演', '表演', '舉辦')
+_PM_WORDS = ('下午', '晚上', 'PM', 'pm')
+
+# (epoch 秒, 是否有指定時刻)
+_Stamp = Tuple[int, bool]
+
+
+def to_epoch(dt: Optional[datetime]) -> Optional[int]:
+    return int(dt.timestamp()) if dt is not None else None
+
+
+def from_epoch(ts: Optional[int]) -> Optional[datetime]:
+    return datetime.fromtimestamp(ts, TAIPEI_TZ) if ts is not None else None
+
+
+def parse_reference(value) -> Optional[date]:
+    """解析爬取時間（2026-01-12 14:30:00 或 ISO），作為推斷年份的參考日期"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    match = _DATE_RE.search(str(value or ''))
+    if not match or not match.group('year'):
+        return None
+    try:
+        return date(int(match.group('year')), int(match.group('month')), int(match.group('day')))
+    except ValueError:
+        return None
+
+
+def _infer_year(month: int, day: int, reference: date) -> Optional[int]:
+    try:
+        candidate = date(reference.year, month, day)
+    except ValueError:
+        # 2/29 等不存在的日期
+        return None
+    if (reference - candidate).days > _YEAR_ROLLOVER_DAYS:
+        return reference.year + 1
+    return reference.year
+
+
+def _apply_time(base: datetime, match: Optional[re.Match]) -> Tuple[datetime, bool]:
+    if match is None:
+        return base, False
+    hour, minute = int(match.group('hour')), int(match.group('minute'))
+    if match.group('ampm') in _PM_WORDS and hour < 12:
+        hour += 12
+    if hour > 23 or minute > 59:
+        return base, False
+    return base.replace(hour=hour, minute=minute), True
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_stamps(text: str, reference_ordinal: int) -> Tuple[_Stamp, ...]:
+    """依出現順序取出文字中的所有日期時間"""
+    iso = _ISO_RE.findall(text)
+    if iso:
+        stamps = []
+        for value in iso:
+            value = value.replace(' ', 'T', 1).replace('Z', '+00:00')
+            try:
+                dt = datetime.fromisoformat(value)
+            except ValueError:
+                continue
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=TAIPEI_TZ)
+            stamps.append((int(dt.timestamp()), True))
+        if stamps:
+            return tuple(stamps)
+
+    reference = date.fromordinal(reference_ordinal)
+    matches = list(_DATE_RE.finditer(text))
+    stamps = []
+    last_year = None
+    for i, match in enumerate(matches):
+        if match.group('year'):
+            year, month, day = int(match.group('year')), int(match.group('month')), int(match.group('day'))
+        else:
+            month, day = int(match.group('short_month')), int(match.group('short_day'))
+            # 同一段文字中前面出現過年份時沿用（2026/07/24(五), 07/25(六)）
+            year = last_year or _infer_year(month, day, reference)
+            if year is None:
+                continue
+        try:
+            base = datetime(year, month, day, tzinfo=TAIPEI_TZ)
+        except ValueError:
+            continue
+        last_year = year
+        # 時刻只在這個日期與下一個日期之間尋找
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        dt, has_time = _apply_time(base, _TIME_RE.search(text, match.end(), end))
+        stamps.append((int(dt.timestamp()), has_time))
+    return tuple(stamps)
+
+
+def parse_stamps(text, reference=None) -> List[_Stamp]:
+    """文字中所有日期時間的 (epoch 秒, 是否有時刻)；reference 用於推斷沒寫年份的日期"""
+    text = str(text or '').strip()
+    if not text:
+        return []
+    reference = parse_reference(reference) or datetime.now(TAIPEI_TZ).date()
+    return list(_parse_stamps(text, reference.toordinal()))
+
+
+def parse_timestamp(text, reference=None) -> Optional[int]:
+    """文字中第一個日期時間的 epoch 秒"""
+    stamps = parse_stamps(text, reference)
+    return stamps[0][0] if stamps else None
+
+
+def _end_of_day(ts: int) -> int:
+    dt = from_epoch(ts)
+    return int(dt.replace(hour=23, minute=59, second=59).timestamp())
+
+
+def start_of_day(ts: Optional[float] = None) -> int:
+    """台北時間當天 00:00 的 epoch 秒（預設為今天）"""
+    dt = datetime.now(TAIPEI_TZ) if ts is None else from_epoch(int(ts))
+    return int(dt.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+
+def parse_bound(text, end: bool = False) -> Optional[int]:
+    """
+    解析查詢參數中的日期邊界（2026-03-01、2026/03/01 19:00、ISO）
+
+    end=True 且只有日期時取當天 23:59:59，讓 to=2026-03-07 包含整天。
+    """
+    stamps = parse_stamps(text)
+    if not stamps:
+        return None
+    ts, has_time = stamps[0]
+    return _end_of_day(ts) if end and not has_time else ts
+
+
+def _standalone_time(text: str) -> Optional[re.Match]:
+    """沒有日期、只有時刻的片段（例如 TixCraft 的「時間｜18:30」）"""
+    if _DATE_RE.search(text):
+        return None
+    return _TIME_RE.search(text)
+
+
+def parse_event_time(text, reference=None) -> Tuple[Optional[int], Optional[int]]:
+    """
+    解析演出時間，返回 (開始, 結束) 的 epoch 秒
+
+    開始為第一個日期（含時刻，沒有時刻時為 00:00）；結束為最後一個日期的 23:59:59，
+    讓當天稍晚開演或多日活動在結束前都算「尚未結束」。
+    """
+    text = str(text or '')
+    stamps = parse_stamps(text, reference)
+    if not stamps:
+        return None, None
+    start, has_time = stamps[0]
+    if not has_time:
+        # 日期與時刻分在不同片段
+        for segment in _SEGMENT_RE.split(text):
+            time_match = _standalone_time(segment)
+            if time_match:
+                dt, has_time = _apply_time(from_epoch(start), time_match)
+                start = int(dt.timestamp())
+                break
+    return start, max(_end_of_day(stamps[-1][0]), start)
+
+
+def _split_segments(text: str) -> Tuple[List[str], List[str]]:
+    """把整段資訊切成（演出相關片段, 售票相關片段）"""
+    event_segments, sale_segments = [], []
+    for segment in _SEGMENT_RE.split(text):
+        if not segment:
+            continue
+        compact = _KEYWORD_NOISE_RE.sub('', segment)
+        if any(keyword in compact for keyword in _SALE_KEYWORDS):
+            sale_segments.append(segment)
+        else:
+            event_segments.append(segment)
+    # 有明確演出關鍵字的片段時只用那些，避免備註中的日期（例如年齡限制）被當成演出日期
+    keyed = [s for s in event_segments
+             if any(keyword in _KEYWORD_NOISE_RE.sub('', s) for keyword in _EVENT_KEYWORDS)]
+    return keyed or event_segments, sale_segments
+
+
+def parse_event_info(text, reference=None) -> Dict[str, Optional[int]]:
+    """
+    解析 TixCraft event_info 這類整段資訊（片段以 ; 分隔）
+
+    Returns:
+        {'start_ts', 'end_ts', 'sale_ts'}，無法判斷的為 None
+    """
+    event_segments, sale_segments = _split_segments(str(text or ''))
+    start, end = parse_event_time(' ; '.join(event_segments), reference)
+    sale = parse_sale_time(' ; '.join(sale_segments), reference) if sale_segments else None
+    return {'start_ts': start, 'end_ts': end, 'sale_ts': sale}
+
+
+def parse_sale_time(text, reference=None) -> Optional[int]:
+    """售票時間：優先取含售票關鍵字片段中的第一個日期時間（多階段開賣時即為最早的一波）"""
+    text = str(text or '')
+    _, sale_segments = _split_segments(text)
+    for segment in sale_segments or [text]:
+        ts = parse_timestamp(segment, reference)
+        if ts is not None:
+            return ts
+    return None
+
+
+def concert_timestamps(concert: dict) -> Dict[str, Optional[int]]:
+    """
+    從演唱會記錄取得 {'start_ts', 'end_ts', 'sale_ts'}
+
+    演出時間依序取 start_at（ISO）→ 演出時間 / date → event_info；
+    售票時間取 sale_time / 售票時間，沒有時從 event_info 中的售票片段取得。
+    沒有年份的日期以 爬取時間 推斷年份。
+    """
+    # 沒有爬取時間時以今天推斷年份；今天的日期也是快取鍵的一部分
+    reference = concert.get('爬取時間') or concert.get('scraped_at') or datetime.now(TAIPEI_TZ).date().isoformat()
+    start, end, sale = _record_timestamps(
+        tuple(str(concert.get(key) or '') for key in ('start_at', '演出時間', 'date')),
+        str(concert.get('event_info') or ''),
+        str(concert.get('sale_time') or concert.get('售票時間') or ''),
+        str(reference),
+    )
+    return {'start_ts': start, 'end_ts': end, 'sale_ts': sale}
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _record_timestamps(event_texts: Tuple[str, ...], event_info: str, sale_text: str,
+                       reference: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """以欄位文字為鍵快取（目錄中大量記錄的日期欄位相同）"""
+    start = end = sale = None
+    for text in event_texts:
+        start, end = parse_event_time(text, reference)
+        if start is not None:
+            break
+
+    info = parse_event_info(event_info, reference) if event_info else {}
+    if start is None and info:
+        start, end = info['start_ts'], info['end_ts']
+
+    if sale_text:
+        sale = parse_sale_time(sale_text, reference)
+    if sale is None and info:
+        sale = info['sale_ts']
+    return start, end, sale
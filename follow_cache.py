@@ -0,0 +1,136 @@
+"""
+關注快取
+每位使用者的關注以 (依關注先後的列表, 集合) 保存在記憶體，
+/api/follows 的結果（關注 ID 以目錄 ID 索引解析）依目錄內容摘要快取。
+同一行程的寫入由 UserStore 在提交後直接通知失效；其他 worker 的寫入透過 UserStore.change_log
+增量同步，最多每 SYNC_INTERVAL 秒查詢一次，命中快取的請求不碰資料庫。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from user_store import CHANGE_FOLLOW, CHANGE_UNFOLLOW, UserStore
+
+# 快取的使用者數上限（LRU）
+FOLLOW_CACHE_SIZE = 10000
+# 讀取其他行程寫入的 change_log 的最短間隔（秒）；其他 worker 的關注變動最多延遲這麼久才看到
+SYNC_INTERVAL = 1.0
+
+_FOLLOW_KINDS = (CHANGE_FOLLOW, CHANGE_UNFOLLOW)
+
+
+class _UserFollows:
+    __slots__ = ('order', 'ids', 'content_hash', 'concerts')
+
+    def __init__(self, order: List[str]):
+        self.order = order
+        self.ids: Set[str] = set(order)
+        # 已解析的演唱會列表與對應的目錄內容摘要；目錄重新載入後摘要不同即重建
+        self.content_hash: Optional[str] = None
+        self.concerts: List[dict] = []
+
+
+class FollowCache:
+    """每位使用者的關注集合與解析後的關注列表"""
+
+    def __init__(self, store: UserStore, max_users: int = FOLLOW_CACHE_SIZE,
+                 sync_interval: float = SYNC_INTERVAL):
+        self.store = store
+        self.max_users = max_users
+        self.sync_interval = sync_interval
+        self._users: 'OrderedDict[str, _UserFollows]' = OrderedDict()
+        # 正在從資料庫讀取關注的使用者 → [失效次數, 讀取中的執行緒數]；
+        # 讀取期間失效過的結果已經過時，不放進快取
+        self._loading: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._seq = store.latest_change_seq()
+        self._synced_at = time.monotonic()
+        store.add_follow_listener(self.invalidate)
+
+    def _sync(self) -> None:
+        """套用上次同步後的關注變動（其他行程寫入的），只讓受影響的使用者失效；間隔未到時不查詢"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._synced_at < self.sync_interval:
+                return
+            self._synced_at = now
+        changes = self.store.changes_since(self._seq)
+        with self._lock:
+            if changes is None:
+                # 變動紀錄已被壓縮，無法得知哪些使用者受影響
+                self._users.clear()
+                for loading in self._loading.values():
+                    loading[0] += 1
+                self._seq = self.store.latest_change_seq()
+                return
+            for change in changes:
+                if change['kind'] in _FOLLOW_KINDS:
+                    self._invalidate_locked(change['user_id'])
+                self._seq = max(self._seq, change['seq'])
+
+    def _invalidate_locked(self, user_id: str) -> None:
+        self._users.pop(user_id, None)
+        loading = self._loading.get(user_id)
+        if loading is not None:
+            loading[0] += 1
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._invalidate_locked(user_id)
+
+    def _entry(self, user_id: str) -> _UserFollows:
+        self._sync()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._users.move_to_end(user_id)
+                return entry
+            loading = self._loading.setdefault(user_id, [0, 0])
+            loading[1] += 1
+            generation = loading[0]
+
+        # 讀取資料庫不持有鎖；期間若有關注變動（invalidate），結果只用於這次請求
+        entry = None
+        try:
+            entry = _UserFollows(self.store.get_follows(user_id))
+        finally:
+            with self._lock:
+                loading[1] -= 1
+                if not loading[1]:
+                    del self._loading[user_id]
+                if entry is not None and loading[0] == generation:
+                    self._users[user_id] = entry
+                    while len(self._users) > self.max_users:
+                        self._users.popitem(last=False)
+        return entry
+
+    def follows(self, user_id: str) -> Tuple[List[str], Set[str]]:
+        """(依關注先後的 ID 列表, ID 集合)；呼叫端不可修改"""
+        entry = self._entry(user_id)
+        return entry.order, entry.ids
+
+    def is_following(self, user_id: str, concert_id: str) -> bool:
+        return concert_id in self._entry(user_id).ids
+
+    def follow_states(self, user_id: str, concert_ids: Iterable[str]) -> Set[str]:
+        ids = self._entry(user_id).ids
+        return {concert_id for concert_id in concert_ids if concert_id in ids}
+
+    def followed_concerts(self, user_id: str, snapshot) -> List[dict]:
+        """
+        以目錄 ID 索引解析使用者關注的演唱會（已下架的略過），每筆加上 followed: True
+
+        結果依 (使用者, 目錄內容摘要) 快取，呼叫端不可修改。
+        """
+        entry = self._entry(user_id)
+        if entry.content_hash != snapshot.content_hash:
+            concerts = []
+            for concert_id in entry.order:
+                concert = snapshot.get(concert_id)
+                if concert:
+                    # 目錄中的記錄為共用物件，加欄位前先複製
+                    concerts.append({**concert, 'followed': True})
+            entry.concerts = concerts
+            entry.content_hash = snapshot.content_hash
+        return entry.concerts
@@ -0,0 +1,200 @@
+"""
+HTTP 回應快取：強 ETag 與 gzip / brotli 壓縮
+相同 ETag 的回應只序列化、壓縮一次，之後直接重用位元組
+快取以位元組數（原文 + 各壓縮版本）限制大小；單一回應超過上限時不快取，只在該次請求使用
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:
+    # brotli 為選用套件，未安裝時只提供 gzip
+    brotli = None
+
+# 小於此大小的回應不壓縮（壓縮標頭的開銷反而更大）
+MIN_COMPRESS_SIZE = 1024
+# 快取的回應數量上限
+CACHE_SIZE = 256
+# 快取的總位元組上限（原文 + 壓縮版本）
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+# 超過此大小的單一回應不快取（例如未分頁的大型列表），避免少數回應佔滿快取
+CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+
+def make_etag(*parts) -> str:
+    """以內容或版本資訊產生 ETag 本體（不含引號）"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def format_etag(etag: str, encoding: Optional[str] = None) -> str:
+    """壓縮後的表示法是不同的位元組，強 ETag 要加上編碼後綴"""
+    return f'"{etag}{_ETAG_SUFFIXES.get(encoding, "")}"'
+
+
+def match_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    比對 If-None-Match（忽略 W/ 前綴與編碼後綴）
+
+    Returns:
+        相符時返回用戶端送來的那個 ETag（304 回應原樣帶回），否則 None
+    """
+    if not if_none_match:
+        return None
+    for raw_tag in if_none_match.split(','):
+        raw_tag = raw_tag.strip()
+        if raw_tag == '*':
+            return format_etag(etag)
+        tag = raw_tag[2:] if raw_tag.startswith('W/') else raw_tag
+        tag = tag.strip('"')
+        for suffix in _ETAG_SUFFIXES.values():
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)]
+                break
+        if tag == etag:
+            return raw_tag
+    return None
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """解析 Accept-Encoding 為 {編碼: q 值}"""
+    result: Dict[str, float] = {}
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name] = q
+    return result
+
+
+def choose_encoding(header: Optional[str], size: int) -> Optional[str]:
+    """依 Accept-Encoding 選擇壓縮方式；優先 br，其次 gzip，不壓縮時返回 None"""
+    if size < MIN_COMPRESS_SIZE:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CachedBody:
+    """一份回應內容與其壓縮版本（壓縮版本在第一次需要時產生）"""
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        # 放進 ResponseCache 後設定，產生的壓縮版本經由它存入並計入總位元組
+        self.owner: Optional['ResponseCache'] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in list(self._encoded.values()))
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    if encoding == 'br':
+                        data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                    else:
+                        data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                    # 只有實際壓縮的執行緒計入位元組；存入與計入在快取的鎖內一起完成，淘汰時的 size 與總量一致
+                    if self.owner is not None:
+                        self.owner._add_encoding(self, encoding, data)
+                    else:
+                        self._encoded[encoding] = data
+        return data
+
+
+class ResponseCache:
+    """以 ETag 為鍵的 LRU 快取，同時限制筆數與總位元組"""
+
+    def __init__(self, max_entries: int = CACHE_SIZE, max_bytes: int = CACHE_MAX_BYTES,
+                 max_entry_bytes: int = CACHE_MAX_ENTRY_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: 'OrderedDict[str, CachedBody]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, etag: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def put(self, entry: CachedBody) -> CachedBody:
+        """加入快取並返回實際使用的項目；過大的回應不快取，直接返回原項目"""
+        if len(entry.body) > self.max_entry_bytes:
+            return entry
+        # 先取項目的鎖（與 encoded 相同順序），計算 size 時不會有壓縮版本同時存入
+        with entry._lock, self._lock:
+            existing = self._entries.get(entry.etag)
+            if existing is not None:
+                return existing
+            entry.owner = self
+            self._entries[entry.etag] = entry
+            self._bytes += entry.size
+            self._evict()
+            return entry
+
+    def _add_encoding(self, entry: CachedBody, encoding: str, data: bytes) -> None:
+        """存入項目的壓縮版本（呼叫端持有項目的鎖）；已被淘汰的項目不再計入"""
+        with self._lock:
+            entry._encoded[encoding] = data
+            if self._entries.get(entry.etag) is entry:
+                self._bytes += len(data)
+                self._evict()
+
+    def _evict(self) -> None:
+        # 至少保留最新的一筆（單筆大小已受 max_entry_bytes 限制）
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            evicted.owner = None
+            self._bytes -= evicted.size
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self._entries.values():
+                entry.owner = None
+            self._entries.clear()
+            self._bytes = 0
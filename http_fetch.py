@@ -0,0 +1,259 @@
+"""
+爬蟲共用的 HTTP 連線層
+所有 requests 爬蟲共用同一個 Session：連線池依主機保留 keep-alive 連線（不必每次重新 TCP/TLS 握手），
+每個主機的同時連線數有上限；DNS 查詢結果以 TTL 快取，只作用於這個 Session 建立的連線。
+詳細頁等多個網址以 fetch_all / map_urls 同時抓取，結果依輸入順序返回；
+HostThrottle 限制每個主機的同時請求數與速率（令牌桶），多執行緒抓取時仍維持禮貌間隔。
+"""
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+
+# 保留連線池的主機數
+POOL_HOSTS = 32
+# 每個主機同時使用的連線上限；超過時等待連線歸還（pool_block），避免對單一網站開太多連線
+PER_HOST_CONNECTIONS = 4
+# fetch_all 預設的同時請求數
+FETCH_WORKERS = 4
+# 詳細頁抓取：每個主機同時請求數與每秒請求數（令牌桶），爬蟲可個別調整
+DETAIL_CONCURRENCY = 4
+DETAIL_RATE = 4.0
+# DNS 查詢結果保留秒數與最多保留的主機數
+DNS_CACHE_TTL = 300.0
+DNS_CACHE_SIZE = 256
+
+T = TypeVar('T')
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+
+class DNSCache:
+    """主機名稱 → 位址列表的 TTL 快取（LRU 限制筆數，執行緒安全）"""
+
+    def __init__(self, ttl: float = DNS_CACHE_TTL, max_hosts: int = DNS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self._entries: 'OrderedDict[Tuple[str, int], Tuple[float, List[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """
+        返回 host 的所有位址（依 getaddrinfo 的順序、不重複）；快取過期或沒有時查詢
+
+        查詢失敗時拋出 socket.gaierror。返回的列表為複本，呼叫端可自行修改。
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] > now:
+                self._entries.move_to_end(key)
+                return list(cached[1])
+        # 查詢不持有鎖，不阻塞其他主機
+        addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)))
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_hosts:
+                self._entries.popitem(last=False)
+        return list(addresses)
+
+    def prefer(self, host: str, port: int, address: str) -> None:
+        """把連線成功的位址移到最前面，之後的連線先試它（例如 IPv6 不通時改用 IPv4 位址）"""
+        with self._lock:
+            cached = self._entries.get((host, port))
+            if cached and cached[1][0] != address and address in cached[1]:
+                addresses = [address] + [a for a in cached[1] if a != address]
+                self._entries[(host, port)] = (cached[0], addresses)
+
+    def discard(self, host: str, port: int) -> None:
+        """連線失敗時丟棄，下次重新查詢（位址可能已變更）"""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+_dns_cache = DNSCache()
+
+
+class _CachedDNSMixin:
+    """
+    建立連線前以 DNSCache 解析主機名稱
+
+    只替換 urllib3 實際連線的位址（_dns_host）；Host 標頭、TLS SNI 與憑證驗證仍使用原本的主機名稱。
+    與 urllib3 直接連線主機名稱時相同，依序嘗試所有位址，某個位址連不上（例如本機沒有 IPv6）時改試下一個。
+    """
+
+    def _new_conn(self):
+        host = getattr(self, '_dns_host', None)
+        if not host:
+            return super()._new_conn()
+        try:
+            addresses = _dns_cache.resolve(host, self.port)
+        except OSError:
+            # 解析失敗時交給 urllib3 原本的流程回報錯誤
+            return super()._new_conn()
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    conn = super()._new_conn()
+                except ConnectTimeoutError:
+                    # NewConnectionError 也是 ConnectTimeoutError；最後一個位址也失敗時回報錯誤
+                    if i == len(addresses) - 1:
+                        _dns_cache.discard(host, self.port)
+                        raise
+                    continue
+                if i:
+                    _dns_cache.prefer(host, self.port, address)
+                return conn
+        finally:
+            self._dns_host = host
+
+
+class _CachedDNSHTTPConnection(_CachedDNSMixin, HTTPConnection):
+    pass
+
+
+class _CachedDNSHTTPSConnection(_CachedDNSMixin, HTTPSConnection):
+    pass
+
+
+class _CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CachedDNSHTTPConnection
+
+
+class _CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """連線池使用 DNS 快取的 HTTPAdapter；不修改全域的 socket.getaddrinfo，不影響同一行程的其他程式（例如 Flask API）"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CachedDNSHTTPConnectionPool,
+            'https': _CachedDNSHTTPSConnectionPool,
+        }
+
+
+def get_session() -> requests.Session:
+    """取得共用的 Session（第一次呼叫時建立）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = CachedDNSAdapter(pool_connections=POOL_HOSTS, pool_maxsize=PER_HOST_CONNECTIONS,
+                                           pool_block=True)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+class TokenBucket:
+    """令牌桶：平均每秒最多 rate 個請求，最多連續 burst 個；rate <= 0 表示不限速"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """取得一個令牌，不足時等待（只阻塞呼叫的執行緒）"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostThrottle:
+    """每個主機的同時請求上限（semaphore）與速率限制（令牌桶）"""
+
+    def __init__(self, concurrency: int = DETAIL_CONCURRENCY, rate: float = DETAIL_RATE):
+        self.concurrency = max(concurrency, 1)
+        self.rate = rate
+        self._hosts: Dict[str, Tuple[threading.Semaphore, TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, url: str) -> Tuple[threading.Semaphore, TokenBucket]:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            limits = self._hosts.get(host)
+            if limits is None:
+                limits = (threading.Semaphore(self.concurrency), TokenBucket(self.rate, self.concurrency))
+                self._hosts[host] = limits
+            return limits
+
+    @contextmanager
+    def slot(self, url: str):
+        """在 with 區塊內發出對 url 主機的請求"""
+        semaphore, bucket = self._limits(url)
+        with semaphore:
+            bucket.acquire()
+            yield
+
+
+def map_urls(func: Callable[[str], T], urls: Sequence[str], throttle: Optional[HostThrottle] = None,
+             max_workers: int = FETCH_WORKERS) -> List[Optional[T]]:
+    """
+    以執行緒池對每個網址呼叫 func，依輸入順序返回結果
+
+    有 throttle 時每次呼叫都受主機的同時數與速率限制；func 拋出例外的網址對應 None。
+    """
+    def call(url: str) -> Optional[T]:
+        try:
+            if throttle is None:
+                return func(url)
+            with throttle.slot(url):
+                return func(url)
+        except Exception:
+            return None
+
+    if not urls:
+        return []
+    if max_workers <= 1 or len(urls) == 1:
+        return [call(url) for url in urls]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls)), thread_name_prefix='fetch') as pool:
+        return list(pool.map(call, urls))
+
+
+def fetch(url: str, headers: Optional[dict] = None, timeout: float = 10, **kwargs) -> requests.Response:
+    """以共用 Session 發出 GET（與 requests.get 相同的用法與例外）"""
+    return get_session().get(url, headers=headers, timeout=timeout, **kwargs)
+
+
+def fetch_all(urls: Sequence[str], headers: Optional[dict] = None, timeout: float = 10,
+              max_workers: int = FETCH_WORKERS,
+              throttle: Optional[HostThrottle] = None) -> List[Optional[requests.Response]]:
+    """
+    同時抓取多個網址，依輸入順序返回回應
+
+    失敗（連線錯誤、逾時）的網址對應 None，不影響其他網址。
+    """
+    return map_urls(lambda url: fetch(url, headers=headers, timeout=timeout), urls,
+                    throttle=throttle, max_workers=max_workers)
@@ -9,6 +9,9 @@ import json
 import os
 from datetime import datetime
 
+from concert_id import make_concert_id
+from json_to_mysql import ensure_schema
+
 def import_to_mysql():
     """互動式匯入資料到 MySQL"""
     print("=" * 70)
@@ -40,6 +43,8 @@ def import_to_mysql():
         
         if connection.is_connected():
             print("✅ 連接成功！")
+            # 確保資料表存在且含 concert_id 欄位
+            ensure_schema(connection)
             cursor = connection.cursor()
             
             # 查詢現有資料量
@@ -108,14 +113,15 @@ def import_to_mysql():
                     price = record.get("票價")
                     url = record.get("網址")
                     scraped_at = record.get("爬取時間")
+                    concert_id = record.get("id") or make_concert_id(record)
                     
                     try:
                         cursor.execute("""
                             INSERT IGNORE INTO events 
-                            (source, artist, event_time, venue, price, url, scraped_at, source_file, raw_json)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            (concert_id, source, artist, event_time, venue, price, url, scraped_at, source_file, raw_json)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                         """, (
-                            source, artist, event_time, venue, price, url, 
+                            concert_id, source, artist, event_time, venue, price, url, 
                             scraped_at, os.path.basename(file_path),
                             json.dumps(record, ensure_ascii=False)
                         ))
@@ -7,6 +7,8 @@ from typing import Iterable, List, Optional
 
 import mysql.connector
 
+from concert_id import make_concert_id
+
 DEFAULT_GLOBS = ["all_events_*.json", "演唱會資訊彙整_*.json"]
 
 
@@ -32,6 +34,7 @@ def ensure_schema(conn: mysql.connector.MySQLConnection) -> None:
         """
         CREATE TABLE IF NOT EXISTS events (
             id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+            concert_id VARCHAR(32),
             source TEXT,
             artist TEXT,
             event_time TEXT,
@@ -44,10 +47,15 @@ def ensure_schema(conn: mysql.connector.MySQLConnection) -> None:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             PRIMARY KEY (id),
             UNIQUE KEY idx_events_unique (url(191), event_time(191), artist(191)),
-            KEY idx_events_source (source(191))
+            KEY idx_events_source (source(191)),
+            KEY idx_events_concert_id (concert_id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
         """
     )
+    # 舊版資料表沒有 concert_id 欄位，補上欄位與索引
+    cur.execute("SHOW COLUMNS FROM events LIKE 'concert_id'")
+    if not cur.fetchall():
+        cur.execute("ALTER TABLE events ADD COLUMN concert_id VARCHAR(32) AFTER id, ADD KEY idx_events_concert_id (concert_id)")
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS import_log (
@@ -90,15 +98,17 @@ def import_file(conn: mysql.connector.MySQLConnection, file_path: str) -> None:
         price = normalize_value(item.get("票價"))
         url = normalize_value(item.get("網址"))
         scraped_at = normalize_value(item.get("爬取時間"))
+        concert_id = item.get("id") or make_concert_id(item)
         raw_json = json.dumps(item, ensure_ascii=False)
 
         cur.execute(
             """
             INSERT IGNORE INTO events (
-                source, artist, event_time, venue, price, url, scraped_at, source_file, raw_json
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
+                concert_id, source, artist, event_time, venue, price, url, scraped_at, source_file, raw_json
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
             """,
             (
+                concert_id,
                 source,
                 artist,
                 event_time,
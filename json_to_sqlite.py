@@ -6,6 +6,8 @@ import sqlite3
 from datetime import datetime
 from typing import Iterable, List, Optional
 
+from concert_id import make_concert_id
+
 DEFAULT_GLOBS = ["all_events_*.json", "演唱會資訊彙整_*.json", "simple_events_*.json", "quick_test_results_*.json"]
 
 
@@ -30,6 +32,7 @@ def ensure_schema(conn: sqlite3.Connection) -> None:
         """
         CREATE TABLE IF NOT EXISTS events (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concert_id TEXT,
             source TEXT,
             artist TEXT,
             event_time TEXT,
@@ -55,6 +58,16 @@ def ensure_schema(conn: sqlite3.Connection) -> None:
         ON events (source);
         """
     )
+    # 舊版資料表沒有 concert_id 欄位，補上後再建索引
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(events);")}
+    if "concert_id" not in columns:
+        conn.execute("ALTER TABLE events ADD COLUMN concert_id TEXT;")
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_events_concert_id
+        ON events (concert_id);
+        """
+    )
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS import_log (
@@ -94,15 +107,17 @@ def import_file(conn: sqlite3.Connection, file_path: str) -> None:
         price = normalize_value(item.get("票價"))
         url = normalize_value(item.get("網址"))
         scraped_at = normalize_value(item.get("爬取時間"))
+        concert_id = item.get("id") or make_concert_id(item)
         raw_json = json.dumps(item, ensure_ascii=False)
 
         cur = conn.execute(
             """
             INSERT OR IGNORE INTO events (
-                source, artist, event_time, venue, price, url, scraped_at, source_file, raw_json
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+                concert_id, source, artist, event_time, venue, price, url, scraped_at, source_file, raw_json
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
             """,
             (
+                concert_id,
                 source,
                 artist,
                 event_time,
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import {
   SafeAreaView,
   ScrollView,
@@ -17,6 +17,16 @@ import {
 // API 基礎 URL：真機使用區網 IP
 const API_BASE_URL = "http://192.168.0.175:5000/api";
 
+// 演唱會列表分頁：每頁筆數與列表卡片需要的欄位
+const PAGE_SIZE = 50;
+const LIST_FIELDS = "id,artist,date,venue,price,source,url";
+// 搜尋輸入停頓多久後才向伺服器查詢（毫秒）
+const SEARCH_DEBOUNCE_MS = 300;
+// 關注 / 提醒的切換先累積多久再以批次 API 一次送出（毫秒）
+const TOGGLE_FLUSH_MS = 500;
+// /follows/state 每次查詢的 ID 上限（與伺服器 MAX_BATCH_SIZE 相同）
+const STATE_BATCH_SIZE = 500;
+
 // ==================
 // 多語言翻譯
 // ==================
@@ -427,35 +437,98 @@ const LoginScreen = ({ onLoginSuccess, language, onLanguageChange }) => {
 // ==================
 const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
   const [concerts, setConcerts] = useState([]);
+  const [totalConcerts, setTotalConcerts] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const [followedConcerts, setFollowedConcerts] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
   const [selectedConcert, setSelectedConcert] = useState(null);
   const [searchQuery, setSearchQuery] = useState("");
-  const [userFollows, setUserFollows] = useState([]);
+  // 演唱會 ID → 是否關注；只包含已載入的列表頁與藝人分類
+  const [followState, setFollowState] = useState({});
+  const [followsLoaded, setFollowsLoaded] = useState(false);
   const [userReminders, setUserReminders] = useState({});
   const [currentTab, setCurrentTab] = useState("all");
   const [artistConcerts, setArtistConcerts] = useState([]);
   const [selectedArtist, setSelectedArtist] = useState(null);
+  // 目前列表對應的搜尋字串；較早送出的查詢晚回來時不覆蓋新結果
+  const activeQuery = useRef("");
+  // 尚未送出的切換：ID → { value: 目標狀態, previous: 切換前的狀態（送出失敗時還原）}
+  const pendingFollows = useRef({});
+  const pendingReminders = useRef({});
+  const followTimer = useRef(null);
+  const reminderTimer = useRef(null);
 
   useEffect(() => {
-    loadConcerts();
-    loadFollows();
     loadReminders();
+    // 離開畫面（登出）前送出還沒送出的切換
+    return () => {
+      clearTimeout(followTimer.current);
+      clearTimeout(reminderTimer.current);
+      flushFollows();
+      flushReminders();
+    };
   }, []);
 
-  const loadConcerts = async () => {
+  // 搜尋由伺服器處理（整份目錄），搜尋字串改變時從第一頁重新載入
+  useEffect(() => {
+    const timer = setTimeout(
+      () => loadConcerts(searchQuery.trim()),
+      searchQuery ? SEARCH_DEBOUNCE_MS : 0
+    );
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  const fetchConcertPage = async (cursor, query) => {
+    let url = `${API_BASE_URL}/concerts?limit=${PAGE_SIZE}&fields=${LIST_FIELDS}`;
+    if (query) {
+      url += `&q=${encodeURIComponent(query)}`;
+    }
+    if (cursor) {
+      url += `&cursor=${encodeURIComponent(cursor)}`;
+    }
+    const response = await fetch(url, { credentials: 'include' });
+    return response.json();
+  };
+
+  const loadConcerts = async (query) => {
+    activeQuery.current = query;
+    setNextCursor(null);
     setIsLoading(true);
     try {
-      const response = await fetch(`${API_BASE_URL}/concerts`, {
-        credentials: 'include'
-      });
-      const data = await response.json();
+      const data = await fetchConcertPage(null, query);
+      if (activeQuery.current !== query) return;
       if (data.status === "success") {
         setConcerts(data.concerts || []);
+        setTotalConcerts(data.total || 0);
+        setNextCursor(data.next_cursor || null);
+        loadFollowStates((data.concerts || []).map((c) => c.id));
       }
     } catch (error) {
       console.error("載入演唱會失敗:", error);
     } finally {
-      setIsLoading(false);
+      if (activeQuery.current === query) setIsLoading(false);
+    }
+  };
+
+  // 捲到列表底部時載入下一頁（同一個搜尋條件）
+  const loadMoreConcerts = async () => {
+    if (!nextCursor || isLoadingMore) return;
+    const query = activeQuery.current;
+    setIsLoadingMore(true);
+    try {
+      const data = await fetchConcertPage(nextCursor, query);
+      if (activeQuery.current !== query) return;
+      if (data.status === "success") {
+        setConcerts((prev) => [...prev, ...(data.concerts || [])]);
+        setTotalConcerts(data.total || 0);
+        setNextCursor(data.next_cursor || null);
+        loadFollowStates((data.concerts || []).map((c) => c.id));
+      }
+    } catch (error) {
+      console.error("載入更多演唱會失敗:", error);
+    } finally {
+      setIsLoadingMore(false);
     }
   };
 
@@ -472,31 +545,78 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
     return cleaned || name.trim();
   };
 
-  const loadArtistConcerts = () => {
-    const grouped = concerts.reduce((acc, c) => {
-      const artist = normalizeArtist(c.演出藝人);
-      if (!acc[artist]) acc[artist] = [];
-      acc[artist].push(c);
-      return acc;
-    }, {});
-
-    const list = Object.entries(grouped)
-      .map(([artist, items]) => ({ artist, concerts: items, concert_count: items.length }))
-      .sort((a, b) => b.concert_count - a.concert_count || a.artist.localeCompare(b.artist));
-
-    setArtistConcerts(list);
-    if (selectedArtist) {
-      const updated = list.find((a) => a.artist === selectedArtist.artist);
-      if (updated) setSelectedArtist(updated);
+  // 藝人分類來自伺服器的完整分組（不受列表分頁影響），再合併名稱寫法不同的同一藝人
+  const loadArtistConcerts = async () => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/concerts/by-artist/list`, { credentials: 'include' });
+      const data = await response.json();
+      if (data.status !== "success") return;
+
+      const grouped = (data.artist_list || []).reduce((acc, group) => {
+        const artist = normalizeArtist(group.artist);
+        if (!acc[artist]) acc[artist] = [];
+        acc[artist].push(...(group.concerts || []));
+        return acc;
+      }, {});
+
+      const list = Object.entries(grouped)
+        .map(([artist, items]) => ({ artist, concerts: items, concert_count: items.length }))
+        .sort((a, b) => b.concert_count - a.concert_count || a.artist.localeCompare(b.artist));
+
+      setArtistConcerts(list);
+      loadFollowStates(list.flatMap((a) => a.concerts.map((c) => c.id)));
+      if (selectedArtist) {
+        const updated = list.find((a) => a.artist === selectedArtist.artist);
+        if (updated) setSelectedArtist(updated);
+      }
+    } catch (error) {
+      console.error("載入藝人分類失敗:", error);
     }
   };
 
+  // 合併伺服器回傳的關注狀態；還沒送出的切換以本機為準
+  const mergeFollowState = (followed) => {
+    setFollowState((prev) => {
+      const next = { ...prev, ...followed };
+      Object.entries(pendingFollows.current).forEach(([id, change]) => {
+        next[id] = change.value;
+      });
+      return next;
+    });
+  };
+
+  // 只查詢這一頁（或藝人分類）演唱會的關注狀態，不下載整份關注清單
+  const loadFollowStates = async (ids) => {
+    const unknown = [...new Set(ids.filter((id) => id && !(id in followState)))];
+    for (let i = 0; i < unknown.length; i += STATE_BATCH_SIZE) {
+      const chunk = unknown.slice(i, i + STATE_BATCH_SIZE);
+      try {
+        const response = await fetch(
+          `${API_BASE_URL}/follows/state?ids=${chunk.map(encodeURIComponent).join(",")}`,
+          { credentials: 'include' }
+        );
+        const data = await response.json();
+        if (data.status === "success") {
+          mergeFollowState(data.followed || {});
+        }
+      } catch (error) {
+        console.error("載入關注狀態失敗:", error);
+      }
+    }
+  };
+
+  // 完整的關注清單只在切換到「我的關注」時載入（先送出累積的切換，清單才會包含剛關注的演唱會）
   const loadFollows = async () => {
+    clearTimeout(followTimer.current);
+    await flushFollows();
     try {
       const response = await fetch(`${API_BASE_URL}/follows`, { credentials: 'include' });
       const data = await response.json();
       if (data.status === "success") {
-        setUserFollows(data.concerts.map((c) => c.id) || []);
+        const followed = data.concerts || [];
+        setFollowedConcerts(followed);
+        mergeFollowState(Object.fromEntries(followed.map((c) => [c.id, true])));
+        setFollowsLoaded(true);
       }
     } catch (error) {
       console.error("載入關注失敗:", error);
@@ -518,66 +638,132 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
   useEffect(() => {
     if (currentTab === "artist") {
       loadArtistConcerts();
+    } else if (currentTab === "follows") {
+      loadFollows();
     }
-  }, [concerts, currentTab]);
+  }, [currentTab]);
+
+  // 記錄一個切換；同一個 ID 在送出前多次切換只保留最後的狀態
+  const queueChange = (pending, id, value, previous) => {
+    pending.current[id] = {
+      value,
+      previous: id in pending.current ? pending.current[id].previous : previous,
+    };
+  };
 
-  const toggleFollow = async (concertId) => {
-    const isFollowing = userFollows.includes(concertId);
-    const method = isFollowing ? "DELETE" : "POST";
+  // 把累積的關注切換以 /follows/batch 一次送出；失敗時還原
+  const flushFollows = async () => {
+    const changes = pendingFollows.current;
+    pendingFollows.current = {};
+    const ids = Object.keys(changes);
+    if (ids.length === 0) return;
 
     try {
-      const response = await fetch(`${API_BASE_URL}/follows/${concertId}`, {
-        method: method,
+      const response = await fetch(`${API_BASE_URL}/follows/batch`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          'X-User-Id': user.user_id,
+        },
         credentials: 'include',
-        headers: { 'X-User-Id': user.user_id },
+        body: JSON.stringify({
+          follow: ids.filter((id) => changes[id].value),
+          unfollow: ids.filter((id) => !changes[id].value),
+        }),
       });
       const data = await response.json();
-
-      if (data.status === "success") {
-        if (isFollowing) {
-          setUserFollows(userFollows.filter((id) => id !== concertId));
-        } else {
-          setUserFollows([...userFollows, concertId]);
-        }
-      }
+      if (data.status !== "success") throw new Error(data.message);
     } catch (error) {
+      setFollowState((prev) => {
+        const next = { ...prev };
+        ids
+          .filter((id) => !(id in pendingFollows.current))
+          .forEach((id) => {
+            next[id] = changes[id].previous;
+          });
+        return next;
+      });
       Alert.alert(getTranslation("error", language), "操作失敗");
     }
   };
 
-  const toggleReminder = async (concertId) => {
-    const hasReminder = userReminders[concertId];
+  // 把累積的提醒切換以 /reminders/batch 一次送出；失敗時還原
+  const flushReminders = async () => {
+    const changes = pendingReminders.current;
+    pendingReminders.current = {};
+    const ids = Object.keys(changes);
+    if (ids.length === 0) return;
 
     try {
-      if (hasReminder) {
-        await fetch(`${API_BASE_URL}/reminders/${concertId}`, {
-          method: "DELETE",
-          credentials: 'include',
-          headers: { 'X-User-Id': user.user_id },
-        });
-        const newReminders = { ...userReminders };
-        delete newReminders[concertId];
-        setUserReminders(newReminders);
-      } else {
-        await fetch(`${API_BASE_URL}/reminders/${concertId}`, {
-          method: "POST",
-          headers: { 
-            "Content-Type": "application/json",
-            'X-User-Id': user.user_id 
-          },
-          credentials: 'include',
-          body: JSON.stringify({ type: "on_sale" }),
-        });
-        setUserReminders({
-          ...userReminders,
-          [concertId]: { type: "on_sale", enabled: true },
-        });
-      }
+      const response = await fetch(`${API_BASE_URL}/reminders/batch`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          'X-User-Id': user.user_id,
+        },
+        credentials: 'include',
+        body: JSON.stringify({
+          set: ids.filter((id) => changes[id].value),
+          type: "on_sale",
+          delete: ids.filter((id) => !changes[id].value),
+        }),
+      });
+      const data = await response.json();
+      if (data.status !== "success") throw new Error(data.message);
     } catch (error) {
+      setUserReminders((prev) => {
+        const next = { ...prev };
+        ids
+          .filter((id) => !(id in pendingReminders.current))
+          .forEach((id) => {
+            if (changes[id].previous) {
+              next[id] = changes[id].previous;
+            } else {
+              delete next[id];
+            }
+          });
+        return next;
+      });
       Alert.alert(getTranslation("error", language), "操作失敗");
     }
   };
 
+  const toggleFollow = (concertId) => {
+    const isFollowing = !!followState[concertId];
+    queueChange(pendingFollows, concertId, !isFollowing, isFollowing);
+    setFollowState((prev) => ({ ...prev, [concertId]: !isFollowing }));
+
+    if (!isFollowing) {
+      const concert =
+        concerts.find((c) => c.id === concertId) ||
+        artistConcerts.flatMap((a) => a.concerts).find((c) => c.id === concertId);
+      if (concert) {
+        setFollowedConcerts((prev) =>
+          prev.some((c) => c.id === concertId) ? prev : [...prev, concert]
+        );
+      }
+    }
+
+    clearTimeout(followTimer.current);
+    followTimer.current = setTimeout(flushFollows, TOGGLE_FLUSH_MS);
+  };
+
+  const toggleReminder = (concertId) => {
+    const previous = userReminders[concertId];
+    queueChange(pendingReminders, concertId, !previous, previous);
+
+    const newReminders = { ...userReminders };
+    if (previous) {
+      delete newReminders[concertId];
+    } else {
+      newReminders[concertId] = { type: "on_sale", enabled: true };
+    }
+    setUserReminders(newReminders);
+
+    clearTimeout(reminderTimer.current);
+    reminderTimer.current = setTimeout(flushReminders, TOGGLE_FLUSH_MS);
+  };
+
   const openTicketLink = async (url) => {
     if (!url) {
       Alert.alert(getTranslation("ticketLink", language), "目前沒有提供售票連結");
@@ -597,15 +783,16 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
     }
   };
 
-  const filteredConcerts = concerts.filter(
-    (concert) =>
-      (concert.演出藝人 || "")
-        .toLowerCase()
-        .includes(searchQuery.toLowerCase()) ||
-      (concert.演出地點 || "")
-        .toLowerCase()
-        .includes(searchQuery.toLowerCase())
-  );
+  const matchesSearch = (concert) =>
+    (concert.演出藝人 || "")
+      .toLowerCase()
+      .includes(searchQuery.toLowerCase()) ||
+    (concert.演出地點 || "")
+      .toLowerCase()
+      .includes(searchQuery.toLowerCase());
+
+  // 「所有演唱會」已由伺服器依 q 搜尋
+  const filteredConcerts = concerts;
 
   const filteredArtists = searchQuery
     ? artistConcerts.filter((a) =>
@@ -615,11 +802,14 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
 
   let displayConcerts = filteredConcerts;
   if (currentTab === "follows") {
-    displayConcerts = filteredConcerts.filter((c) => userFollows.includes(c.id));
+    // 關注清單來自 /api/follows，不受列表分頁影響；取消關注的立即隱藏
+    displayConcerts = followedConcerts
+      .filter((c) => followState[c.id])
+      .filter(matchesSearch);
   }
 
   const renderConcertItem = ({ item }) => {
-    const isFollowed = userFollows.includes(item.id);
+    const isFollowed = !!followState[item.id];
     const hasReminder = userReminders[item.id];
     const countdown = calculateCountdown(item.演出時間);
 
@@ -748,7 +938,7 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
               currentTab === "all" && styles.activeTabText,
             ]}
           >
-            {getTranslation("allConcerts", language)} ({concerts.length})
+            {getTranslation("allConcerts", language)} ({totalConcerts})
           </Text>
         </TouchableOpacity>
         <TouchableOpacity
@@ -764,14 +954,14 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
               currentTab === "follows" && styles.activeTabText,
             ]}
           >
-            {getTranslation("myFollows", language)} ({userFollows.length})
+            {getTranslation("myFollows", language)}
+            {followsLoaded ? ` (${followedConcerts.filter((c) => followState[c.id]).length})` : ""}
           </Text>
         </TouchableOpacity>
         <TouchableOpacity
           style={[styles.tab, currentTab === "artist" && styles.activeTab]}
           onPress={() => {
             setCurrentTab("artist");
-            loadArtistConcerts();
             setSelectedArtist(null);
           }}
         >
@@ -848,9 +1038,9 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
       ) : displayConcerts.length === 0 ? (
         <View style={styles.centerContainer}>
           <Text style={styles.emptyText}>
-            {concerts.length === 0
-              ? getTranslation("noConcerts", language)
-              : getTranslation("noResults", language)}
+            {searchQuery
+              ? getTranslation("noResults", language)
+              : getTranslation("noConcerts", language)}
           </Text>
         </View>
       ) : (
@@ -859,6 +1049,11 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
           renderItem={renderConcertItem}
           keyExtractor={(item, idx) => item.id || `concert-${idx}`}
           contentContainerStyle={styles.listContent}
+          onEndReached={currentTab === "all" ? loadMoreConcerts : undefined}
+          onEndReachedThreshold={0.5}
+          ListFooterComponent={
+            isLoadingMore ? <ActivityIndicator color="#00d8ff" /> : null
+          }
         />
       )}
 
@@ -938,7 +1133,7 @@ const ConcertListScreen = ({ user, onLogout, language, onLanguageChange }) => {
                   onPress={() => toggleFollow(selectedConcert.id)}
                 >
                   <Text style={styles.largeButtonText}>
-                    {userFollows.includes(selectedConcert.id)
+                    {followState[selectedConcert.id]
                       ? getTranslation("unfollow", language) + " ★"
                       : getTranslation("follow", language) + " ☆"}
                   </Text>
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+售票提醒排程器
+把每個提醒換算成絕對觸發時間（依演唱會的 start_ts 或 sale_ts），放進最小堆積；
+每次只取出堆頂已到期的提醒，批次交給通知函式，不需要逐一掃描所有使用者。
+提醒的新增/修改透過 UserStore.change_log 增量加入堆積。
+
+用法：
+    python reminder_scheduler.py            # 持續執行
+    python reminder_scheduler.py --once     # 只發送目前到期的提醒後結束
+"""
+import argparse
+import heapq
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from concert_catalog import ConcertCatalog
+from event_time import TAIPEI_TZ, concert_timestamps
+from user_store import CHANGE_REMINDER_SET, UserStore
+
+# 每次交給通知函式的最大筆數
+DISPATCH_BATCH_SIZE = 500
+# 沒有更早的提醒時，最多間隔多久檢查一次新變動（秒）
+POLL_INTERVAL = 30.0
+# 錯過超過此秒數的提醒（例如排程器停機期間）不再發送，只標記為已處理
+MISSED_GRACE = 6 * 3600
+
+# 以演出時間往前推的提醒類型（秒）
+REMINDER_OFFSETS = {
+    'one_day_before': 24 * 3600,
+    'one_week_before': 7 * 24 * 3600,
+}
+
+# 堆積元素為 (觸發時間 << 40) | rowid 的單一整數，百萬筆只需數十 MB
+_ROWID_BITS = 40
+_ROWID_MASK = (1 << _ROWID_BITS) - 1
+
+Notifier = Callable[[List[dict]], None]
+
+
+def resolve_trigger_time(concert: dict, reminder_type: str) -> Optional[int]:
+    """
+    計算提醒的觸發時間（epoch 秒）
+
+    on_sale 使用 sale_ts（第一個開賣時間）；one_day_before / one_week_before 由 start_ts 往前推。
+    目錄中的記錄已在載入時解析；沒有這些欄位時現場解析。無法判斷時返回 None（不排程）。
+    """
+    if 'start_ts' not in concert:
+        concert = {**concert, **concert_timestamps(concert)}
+    if reminder_type == 'on_sale':
+        return concert.get('sale_ts')
+    offset = REMINDER_OFFSETS.get(reminder_type)
+    start = concert.get('start_ts')
+    if offset is None or start is None:
+        return None
+    return start - offset
+
+
+def print_notifier(batch: List[dict]) -> None:
+    """預設通知方式：輸出到主控台（正式環境可換成推播/Email）"""
+    for item in batch:
+        concert = item.get('concert') or {}
+        when = datetime.fromtimestamp(item['trigger_at'], TAIPEI_TZ).strftime('%Y-%m-%d %H:%M')
+        print(f"🔔 [{item['type']}] {item['user_id']} → {concert.get('演出藝人', item['concert_id'])} ({when})")
+
+
+class ReminderScheduler:
+    """以最小堆積排程的提醒發送器"""
+
+    def __init__(self, store: UserStore, catalog: ConcertCatalog, notifier: Notifier = print_notifier,
+                 batch_size: int = DISPATCH_BATCH_SIZE, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.catalog = catalog
+        self.notifier = notifier
+        self.batch_size = batch_size
+        self.clock = clock
+        self._heap: List[int] = []
+        self._seq = 0
+        self._content_hash: Optional[str] = None
+        # (演唱會 ID, 提醒類型) → 觸發時間；目錄重新載入時清空
+        self._trigger_cache: Dict[Tuple[str, str], Optional[int]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'scheduled': 0, 'unresolved': 0, 'dispatched': 0, 'expired': 0}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _resolve(self, snapshot, concert_id: str, reminder_type: str) -> Optional[int]:
+        key = (concert_id, reminder_type)
+        if key not in self._trigger_cache:
+            concert = snapshot.get(concert_id)
+            trigger_at = resolve_trigger_time(concert, reminder_type) if concert else None
+            self._trigger_cache[key] = trigger_at if trigger_at is None or trigger_at >= 0 else None
+        return self._trigger_cache[key]
+
+    def load(self) -> None:
+        """全量建立堆積（啟動或目錄重新載入時）"""
+        snapshot = self.catalog.snapshot()
+        # 先記下變動序號再掃描，掃描期間的新變動之後會再套用一次（重複加入由認領時排除）
+        seq = self.store.latest_change_seq()
+        self._trigger_cache = {}
+        heap, updates = [], []
+        unresolved = 0
+        for row in self.store.iter_pending_reminders():
+            trigger_at = self._resolve(snapshot, row['concert_id'], row['type'])
+            if trigger_at != row['trigger_at']:
+                updates.append((trigger_at, row['rowid']))
+            if trigger_at is None:
+                unresolved += 1
+            else:
+                heap.append((trigger_at << _ROWID_BITS) | row['rowid'])
+        if updates:
+            self.store.set_trigger_times(updates)
+        heapq.heapify(heap)
+
+        with self._lock:
+            self._heap = heap
+            self._seq = seq
+            self._content_hash = snapshot.content_hash
+            self.stats['scheduled'] = len(heap)
+            self.stats['unresolved'] = unresolved
+
+    def _sync(self) -> None:
+        """套用新的提醒變動；目錄內容改變或變動紀錄已被壓縮時全量重建"""
+        snapshot = self.catalog.snapshot()
+        if snapshot.content_hash != self._content_hash:
+            self.load()
+            return
+        changes = self.store.changes_since(self._seq)
+        if changes is None:
+            self.load()
+            return
+
+        updates = []
+        for change in changes:
+            self._seq = max(self._seq, change['seq'])
+            # 刪除的提醒不需處理：認領時找不到資料列就會略過
+            if change['kind'] != CHANGE_REMINDER_SET:
+                continue
+            row = self.store.get_pending_reminder(change['user_id'], change['concert_id'])
+            if row is None:
+                continue
+            trigger_at = self._resolve(snapshot, row['concert_id'], row['type'])
+            if trigger_at != row['trigger_at']:
+                updates.append((trigger_at, row['rowid']))
+            if trigger_at is None:
+                self.stats['unresolved'] += 1
+            else:
+                with self._lock:
+                    heapq.heappush(self._heap, (trigger_at << _ROWID_BITS) | row['rowid'])
+                self.stats['scheduled'] += 1
+        if updates:
+            self.store.set_trigger_times(updates)
+
+    def next_trigger_time(self) -> Optional[int]:
+        with self._lock:
+            return self._heap[0] >> _ROWID_BITS if self._heap else None
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """發送所有已到期的提醒，返回實際發送的筆數"""
+        if self._content_hash is None:
+            self.load()
+        else:
+            self._sync()
+        now = int(self.clock() if now is None else now)
+
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0] >> _ROWID_BITS <= now:
+                value = heapq.heappop(self._heap)
+                due.append((value & _ROWID_MASK, value >> _ROWID_BITS))
+
+        snapshot = self.catalog.snapshot()
+        dispatched = 0
+        for i in range(0, len(due), self.batch_size):
+            claimed = self.store.claim_reminders(due[i:i + self.batch_size])
+            batch = []
+            for item in claimed:
+                if item['trigger_at'] < now - MISSED_GRACE:
+                    self.stats['expired'] += 1
+                    continue
+                item['concert'] = snapshot.get(item['concert_id'])
+                batch.append(item)
+            if batch:
+                try:
+                    self.notifier(batch)
+                except Exception as e:
+                    # 已認領的提醒不重送（最多送一次），只記錄錯誤
+                    print(f"❌ 提醒發送失敗（{len(batch)} 筆）: {e}")
+                    continue
+                dispatched += len(batch)
+        self.stats['dispatched'] += dispatched
+        return dispatched
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None, poll_interval: float = POLL_INTERVAL) -> None:
+        """持續執行：睡到下一個提醒到期（最多 poll_interval 秒）再檢查"""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"❌ 提醒排程錯誤: {e}")
+            next_at = self.next_trigger_time()
+            wait = poll_interval if next_at is None else min(poll_interval, max(next_at - self.clock(), 0.5))
+            stop_event.wait(wait)
+
+    def start(self, poll_interval: float = POLL_INTERVAL) -> Tuple[threading.Thread, threading.Event]:
+        """在背景執行緒執行，返回 (執行緒, 停止事件)"""
+        stop_event = threading.Event()
+        thread = threading.Thread(target=self.run_forever, args=(stop_event, poll_interval),
+                                  name='reminder-scheduler', daemon=True)
+        thread.start()
+        return thread, stop_event
+
+
+def main() -> None:
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="售票提醒排程器")
+    parser.add_argument('--db', default='data/app.db', help="使用者資料庫")
+    parser.add_argument('--concerts', default='data/concerts.json', help="演唱會資料檔")
+    parser.add_argument('--once', action='store_true', help="只發送目前到期的提醒後結束")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="最長檢查間隔（秒）")
+    args = parser.parse_args()
+
+    scheduler = ReminderScheduler(UserStore(args.db), ConcertCatalog(args.concerts))
+    scheduler.load()
+    print(f"📅 已排程 {scheduler.stats['scheduled']} 筆提醒（無法判斷時間 {scheduler.stats['unresolved']} 筆）")
+
+    if args.once:
+        print(f"✅ 已發送 {scheduler.tick()} 筆提醒")
+        return
+    try:
+        scheduler.run_forever(poll_interval=args.interval)
+    except KeyboardInterrupt:
+        print(f"\n已停止，共發送 {scheduler.stats['dispatched']} 筆提醒")
+
+
+if __name__ == '__main__':
+    main()
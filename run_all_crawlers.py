@@ -20,7 +20,9 @@ from crawlers import (
     KKTIXCrawler,
     TixCraftCrawler
 )
+from crawlers.driver_pool import DriverPool
 from crawlers.tier2_crawlers import IndievoxCrawler
+from concert_id import ensure_concert_id
 
 
 def main():
@@ -44,18 +46,29 @@ def main():
     success_count = 0
     failed_sites = []
     
-    # 依序執行所有爬蟲
+    # 共用的瀏覽器驅動池：Chrome 只冷啟動一次，詳細頁由多個瀏覽器同時處理（DRIVER_POOL_SIZE 調整數量）
+    driver_pool = DriverPool()
+    driver_pool.warm()
     for crawler in crawlers:
-        try:
-            events = crawler.run()
-            if events:
-                all_events.extend(events)
-                success_count += 1
-            else:
+        crawler.driver_pool = driver_pool
+    
+    # 依序執行所有爬蟲
+    try:
+        for crawler in crawlers:
+            try:
+                events = crawler.run()
+                if events:
+                    all_events.extend(events)
+                    success_count += 1
+                else:
+                    failed_sites.append(crawler.site_name)
+            except Exception as e:
+                print(f"[失敗] {crawler.site_name}: 發生異常 - {e}")
                 failed_sites.append(crawler.site_name)
-        except Exception as e:
-            print(f"[失敗] {crawler.site_name}: 發生異常 - {e}")
-            failed_sites.append(crawler.site_name)
+    finally:
+        driver_pool.close()
+    print(f"[瀏覽器] 啟動 {driver_pool.stats['started']} 次，回收 {driver_pool.stats['recycled']} 次，"
+          f"崩潰重開 {driver_pool.stats['crashed']} 次")
     
     # 統計結果
     print("\n" + "="*70)
@@ -70,15 +83,17 @@ def main():
     # 轉換為標準格式
     formatted_events = []
     for event in all_events:
-        formatted_events.append({
+        formatted_events.append(ensure_concert_id({
             '來源網站': event.get('source', '未知'),
             '演出藝人': event.get('title', '未知'),
             '演出時間': event.get('date', '未公布'),
             '演出地點': '未公布',  # Gemini 沒有提取地點
             '票價': '',
             '網址': event.get('url', ''),
-            '爬取時間': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+            '爬取時間': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            # 有完整時刻/售票時間的來源（TixCraft）一併保留，供排序與售票提醒使用
+            **{key: event[key] for key in ('start_at', 'sale_time') if event.get(key)},
+        }))
     
     # 儲存結果
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
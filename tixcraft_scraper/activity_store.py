@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+活動資料的增量儲存
+每處理完一個活動只在日誌檔（JSONL）尾端追加一行並 fsync，不再每次重讀、合併、重寫整份 JSON；
+每 SNAPSHOT_EVERY 筆與結束時才把記憶體中的資料壓縮寫回 tixcraft_activities.json（先寫暫存檔再替換），
+寫回後清空日誌。程式中途當掉時，下次開啟會先把日誌重播進快照，已處理的活動不會遺失。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+# 每追加多少筆活動就壓縮寫回一次 JSON 快照
+SNAPSHOT_EVERY = 20
+
+logger = logging.getLogger(__name__)
+
+
+def _is_success(event):
+    """四個欄位不全是『未找到』就算成功（與原本即時存檔的統計相同）"""
+    return not all(event.get(field, '') == "未找到" for field in ('event_info', 'location', 'price', 'sale_time'))
+
+
+class ActivityStore:
+    """以 URL 為鍵的活動資料：JSONL 日誌 + 定期壓縮的 JSON 快照"""
+
+    def __init__(self, output_file='tixcraft_activities.json', journal_file=None, snapshot_every=SNAPSHOT_EVERY):
+        self.output_file = output_file
+        self.journal_file = journal_file or os.path.splitext(output_file)[0] + '.journal.jsonl'
+        self.snapshot_every = max(snapshot_every, 1)
+        # URL → 活動；dict 保留插入順序，更新既有活動時位置不變
+        self.events = {}
+        self.progress = {}
+        self.stats = {'new': 0, 'updated': 0}
+        # 本次新增的 URL（依加入順序），供 reorder_new 還原順序
+        self._added = []
+        self._pending = 0
+        self._journal = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        """載入快照並重播上次未壓縮的日誌，之後開始追加"""
+        try:
+            with open(self.output_file, 'r', encoding='utf-8') as f:
+                for event in json.load(f).get('events', []):
+                    if event.get('url'):
+                        self.events[event['url']] = event
+            logger.info(f"成功載入現有資料：{len(self.events)} 個活動")
+        except FileNotFoundError:
+            logger.info(f"檔案 {self.output_file} 不存在，將建立新檔案")
+        except Exception as e:
+            logger.error(f"載入現有資料時發生錯誤：{e}")
+
+        replayed = self._replay_journal()
+        if replayed:
+            logger.info(f"🔁 從日誌恢復 {replayed} 筆上次未存檔的活動")
+            self.compact()
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        return self
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_file):
+            return 0
+        replayed = 0
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 當掉時只寫了一半的最後一行
+                    continue
+                if event.get('url'):
+                    self.events[event['url']] = event
+                    replayed += 1
+        return replayed
+
+    def fingerprints(self):
+        """URL → 上次處理時的頁面內容指紋（沒有指紋的活動不列入，下次一律重新處理）"""
+        with self._lock:
+            return {url: event['fingerprint'] for url, event in self.events.items() if event.get('fingerprint')}
+
+    def upsert(self, event, **progress):
+        """新增或更新一個活動：追加到日誌（O(1)），累積 snapshot_every 筆後壓縮寫回快照"""
+        with self._lock:
+            if event['url'] in self.events:
+                self.stats['updated'] += 1
+            else:
+                self.stats['new'] += 1
+                self._added.append(event['url'])
+            self.events[event['url']] = event
+            self.progress.update(progress)
+
+            self._journal.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._pending += 1
+            if self._pending >= self.snapshot_every:
+                self._compact()
+
+    def reorder_new(self, urls):
+        """本次新增的活動改依 urls 的順序排列（並行處理時是依完成順序加入的），既有活動位置不變"""
+        with self._lock:
+            rank = {url: i for i, url in enumerate(urls)}
+            added = set(self._added)
+            kept = [(url, event) for url, event in self.events.items() if url not in added]
+            new = sorted(added, key=lambda url: rank.get(url, len(rank)))
+            self.events = dict(kept + [(url, self.events[url]) for url in new])
+
+    def snapshot(self):
+        """目前資料的 JSON 快照內容（索引依順序重新分配）"""
+        events = list(self.events.values())
+        for i, event in enumerate(events, 1):
+            event['index'] = i
+        success_count = sum(1 for event in events if _is_success(event))
+        success_rate = success_count / len(events) * 100 if events else 0
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        return {
+            'scrape_time': now,
+            'last_update': now,
+            'total_events': len(events),
+            'success_count': success_count,
+            'success_rate': f'{success_rate:.1f}%',
+            'extraction_method': 'realtime_precision_field_extraction',
+            **self.progress,
+            'events': events,
+        }
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        """寫回快照（暫存檔 + os.replace，不會留下寫一半的 JSON），成功後清空日誌"""
+        data = self.snapshot()
+        temp_file = self.output_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.output_file)
+        # 在替換與清空之間當掉時，下次重播的是已寫入快照的活動，以 URL 覆蓋不會重複
+        if self._journal:
+            self._journal.truncate(0)
+            self._journal.seek(0)
+        elif os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._pending = 0
+        logger.info(f"💾 已壓縮存檔：{self.output_file}（{data['total_events']} 個活動，成功率 {data['success_rate']}）")
+
+    def close(self):
+        """壓縮寫回快照並移除日誌"""
+        with self._lock:
+            if self._journal is None:
+                return
+            self._compact()
+            self._journal.close()
+            self._journal = None
+            os.remove(self.journal_file)
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import argparse
 import importlib
+import os
 import sys
 
 
@@ -32,6 +33,16 @@ def build_parser() -> argparse.ArgumentParser:
             )
         ),
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="精準欄位版同時開啟的瀏覽器數（預設 1，或環境變數 TIXCRAFT_WORKERS）",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="精準欄位版忽略內容指紋，重新提取所有活動",
+    )
     parser.add_argument(
         "--list",
         action="store_true",
@@ -80,6 +91,12 @@ def main() -> int:
         list_targets()
         return 0
 
+    if args.workers:
+        # 爬蟲模組載入時讀取此設定
+        os.environ["TIXCRAFT_WORKERS"] = str(args.workers)
+    if args.force:
+        os.environ["TIXCRAFT_FORCE"] = "1"
+
     return run_target(args.target)
 
 
@@ -1,21 +1,37 @@
+import hashlib
 import json
+import os
 import re
 import time
 import random
+import queue
 import logging
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from activity_store import ActivityStore
+
+# 並行處理活動詳細頁的瀏覽器數（1 為逐一處理）；每個瀏覽器各自維持隨機間隔，對網站的總請求頻率約為 N 倍
+TIXCRAFT_WORKERS = int(os.environ.get('TIXCRAFT_WORKERS', '1'))
+# 設為 1 時忽略頁面內容指紋，所有活動都重新提取
+TIXCRAFT_FORCE = os.environ.get('TIXCRAFT_FORCE', '') == '1'
+# 等待 dataLayer 出現活動資料的上限（秒）
+DATALAYER_TIMEOUT = 5.0
+
 class TixcraftPrecisionFieldScraper:
     def __init__(self):
         self.setup_logging()
         self.driver = None
+        # URL → 上次處理時的頁面內容指紋（scrape_all_events 從現有資料載入）
+        self.known_fingerprints = {}
+        self.force_rescrape = False
         
     def setup_logging(self):
         logging.basicConfig(
@@ -28,55 +44,6 @@ class TixcraftPrecisionFieldScraper:
         )
         self.logger = logging.getLogger(__name__)
         
-    def load_existing_data(self, filename='tixcraft_activities.json'):
-        """載入現有的JSON資料"""
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.logger.info(f"成功載入現有資料：{len(data.get('events', []))} 個活動")
-                return data
-        except FileNotFoundError:
-            self.logger.info(f"檔案 {filename} 不存在，將建立新檔案")
-            return None
-        except Exception as e:
-            self.logger.error(f"載入現有資料時發生錯誤：{e}")
-            return None
-    
-    def merge_data(self, existing_data, new_events):
-        """合併新舊資料，以URL作為唯一識別符去重複"""
-        if not existing_data:
-            return new_events
-            
-        existing_events = existing_data.get('events', [])
-        existing_urls = {event['url']: event for event in existing_events}
-        
-        # 更新或新增事件
-        updated_count = 0
-        new_count = 0
-        
-        for new_event in new_events:
-            url = new_event['url']
-            if url in existing_urls:
-                # 更新現有事件（保留索引但更新其他資料）
-                old_index = existing_urls[url].get('index', new_event['index'])
-                new_event['index'] = old_index
-                existing_urls[url] = new_event
-                updated_count += 1
-                self.logger.debug(f"更新活動：{new_event['title']}")
-            else:
-                # 新增事件
-                existing_urls[url] = new_event
-                new_count += 1
-                self.logger.debug(f"新增活動：{new_event['title']}")
-        
-        # 重新排序並分配索引
-        merged_events = list(existing_urls.values())
-        for i, event in enumerate(merged_events, 1):
-            event['index'] = i
-            
-        self.logger.info(f"資料合併完成：更新 {updated_count} 個活動，新增 {new_count} 個活動，總計 {len(merged_events)} 個活動")
-        return merged_events
-        
     def get_random_user_agent(self):
         """隨機選擇真實的 User-Agent 字串"""
         user_agents = [
@@ -92,7 +59,11 @@ class TixcraftPrecisionFieldScraper:
         return random.choice(user_agents)
         
     def setup_driver(self):
-        """設置Chrome瀏覽器選項 - 強化版反偵測功能"""
+        """啟動主瀏覽器（self.driver），負責活動列表與第一個分片"""
+        self.driver = self.create_driver()
+
+    def create_driver(self):
+        """設置Chrome瀏覽器選項 - 強化版反偵測功能；每次呼叫都啟動一個新的瀏覽器（各自隨機 User-Agent）"""
         chrome_options = Options()
         
         # 關閉 Headless 模式以便手動驗證
@@ -147,27 +118,28 @@ class TixcraftPrecisionFieldScraper:
         
         try:
             service = ChromeService(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver = webdriver.Chrome(service=service, options=chrome_options)
             
             # 執行強化版反偵測腳本
-            self.driver.execute_cdp_cmd('Runtime.evaluate', {
+            driver.execute_cdp_cmd('Runtime.evaluate', {
                 "expression": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
             })
             
             # 隱藏 Selenium 標識
-            self.driver.execute_cdp_cmd('Runtime.evaluate', {
+            driver.execute_cdp_cmd('Runtime.evaluate', {
                 "expression": "Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})"
             })
             
-            self.driver.execute_cdp_cmd('Runtime.evaluate', {
+            driver.execute_cdp_cmd('Runtime.evaluate', {
                 "expression": "Object.defineProperty(navigator, 'languages', {get: () => ['zh-TW', 'zh', 'en']})"
             })
             
-            self.driver.execute_cdp_cmd('Runtime.evaluate', {
+            driver.execute_cdp_cmd('Runtime.evaluate', {
                 "expression": "window.chrome = { runtime: {} };"
             })
             
             self.logger.info("Chrome瀏覽器已成功啟動（反偵測模式）")
+            return driver
         except Exception as e:
             self.logger.error(f"Chrome瀏覽器啟動失敗：{e}")
             raise
@@ -255,95 +227,179 @@ class TixcraftPrecisionFieldScraper:
                 
         return filtered_lines
         
-    def get_clean_data_from_js(self, driver):
+    # 頁面擷取共用函式：dataLayer 目標項目、活動標題、#intro 文字、瀏覽器分頁標題
+    SNAPSHOT_FUNCTIONS_JS = """
+    function findDataLayerItem() {
+        // 確保 dataLayer 存在
+        if (typeof dataLayer === 'undefined' || !Array.isArray(dataLayer)) {
+            return null;
+        }
+        
+        // 遍歷整個 dataLayer 陣列，擴大搜索範圍
+        for (let i = 0; i < dataLayer.length; i++) {
+            let item = dataLayer[i];
+            
+            // 只要包含以下任一欄位就立刻提取
+            if (item && (item.artistName || item.gameCode || item.item_name)) {
+                return {
+                    found: true,
+                    artistName: item.artistName || item.item_name || '',
+                    gameCode: item.gameCode || '',
+                    childCategoryName: item.childCategoryName || '',
+                    promoter: item.promoter || '',
+                    event: item.event || '',
+                    venueInfo: item.venueInfo || item.venue || '',
+                    location: item.location || '',
+                    rawData: item
+                };
+            }
+        }
+        
+        // 如果沒找到，返回搜索狀態
+        return {found: false, dataLayerLength: dataLayer.length};
+    }
+    
+    function pageSnapshot() {
+        let titleElement = document.getElementById('synopsisEventTitle') || document.querySelector('h1');
+        let introElement = document.getElementById('intro');
+        return {
+            js: findDataLayerItem(),
+            title: titleElement ? titleElement.innerText : null,
+            intro: introElement ? introElement.innerText : null,
+            browserTitle: document.title || ''
+        };
+    }
+    """
+    
+    # 立即擷取（一次往返）
+    PAGE_SNAPSHOT_JS = SNAPSHOT_FUNCTIONS_JS + """
+    return pageSnapshot();
+    """
+    
+    # 等到 dataLayer 出現目標項目才擷取（execute_async_script；arguments[0] 為逾時毫秒）：
+    # 攔截 dataLayer.push，目標項目被推入的當下就回傳；dataLayer 尚未建立或被 GTM 換掉 push 時，
+    # 由頁面內的計時器補檢查（不經過 WebDriver 往返）；逾時仍以當下的頁面內容回傳，timedOut 為 true
+    PAGE_SNAPSHOT_ASYNC_JS = SNAPSHOT_FUNCTIONS_JS + """
+    const done = arguments[arguments.length - 1];
+    const timeoutMs = arguments[0];
+    let finished = false;
+    let hookedLayer = null;
+    let timer = null;
+    let fallback = null;
+    
+    function finish(timedOut) {
+        if (finished) return;
+        finished = true;
+        clearTimeout(timer);
+        clearInterval(fallback);
+        let snapshot = pageSnapshot();
+        snapshot.timedOut = timedOut;
+        done(snapshot);
+    }
+    
+    function check() {
+        let item = findDataLayerItem();
+        if (item && item.found) {
+            finish(false);
+            return;
+        }
+        hook();
+    }
+    
+    function hook() {
+        if (hookedLayer === window.dataLayer || !Array.isArray(window.dataLayer)) return;
+        hookedLayer = window.dataLayer;
+        let originalPush = hookedLayer.push;
+        hookedLayer.push = function () {
+            let result = originalPush.apply(this, arguments);
+            if (!finished) check();
+            return result;
+        };
+    }
+    
+    timer = setTimeout(function () { finish(true); }, timeoutMs);
+    fallback = setInterval(check, 100);
+    check();
+    """
+    
+    JS_TIMEOUT_DATA = {
+        "title": "JS監控超時", 
+        "category": "未抓到分類", 
+        "game_code": "N/A", 
+        "promoter": "N/A",
+        "venue_info": "",
+        "location": ""
+    }
+    
+    def get_page_snapshot(self, driver, timeout=DATALAYER_TIMEOUT):
         """
-        [暴力強化版] 動態重試監控 JavaScript dataLayer 提取
-        - 每隔0.5秒重試，最多等待5秒
-        - 擴大搜索範圍：遍歷整個dataLayer陣列
-        - 只要含有 artistName、gameCode 或 item_name 就立刻提取
+        單次導覽的頁面擷取：等到 dataLayer 出現 artistName、gameCode 或 item_name 的當下，
+        以同一次非同步腳本取回 dataLayer、標題、#intro 與分頁標題（最多等待 timeout 秒）
+        
+        Returns:
+            {'js_data': dict, 'title': str, 'lines': list, 'browser_title': str}；
+            頁面沒有標題或 #intro 時 title 為『未找到』、lines 為空
         """
-        max_wait_time = 5.0  # 最多等待5秒
-        retry_interval = 0.5  # 每0.5秒重試一次
-        attempt = 0
         start_time = time.time()
+        js_data = None
         
-        self.logger.info("開始暴力監控 dataLayer，最多等待5秒...")
-        
-        while time.time() - start_time < max_wait_time:
-            attempt += 1
+        try:
+            # WebDriver 的腳本逾時需比頁面內的逾時長，逾時由腳本自己回傳結果
+            driver.set_script_timeout(timeout + 5)
+            snapshot = driver.execute_async_script(self.PAGE_SNAPSHOT_ASYNC_JS, int(timeout * 1000)) or {}
+        except Exception as e:
+            self.logger.debug(f"等待 dataLayer 的腳本執行失敗，改為直接擷取: {e}")
             try:
-                # 暴力搜索整個 dataLayer 陣列的 JavaScript 腳本
-                js_script = """
-                // 確保 dataLayer 存在
-                if (typeof dataLayer === 'undefined' || !Array.isArray(dataLayer)) {
-                    return null;
-                }
-                
-                // 遍歷整個 dataLayer 陣列，擴大搜索範圍
-                for (let i = 0; i < dataLayer.length; i++) {
-                    let item = dataLayer[i];
-                    
-                    // 只要包含以下任一欄位就立刻提取
-                    if (item.artistName || item.gameCode || item.item_name) {
-                        return {
-                            found: true,
-                            artistName: item.artistName || item.item_name || '',
-                            gameCode: item.gameCode || '',
-                            childCategoryName: item.childCategoryName || '',
-                            promoter: item.promoter || '',
-                            event: item.event || '',
-                            venueInfo: item.venueInfo || item.venue || '',
-                            location: item.location || '',
-                            rawData: item
-                        };
-                    }
-                }
-                
-                // 如果沒找到，返回搜索狀態
-                return {found: false, dataLayerLength: dataLayer.length};
-                """
-                
-                raw_info = driver.execute_script(js_script)
-                
-                if raw_info and raw_info.get('found'):
-                    # 成功找到數據！
-                    result = {
-                        "title": raw_info.get('artistName', '未抓到標題'),
-                        "category": raw_info.get('childCategoryName', '未抓到分類'),
-                        "game_code": raw_info.get('gameCode', 'N/A'),
-                        "promoter": raw_info.get('promoter', 'N/A'),
-                        "venue_info": raw_info.get('venueInfo', ''),
-                        "location": raw_info.get('location', '')
-                    }
-                    
-                    self.logger.info(f"🎯 第{attempt}次嘗試成功！找到dataLayer數據: {result['title']}")
-                    return result
-                
-                elif raw_info:
-                    self.logger.debug(f"第{attempt}次嘗試：dataLayer長度={raw_info.get('dataLayerLength', 0)}，未找到目標數據")
-                else:
-                    self.logger.debug(f"第{attempt}次嘗試：dataLayer不存在或無法訪問")
-                
-                # 如果沒找到，等待後重試
-                if time.time() - start_time < max_wait_time:
-                    time.sleep(retry_interval)
-                    
+                snapshot = driver.execute_script(self.PAGE_SNAPSHOT_JS) or {}
             except Exception as e:
-                self.logger.debug(f"第{attempt}次JavaScript執行失敗: {e}")
-                if time.time() - start_time < max_wait_time:
-                    time.sleep(retry_interval)
-        
-        # 超時後返回空結果
-        self.logger.warning(f"暴力監控超時({max_wait_time}秒)，共嘗試{attempt}次，未找到有效dataLayer數據")
+                self.logger.debug(f"JavaScript執行失敗: {e}")
+                snapshot = {}
+        elapsed = time.time() - start_time
+        
+        raw_info = snapshot.get('js')
+        if raw_info and raw_info.get('found'):
+            # 成功找到數據！
+            js_data = {
+                "title": raw_info.get('artistName', '未抓到標題'),
+                "category": raw_info.get('childCategoryName', '未抓到分類'),
+                "game_code": raw_info.get('gameCode', 'N/A'),
+                "promoter": raw_info.get('promoter', 'N/A'),
+                "venue_info": raw_info.get('venueInfo', ''),
+                "location": raw_info.get('location', '')
+            }
+            self.logger.info(f"🎯 {elapsed:.2f}秒後找到dataLayer數據: {js_data['title']}")
+        else:
+            # 超時後返回空結果
+            layer_length = raw_info.get('dataLayerLength', 0) if raw_info else '不存在'
+            self.logger.warning(f"dataLayer 等待超時({timeout}秒)，dataLayer長度={layer_length}，未找到有效數據")
+            js_data = dict(self.JS_TIMEOUT_DATA)
+        
+        title = self.clean_text(snapshot.get('title') or '') or "未找到"
+        intro = snapshot.get('intro')
+        # 按換行分割成獨立行
+        lines = [line.strip() for line in intro.split('\n') if line.strip()] if intro else []
         return {
-            "title": "JS監控超時", 
-            "category": "未抓到分類", 
-            "game_code": "N/A", 
-            "promoter": "N/A",
-            "venue_info": "",
-            "location": ""
+            'js_data': js_data,
+            'title': title,
+            'lines': lines,
+            'browser_title': snapshot.get('browserTitle') or '',
+            'fingerprint': self.page_fingerprint(raw_info, snapshot.get('title'), intro),
         }
         
+    def page_fingerprint(self, raw_info, title, intro):
+        """
+        頁面內容指紋：dataLayer 活動項目 + 標題 + #intro 文字的 SHA-256
+        dataLayer 沒有活動資料（逾時）時返回 None，這類頁面每次都重新處理
+        """
+        if not raw_info or not raw_info.get('found'):
+            return None
+        # GTM 自動加入的 gtm.* 欄位（例如 gtm.uniqueEventId）每次載入可能不同，不列入比對
+        payload = {key: value for key, value in (raw_info.get('rawData') or {}).items()
+                   if not key.startswith('gtm.')}
+        content = json.dumps({'data': payload, 'title': title or '', 'intro': intro or ''},
+                             ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        
     def extract_event_info(self, lines, js_data=None):
         """【合併版+暴力補全】演出資訊提取 - 統一處理日期時間資訊"""
         event_info_lines = []
@@ -798,61 +854,30 @@ class TixcraftPrecisionFieldScraper:
         return "未找到"
         
         
-    def extract_all_text_from_intro(self, url):
-        """從intro區塊提取所有文字行"""
-        try:
-            self.driver.get(url)
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # 提取標題
-            title = "未找到"
-            try:
-                title_element = self.driver.find_element(By.ID, "synopsisEventTitle")
-                title = self.clean_text(title_element.text)
-            except NoSuchElementException:
-                try:
-                    title_element = self.driver.find_element(By.TAG_NAME, "h1")
-                    title = self.clean_text(title_element.text)
-                except NoSuchElementException:
-                    pass
-            
-            # 提取intro區塊文字
-            lines = []
-            try:
-                intro_element = self.driver.find_element(By.ID, "intro")
-                all_text = intro_element.text
-                
-                # 按換行分割成獨立行
-                lines = [line.strip() for line in all_text.split('\n') if line.strip()]
-                
-            except NoSuchElementException:
-                self.logger.warning(f"未找到intro區塊：{url}")
-                
-            return title, lines
-            
-        except Exception as e:
-            self.logger.error(f"提取文字失敗 {url}: {e}")
-            return "錯誤", []
-            
-    def process_single_event(self, url, index):
-        """處理單一活動的完整邏輯 - 強化版"""
+    def process_single_event(self, url, index, driver=None):
+        """處理單一活動的完整邏輯 - 強化版；driver 預設為 self.driver，並行模式下為各 worker 自己的瀏覽器"""
+        driver = driver or self.driver
         try:
             self.logger.info(f"處理活動 {index}：{url}")
             
-            # 進入頁面並等待JavaScript載入
-            self.driver.get(url)
-            WebDriverWait(self.driver, 10).until(
+            # 進入頁面；不再固定等待，由 get_page_snapshot 等到 dataLayer 出現活動資料的當下才擷取，
+            # 禮貌間隔由擷取完成後的 _pace 負責
+            driver.get(url)
+            WebDriverWait(driver, 10).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
-            time.sleep(random.uniform(3, 6))  # 隨機等待 3-6 秒
-            
-            # 優先使用 JavaScript dataLayer 提取精確數據
-            js_data = self.get_clean_data_from_js(self.driver)
             
-            # 提取HTML基本資訊作為備用
-            title, lines = self.extract_all_text_from_intro(url)
+            # 單次導覽：同一次腳本取回 dataLayer（優先）、HTML 標題與 #intro 文字（備用）、分頁標題
+            snapshot = self.get_page_snapshot(driver)
+            fingerprint = snapshot['fingerprint']
+            if fingerprint and not self.force_rescrape and self.known_fingerprints.get(url) == fingerprint:
+                # 內容與上次相同：略過欄位提取與存檔，保留資料庫中的記錄
+                self.logger.info(f"  ⏭️ 內容未變更，略過：{url}")
+                return {'index': index, 'url': url, 'unchanged': True}
+            js_data = snapshot['js_data']
+            title, lines = snapshot['title'], snapshot['lines']
+            if not lines:
+                self.logger.warning(f"未找到intro區塊：{url}")
             
             # 標題強制補全：絕對不允許『未找到』
             final_title = "未找到"  # 預設值
@@ -870,7 +895,7 @@ class TixcraftPrecisionFieldScraper:
             else:
                 # 備援方案：強制使用瀏覽器分頁標題
                 try:
-                    browser_title = self.driver.title
+                    browser_title = snapshot['browser_title']
                     if browser_title and browser_title.strip():
                         # 清理瀏覽器標題
                         clean_browser_title = browser_title.replace('拓元售票網', '').replace('TIXCRAFT', '').strip()
@@ -901,7 +926,8 @@ class TixcraftPrecisionFieldScraper:
                     'location': "未找到",
                     'price': "未找到",
                     'sale_time': "未找到",
-                    'url': url
+                    'url': url,
+                    'fingerprint': fingerprint
                 }
             
             # 使用精確提取規則，防止位移問題 - 【合併版+暴力補全】
@@ -919,7 +945,8 @@ class TixcraftPrecisionFieldScraper:
                 'location': location,
                 'price': price,
                 'sale_time': sale_time,
-                'url': url
+                'url': url,
+                'fingerprint': fingerprint
             }
             
             # 日誌輸出 - 更新為新格式
@@ -946,11 +973,94 @@ class TixcraftPrecisionFieldScraper:
                 'url': url
             }
             
-    def scrape_all_events(self):
-        """爬取所有活動並處理 - 即時儲存版"""
+    def _save_progress(self, store, event_data, index, total_activities, current_success_count):
+        """即時儲存模式：追加到日誌檔（O(1)），由 ActivityStore 定期壓縮寫回 JSON"""
+        try:
+            store.upsert(event_data,
+                         current_progress=f'{index}/{total_activities}',
+                         current_session_success=current_success_count)
+            
+            # 增加安全感：每次存檔後在 Log 中印出進度
+            self.logger.info(f"💾 已寫入日誌，目前進度：{index}/{total_activities} ({index/total_activities*100:.1f}%)")
+            self.logger.info(f"📊 本次成功：{current_success_count}")
+            
+        except Exception as save_error:
+            self.logger.error(f"❌ 即時存檔失敗: {save_error}")
+            # 即使存檔失敗也繼續處理下一個活動
+            
+    def _pace(self, processed, label=""):
+        """隨機等待時間，模擬真實瀏覽行為；processed 為這個瀏覽器已處理的活動數"""
+        time.sleep(random.uniform(2, 4))
+        
+        # 每 5 個活動就休息 8-12 秒
+        if processed % 5 == 0:
+            rest_time = random.uniform(8, 12)
+            self.logger.info(f"⏸️  {label}已處理 {processed} 個活動，休息 {rest_time:.1f} 秒以避免被封鎖...")
+            time.sleep(rest_time)
+            
+    def _start_extra_drivers(self, count):
+        """啟動並行模式的額外瀏覽器；啟動失敗的略過，返回成功啟動的驅動"""
+        drivers = []
+        for i in range(count):
+            try:
+                drivers.append(self.create_driver())
+            except Exception as e:
+                self.logger.warning(f"⚠️ 第 {i + 2} 個瀏覽器啟動失敗，改以 {len(drivers) + 1} 個瀏覽器並行：{e}")
+        return drivers
+        
+    def _scrape_sharded(self, activity_links, drivers, commit):
+        """
+        並行模式：所有活動連結放進共用佇列，各瀏覽器處理完一個就取下一個（慢的頁面不會卡住其他瀏覽器），
+        每個 worker 各自隨機間隔與休息；每個結果一完成就交給 commit 寫入日誌，原本的順序在最後寫回快照時才還原。
+        """
+        links = queue.Queue()
+        for index, url in enumerate(activity_links, 1):
+            links.put((index, url))
+        lock = threading.Lock()
+        
+        def worker(worker_id, driver):
+            label = f"[worker {worker_id + 1}] "
+            # 錯開各 worker 的第一個請求，避免同時打到網站
+            time.sleep(worker_id * random.uniform(1, 3))
+            processed = 0
+            while True:
+                try:
+                    index, url = links.get_nowait()
+                except queue.Empty:
+                    return
+                # process_single_event 自行處理例外，失敗時返回「錯誤」記錄
+                event_data = self.process_single_event(url, index, driver)
+                with lock:
+                    commit(event_data, index)
+                processed += 1
+                if not links.empty():
+                    self._pace(processed, label)
+                    
+        threads = [threading.Thread(target=worker, args=(i, driver), name=f'tixcraft-worker-{i + 1}', daemon=True)
+                   for i, driver in enumerate(drivers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+    def scrape_all_events(self, workers=None, force=None):
+        """
+        爬取所有活動並處理 - 即時儲存版
+        
+        workers > 1 時以多個瀏覽器並行處理活動詳細頁（預設取環境變數 TIXCRAFT_WORKERS，未設定為 1）。
+        頁面內容指紋與上次相同的活動略過欄位提取與存檔；force=True（或 TIXCRAFT_FORCE=1）時全部重新處理，
+        例如修改了欄位提取規則之後。
+        """
         output_file = 'tixcraft_activities.json'
+        workers = max(1, workers or TIXCRAFT_WORKERS)
+        self.force_rescrape = TIXCRAFT_FORCE if force is None else force
+        extra_drivers = []
+        store = None
         
         try:
+            # 載入現有資料一次；之後每個活動只追加日誌，不再重讀整份 JSON
+            store = ActivityStore(output_file).open()
+            self.known_fingerprints = store.fingerprints()
             self.setup_driver()
             
             # 獲取活動列表
@@ -975,89 +1085,63 @@ class TixcraftPrecisionFieldScraper:
             
             # 即時處理每個活動
             current_success_count = 0
+            skipped_count = 0
+            reprocessed_count = 0
             
-            for index, url in enumerate(activity_links, 1):
-                # 處理單一活動
-                event_data = self.process_single_event(url, index)
-                
+            def commit(event_data, index):
+                # 並行模式下依完成順序呼叫，進度以已完成的數量計算
+                nonlocal current_success_count, skipped_count, reprocessed_count
+                if event_data.get('unchanged'):
+                    skipped_count += 1
+                    return
+                reprocessed_count += 1
                 if event_data['title'] not in ["錯誤", "提取失敗"]:
                     current_success_count += 1
-                
                 # ===== 即時儲存模式：每處理完一個活動就立刻存檔 =====
-                try:
-                    # 讀取現有資料（每次都重新載入確保最新）
-                    existing_data = self.load_existing_data(output_file)
-                    
-                    # 合併新舊資料（將當前處理的活動加入）
-                    current_events = [event_data]  # 當前只有一個活動
-                    merged_events = self.merge_data(existing_data, current_events)
-                    
-                    # 重新計算統計資料 - 更新為新欄位結構
-                    merged_success_count = sum(1 for event in merged_events 
-                                             if not all(field == "未找到" for field in [
-                                                 event.get('event_info', ''),  # 更新為合併欄位
-                                                 event.get('location', ''),
-                                                 event.get('price', ''),
-                                                 event.get('sale_time', '')
-                                             ]))
-                    merged_success_rate = (merged_success_count / len(merged_events)) * 100 if merged_events else 0
-                    
-                    # 準備即時結果
-                    real_time_result = {
-                        'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'last_update': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'total_events': len(merged_events),
-                        'success_count': merged_success_count,
-                        'success_rate': f'{merged_success_rate:.1f}%',
-                        'extraction_method': 'realtime_precision_field_extraction',
-                        'current_progress': f'{index}/{total_activities}',
-                        'current_session_success': current_success_count,
-                        'events': merged_events
-                    }
-                    
-                    # 即時寫入 JSON 檔案
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        json.dump(real_time_result, f, ensure_ascii=False, indent=2)
-                    
-                    # 增加安全感：每次存檔後在 Log 中印出進度
-                    self.logger.info(f"💾 已同步至 JSON 檔案，目前進度：{index}/{total_activities} ({index/total_activities*100:.1f}%)")
-                    self.logger.info(f"📊 本次成功：{current_success_count}，整體成功率：{merged_success_rate:.1f}%")
-                    
-                except Exception as save_error:
-                    self.logger.error(f"❌ 即時存檔失敗: {save_error}")
-                    # 即使存檔失敗也繼續處理下一個活動
-                
-                # 隨機等待時間，模擬真實瀏覽行為
-                time.sleep(random.uniform(2, 4))
+                self._save_progress(store, event_data, skipped_count + reprocessed_count,
+                                    total_activities, current_success_count)
                 
-                # 每 5 個活動就休息 8-12 秒
-                if index % 5 == 0:
-                    rest_time = random.uniform(8, 12)
-                    self.logger.info(f"⏸️  已處理 {index} 個活動，休息 {rest_time:.1f} 秒以避免被封鎖...")
-                    time.sleep(rest_time)
+            workers = min(workers, total_activities)
+            if workers > 1:
+                extra_drivers = self._start_extra_drivers(workers - 1)
+                drivers = [self.driver] + extra_drivers
+                self.logger.info(f"🚀 並行模式：{len(drivers)} 個瀏覽器同時處理")
+                self._scrape_sharded(activity_links, drivers, commit)
+                # 日誌依完成順序寫入；最後寫回快照前，新活動還原為列表頁上的順序
+                store.reorder_new(activity_links)
+            else:
+                for index, url in enumerate(activity_links, 1):
+                    # 處理單一活動
+                    commit(self.process_single_event(url, index), index)
+                    self._pace(index)
             
-            # 最終統計和確認
-            final_data = self.load_existing_data(output_file)
-            final_events = final_data.get('events', []) if final_data else []
+            # 最終統計和確認：壓縮寫回完整 JSON
+            store.progress.update(skipped_unchanged=skipped_count, reprocessed=reprocessed_count)
+            store.close()
+            final_data = store.snapshot()
             
             self.logger.info(f"🎉 所有活動處理完成！")
             self.logger.info(f"📈 本次工作階段成功處理：{current_success_count}/{total_activities} 個活動")
-            self.logger.info(f"📂 最終資料庫包含：{len(final_events)} 個活動")
+            self.logger.info(f"⏭️ 內容未變更略過 {skipped_count} 個，🔄 重新處理 {reprocessed_count} 個")
+            self.logger.info(f"🆕 新增 {store.stats['new']} 個活動，更新 {store.stats['updated']} 個活動")
+            self.logger.info(f"📂 最終資料庫包含：{final_data['total_events']} 個活動")
             self.logger.info(f"💾 即時儲存完成：{output_file}")
             
             # 返回最終結果
-            return final_data if final_data else {
-                'total_events': 0,
-                'success_count': 0,
-                'success_rate': '0.0%',
-                'current_session_success': current_success_count,
-                'events': []
-            }
+            return final_data
             
         except Exception as e:
             self.logger.error(f"❌ 爬取過程發生錯誤：{e}")
             return None
         finally:
+            if store:
+                # 中途出錯時也把已處理的活動寫回 JSON
+                store.close()
+            for driver in extra_drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
             if self.driver:
                 self.driver.quit()
                 
@@ -1070,6 +1154,7 @@ def main():
         print(f"更新時間：{result.get('last_update', 'N/A')}")
         print(f"處理進度：{result.get('current_progress', 'N/A')}")
         print(f"本次工作階段成功：{result.get('current_session_success', 0)} 個")
+        print(f"內容未變更略過：{result.get('skipped_unchanged', 0)} 個，重新處理：{result.get('reprocessed', 0)} 個")
         print(f"資料庫總計：{result.get('total_events', 0)} 個活動")
         print(f"整體成功率：{result.get('success_rate', '0.0%')}")
         print(f"提取方法：{result.get('extraction_method', 'realtime_precision_field_extraction')}")
@@ -0,0 +1,612 @@
+"""
+使用者資料儲存（SQLite，WAL 模式）
+使用者、關注與提醒各自一張表，每次寫入只更新一列，不再整份重寫 JSON 檔。
+關注/提醒的每次變動另外附加到 change_log（只增不改），供其他行程增量同步；
+定期壓縮：刪除過舊的紀錄並把 WAL 併回主資料庫檔。
+第一次啟動時自動匯入舊版 data/users.json、follows.json、reminders.json。
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# 等待其他連線（含其他 worker 行程）釋放寫入鎖的秒數
+BUSY_TIMEOUT = 5.0
+# FULL：每次 COMMIT 都 fsync WAL，斷電後已回應成功的寫入不會遺失
+SYNCHRONOUS = 'FULL'
+# 每累積這麼多筆變動做一次壓縮
+COMPACT_EVERY = 1000
+# 壓縮時 change_log 保留的最新筆數
+CHANGE_LOG_RETAIN = 10000
+# 請求中觸發的壓縮使用 PASSIVE checkpoint（不等待讀取者）；手動呼叫 compact() 預設 TRUNCATE
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+# IN (...) 查詢每批的參數數量
+QUERY_CHUNK_SIZE = 500
+
+# change_log.kind
+CHANGE_FOLLOW = 'follow'
+CHANGE_UNFOLLOW = 'unfollow'
+CHANGE_REMINDER_SET = 'reminder_set'
+CHANGE_REMINDER_DELETE = 'reminder_delete'
+
+DEFAULT_PREFERENCES = {
+    'genres': [],  # 喜歡的類型
+    'venues': [],  # 喜歡的場地
+    'artists': [],  # 喜歡的藝人
+    'notification_enabled': True
+}
+
+
+class DuplicateUserError(ValueError):
+    """信箱或使用者名稱已被使用；field 為 'email' 或 'username'"""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field} already exists")
+        self.field = field
+
+
+def _load_legacy_json(path: Optional[str]) -> dict:
+    if not path:
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+class UserStore:
+    """
+    使用者 / 關注 / 提醒的儲存層
+
+    每個執行緒使用自己的連線；寫入以 BEGIN IMMEDIATE 開始，取得資料庫檔的寫入鎖，
+    跨 worker 行程也同一時間只有一個寫入者，讀取在 WAL 模式下不受寫入阻擋。
+    資料列更新與 change_log 附加在同一個交易內，當機後兩者不會不一致。
+    """
+
+    def __init__(self, db_path: str, users_file: Optional[str] = None,
+                 follows_file: Optional[str] = None, reminders_file: Optional[str] = None):
+        self.db_path = db_path
+        self._local = threading.local()
+        # 唯一索引建立失敗（既有資料重複）時改由 create_user 自行檢查
+        self._unique_user_indexes = True
+        self._pending_changes = 0
+        self._compact_lock = threading.Lock()
+        # 本行程內關注變動的通知對象（例如 FollowCache），提交後以 user_id 呼叫
+        self._follow_listeners: List[Callable[[str], None]] = []
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.ensure_schema()
+        self.import_legacy_json(users_file, follows_file, reminders_file)
+
+    # ---------- 連線與交易 ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None：交易由 transaction() 明確控制
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(f"PRAGMA synchronous={SYNCHRONOUS};")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """寫入交易；離開時 COMMIT，發生例外時 ROLLBACK"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+        conn.execute("COMMIT;")
+
+    def close(self) -> None:
+        """關閉目前執行緒的連線"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def ensure_schema(self) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    password TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    preferences TEXT NOT NULL DEFAULT '{}'
+                );
+                """
+            )
+            self._ensure_user_indexes(conn)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS follows (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    concert_id TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    UNIQUE (user_id, concert_id)
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reminders (
+                    user_id TEXT NOT NULL,
+                    concert_id TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    enabled INTEGER NOT NULL DEFAULT 1,
+                    created_at TEXT NOT NULL,
+                    trigger_at INTEGER,
+                    fired_at TEXT,
+                    PRIMARY KEY (user_id, concert_id)
+                );
+                """
+            )
+            # 舊版資料表沒有排程欄位：trigger_at 為排程器算出的觸發時間（epoch 秒），fired_at 為已發送時間
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(reminders);")}
+            for column, column_type in (('trigger_at', 'INTEGER'), ('fired_at', 'TEXT')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE reminders ADD COLUMN {column} {column_type};")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS change_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    concert_id TEXT NOT NULL,
+                    payload TEXT,
+                    created_at TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                """
+            )
+
+    def _ensure_user_indexes(self, conn: sqlite3.Connection) -> None:
+        """
+        信箱與使用者名稱的唯一索引：登入/註冊查詢走索引，註冊的重複檢查由資料庫保證
+
+        既有資料若已有重複值，唯一索引建立失敗，退回一般索引（查詢仍走索引）。
+        """
+        conn.execute("DROP INDEX IF EXISTS idx_users_email;")
+        # SQLite 由最後建立的索引開始檢查；信箱放最後，兩者都重複時回報信箱（與原本的檢查順序相同）
+        for column in ('username', 'email'):
+            try:
+                conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_users_{column}_unique ON users ({column});")
+            except sqlite3.IntegrityError:
+                print(f"⚠️ users.{column} 有重複值，改建一般索引")
+                self._unique_user_indexes = False
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_users_{column} ON users ({column});")
+
+    def import_legacy_json(self, users_file: Optional[str], follows_file: Optional[str],
+                           reminders_file: Optional[str]) -> bool:
+        """
+        匯入舊版 JSON 檔（只做一次，以 meta.json_imported 標記）
+
+        在寫入交易內檢查標記，多個 worker 同時啟動也只會有一個執行匯入。
+        原 JSON 檔保留不刪除。
+        """
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported';").fetchone():
+                return False
+
+            users = _load_legacy_json(users_file)
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (user_id, username, email, password, created_at, preferences) "
+                "VALUES (?, ?, ?, ?, ?, ?);",
+                (
+                    (
+                        u.get('user_id', user_id),
+                        u.get('username', ''),
+                        u.get('email', ''),
+                        u.get('password', ''),
+                        u.get('created_at') or datetime.now().isoformat(),
+                        json.dumps(u.get('preferences', {}), ensure_ascii=False),
+                    )
+                    for user_id, u in users.items() if isinstance(u, dict)
+                ),
+            )
+
+            now = datetime.now().isoformat()
+            follows = _load_legacy_json(follows_file)
+            conn.executemany(
+                "INSERT OR IGNORE INTO follows (user_id, concert_id, created_at) VALUES (?, ?, ?);",
+                (
+                    (user_id, concert_id, now)
+                    for user_id, concert_ids in follows.items() if isinstance(concert_ids, list)
+                    for concert_id in concert_ids
+                ),
+            )
+
+            reminders = _load_legacy_json(reminders_file)
+            conn.executemany(
+                "INSERT OR IGNORE INTO reminders (user_id, concert_id, type, enabled, created_at) "
+                "VALUES (?, ?, ?, ?, ?);",
+                (
+                    (user_id, concert_id, r.get('type', 'on_sale'), int(bool(r.get('enabled', True))),
+                     r.get('created_at') or now)
+                    for user_id, user_reminders in reminders.items() if isinstance(user_reminders, dict)
+                    for concert_id, r in user_reminders.items() if isinstance(r, dict)
+                ),
+            )
+
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?);", (now,))
+        return True
+
+    # ---------- 使用者 ----------
+
+    @staticmethod
+    def _user_from_row(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        user = dict(row)
+        user['preferences'] = json.loads(user['preferences'] or '{}')
+        return user
+
+    def create_user(self, username: str, email: str, password_hash: str) -> dict:
+        """
+        建立使用者並返回記錄（格式與舊版 users.json 相同）
+
+        Raises:
+            DuplicateUserError: 信箱或使用者名稱已被使用（由唯一索引判斷，不另外查詢）
+        """
+        user = {
+            'user_id': str(uuid.uuid4()),
+            'username': username,
+            'email': email,
+            'password': password_hash,
+            'created_at': datetime.now().isoformat(),
+            'preferences': copy.deepcopy(DEFAULT_PREFERENCES),
+        }
+        try:
+            with self.transaction() as conn:
+                if not self._unique_user_indexes:
+                    if conn.execute("SELECT 1 FROM users WHERE email = ? LIMIT 1;", (email,)).fetchone():
+                        raise DuplicateUserError('email')
+                    if conn.execute("SELECT 1 FROM users WHERE username = ? LIMIT 1;", (username,)).fetchone():
+                        raise DuplicateUserError('username')
+                conn.execute(
+                    "INSERT INTO users (user_id, username, email, password, created_at, preferences) "
+                    "VALUES (?, ?, ?, ?, ?, ?);",
+                    (user['user_id'], username, email, password_hash, user['created_at'],
+                     json.dumps(user['preferences'], ensure_ascii=False)),
+                )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateUserError('email' if 'users.email' in str(e) else 'username') from e
+        return user
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT * FROM users WHERE user_id = ?;", (user_id,)).fetchone()
+        return self._user_from_row(row)
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT * FROM users WHERE email = ? LIMIT 1;", (email,)).fetchone()
+        return self._user_from_row(row)
+
+    def email_exists(self, email: str) -> bool:
+        return self._connect().execute("SELECT 1 FROM users WHERE email = ? LIMIT 1;", (email,)).fetchone() is not None
+
+    def username_exists(self, username: str) -> bool:
+        row = self._connect().execute("SELECT 1 FROM users WHERE username = ? LIMIT 1;", (username,)).fetchone()
+        return row is not None
+
+    def update_preferences(self, user_id: str, preferences: dict) -> Optional[dict]:
+        """合併偏好設定；讀取與寫入在同一個交易內，並行更新不會互相覆蓋"""
+        with self.transaction() as conn:
+            user = self._user_from_row(
+                conn.execute("SELECT * FROM users WHERE user_id = ?;", (user_id,)).fetchone())
+            if user is None:
+                return None
+            user['preferences'].update(preferences)
+            conn.execute(
+                "UPDATE users SET preferences = ? WHERE user_id = ?;",
+                (json.dumps(user['preferences'], ensure_ascii=False), user_id),
+            )
+        return user
+
+    # ---------- 關注 ----------
+
+    def get_follows(self, user_id: str) -> List[str]:
+        """使用者關注的演唱會 ID（依關注先後）"""
+        rows = self._connect().execute(
+            "SELECT concert_id FROM follows WHERE user_id = ? ORDER BY id;", (user_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def is_following(self, user_id: str, concert_id: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM follows WHERE user_id = ? AND concert_id = ?;", (user_id, concert_id)).fetchone()
+        return row is not None
+
+    def add_follow(self, user_id: str, concert_id: str) -> bool:
+        """新增關注；已關注時不變並返回 False"""
+        with self.transaction() as conn:
+            changed = self._insert_follow(conn, user_id, concert_id, datetime.now().isoformat())
+        self._after_changes(int(changed))
+        if changed:
+            self._notify_follow_change(user_id)
+        return changed
+
+    def remove_follow(self, user_id: str, concert_id: str) -> bool:
+        with self.transaction() as conn:
+            changed = self._delete_follow(conn, user_id, concert_id, datetime.now().isoformat())
+        self._after_changes(int(changed))
+        if changed:
+            self._notify_follow_change(user_id)
+        return changed
+
+    def add_follow_listener(self, listener: Callable[[str], None]) -> None:
+        """登記關注變動的通知（同一行程內的寫入在提交後立即通知；其他行程的寫入需讀 change_log）"""
+        self._follow_listeners.append(listener)
+
+    def _notify_follow_change(self, user_id: str) -> None:
+        for listener in self._follow_listeners:
+            listener(user_id)
+
+    def follow_states(self, user_id: str, concert_ids: Iterable[str]) -> Set[str]:
+        """一次查詢多個演唱會，返回其中已關注的 ID"""
+        ids = list(dict.fromkeys(concert_ids))
+        conn = self._connect()
+        followed: Set[str] = set()
+        for i in range(0, len(ids), QUERY_CHUNK_SIZE):
+            chunk = ids[i:i + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f"SELECT concert_id FROM follows WHERE user_id = ? AND concert_id IN ({placeholders});",
+                (user_id, *chunk),
+            ).fetchall()
+            followed.update(row[0] for row in rows)
+        return followed
+
+    def apply_follow_changes(self, user_id: str, follow: Iterable[str] = (),
+                             unfollow: Iterable[str] = ()) -> Tuple[int, int]:
+        """
+        批次關注 / 取消關注，在同一個交易內完成
+
+        Returns:
+            (實際新增數, 實際移除數)
+        """
+        now = datetime.now().isoformat()
+        with self.transaction() as conn:
+            added = sum(self._insert_follow(conn, user_id, cid, now) for cid in dict.fromkeys(follow))
+            removed = sum(self._delete_follow(conn, user_id, cid, now) for cid in dict.fromkeys(unfollow))
+        self._after_changes(added + removed)
+        if added or removed:
+            self._notify_follow_change(user_id)
+        return added, removed
+
+    def _insert_follow(self, conn: sqlite3.Connection, user_id: str, concert_id: str, now: str) -> bool:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO follows (user_id, concert_id, created_at) VALUES (?, ?, ?);",
+            (user_id, concert_id, now),
+        )
+        if cur.rowcount > 0:
+            self._log_change(conn, user_id, CHANGE_FOLLOW, concert_id, now)
+            return True
+        return False
+
+    def _delete_follow(self, conn: sqlite3.Connection, user_id: str, concert_id: str, now: str) -> bool:
+        cur = conn.execute("DELETE FROM follows WHERE user_id = ? AND concert_id = ?;", (user_id, concert_id))
+        if cur.rowcount > 0:
+            self._log_change(conn, user_id, CHANGE_UNFOLLOW, concert_id, now)
+            return True
+        return False
+
+    # ---------- 提醒 ----------
+
+    def get_reminders(self, user_id: str) -> Dict[str, dict]:
+        """{演唱會 ID: {type, enabled, created_at}}，格式與舊版 reminders.json 相同"""
+        rows = self._connect().execute(
+            "SELECT concert_id, type, enabled, created_at FROM reminders WHERE user_id = ? ORDER BY rowid;",
+            (user_id,),
+        ).fetchall()
+        return {
+            row['concert_id']: {
+                'type': row['type'],
+                'enabled': bool(row['enabled']),
+                'created_at': row['created_at'],
+            }
+            for row in rows
+        }
+
+    def set_reminder(self, user_id: str, concert_id: str, reminder_type: str) -> dict:
+        """新增或覆蓋提醒"""
+        with self.transaction() as conn:
+            reminder = self._upsert_reminder(conn, user_id, concert_id, reminder_type, datetime.now().isoformat())
+        self._after_changes(1)
+        return reminder
+
+    def delete_reminder(self, user_id: str, concert_id: str) -> bool:
+        with self.transaction() as conn:
+            changed = self._delete_reminder(conn, user_id, concert_id, datetime.now().isoformat())
+        self._after_changes(int(changed))
+        return changed
+
+    def apply_reminder_changes(self, user_id: str, set_items: Iterable[Tuple[str, str]] = (),
+                               delete: Iterable[str] = ()) -> Tuple[int, int]:
+        """
+        批次設定 / 刪除提醒，在同一個交易內完成
+
+        Args:
+            set_items: (演唱會 ID, 提醒類型) 列表
+            delete: 要刪除提醒的演唱會 ID
+
+        Returns:
+            (設定數, 實際刪除數)
+        """
+        now = datetime.now().isoformat()
+        set_count = 0
+        with self.transaction() as conn:
+            for concert_id, reminder_type in set_items:
+                self._upsert_reminder(conn, user_id, concert_id, reminder_type, now)
+                set_count += 1
+            deleted = sum(self._delete_reminder(conn, user_id, cid, now) for cid in dict.fromkeys(delete))
+        self._after_changes(set_count + deleted)
+        return set_count, deleted
+
+    def _upsert_reminder(self, conn: sqlite3.Connection, user_id: str, concert_id: str,
+                         reminder_type: str, now: str) -> dict:
+        reminder = {
+            'type': reminder_type,
+            'enabled': True,
+            'created_at': now
+        }
+        conn.execute(
+            "INSERT INTO reminders (user_id, concert_id, type, enabled, created_at) VALUES (?, ?, ?, 1, ?) "
+            "ON CONFLICT (user_id, concert_id) DO UPDATE SET "
+            "type = excluded.type, enabled = 1, created_at = excluded.created_at, trigger_at = NULL, fired_at = NULL;",
+            (user_id, concert_id, reminder_type, now),
+        )
+        self._log_change(conn, user_id, CHANGE_REMINDER_SET, concert_id, now, {'type': reminder_type})
+        return reminder
+
+    def _delete_reminder(self, conn: sqlite3.Connection, user_id: str, concert_id: str, now: str) -> bool:
+        cur = conn.execute("DELETE FROM reminders WHERE user_id = ? AND concert_id = ?;", (user_id, concert_id))
+        if cur.rowcount > 0:
+            self._log_change(conn, user_id, CHANGE_REMINDER_DELETE, concert_id, now)
+            return True
+        return False
+
+    # ---------- 提醒排程 ----------
+
+    def iter_pending_reminders(self, batch_size: int = 10000) -> Iterator[sqlite3.Row]:
+        """逐批讀出尚未發送的提醒（rowid, user_id, concert_id, type, trigger_at），不一次載入全部"""
+        conn = self._connect()
+        last_rowid = 0
+        while True:
+            rows = conn.execute(
+                "SELECT rowid, user_id, concert_id, type, trigger_at FROM reminders "
+                "WHERE rowid > ? AND enabled = 1 AND fired_at IS NULL ORDER BY rowid LIMIT ?;",
+                (last_rowid, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_rowid = rows[-1]['rowid']
+
+    def get_pending_reminder(self, user_id: str, concert_id: str) -> Optional[sqlite3.Row]:
+        return self._connect().execute(
+            "SELECT rowid, user_id, concert_id, type, trigger_at FROM reminders "
+            "WHERE user_id = ? AND concert_id = ? AND enabled = 1 AND fired_at IS NULL;",
+            (user_id, concert_id),
+        ).fetchone()
+
+    def set_trigger_times(self, updates: Iterable[Tuple[Optional[int], int]]) -> None:
+        """批次寫入 (trigger_at, rowid)"""
+        with self.transaction() as conn:
+            conn.executemany("UPDATE reminders SET trigger_at = ? WHERE rowid = ?;", updates)
+
+    def claim_reminders(self, candidates: Iterable[Tuple[int, int]]) -> List[dict]:
+        """
+        認領到期的提醒並標記為已發送，返回成功認領的提醒
+
+        candidates 為 (rowid, trigger_at)；只有 trigger_at 仍相符且尚未發送的才會認領，
+        提醒被刪除、改類型或已由其他排程器送出時自然略過，同一個提醒最多送出一次。
+        """
+        fired_at = datetime.now().isoformat()
+        claimed_rowids = []
+        with self.transaction() as conn:
+            for rowid, trigger_at in candidates:
+                cur = conn.execute(
+                    "UPDATE reminders SET fired_at = ? "
+                    "WHERE rowid = ? AND trigger_at = ? AND enabled = 1 AND fired_at IS NULL;",
+                    (fired_at, rowid, trigger_at),
+                )
+                if cur.rowcount > 0:
+                    claimed_rowids.append(rowid)
+            claimed = []
+            for i in range(0, len(claimed_rowids), QUERY_CHUNK_SIZE):
+                chunk = claimed_rowids[i:i + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                claimed.extend(dict(row) for row in conn.execute(
+                    f"SELECT user_id, concert_id, type, trigger_at, created_at FROM reminders "
+                    f"WHERE rowid IN ({placeholders}) ORDER BY trigger_at;",
+                    chunk,
+                ))
+        return claimed
+
+    # ---------- 變動紀錄 ----------
+
+    @staticmethod
+    def _log_change(conn: sqlite3.Connection, user_id: str, kind: str, concert_id: str, now: str,
+                    payload: Optional[dict] = None) -> None:
+        conn.execute(
+            "INSERT INTO change_log (user_id, kind, concert_id, payload, created_at) VALUES (?, ?, ?, ?, ?);",
+            (user_id, kind, concert_id, json.dumps(payload, ensure_ascii=False) if payload else None, now),
+        )
+
+    def latest_change_seq(self) -> int:
+        """目前最新的變動序號（沒有任何變動時為 0）"""
+        row = self._connect().execute("SELECT MAX(seq) FROM change_log;").fetchone()
+        return row[0] or 0
+
+    def changes_since(self, seq: int, limit: int = 10000) -> Optional[List[dict]]:
+        """
+        取得序號大於 seq 的變動（依序號排序）
+
+        Returns:
+            變動列表；若 seq 之後的部分紀錄已被壓縮刪除則返回 None，呼叫端需重新全量載入
+        """
+        conn = self._connect()
+        oldest = conn.execute("SELECT MIN(seq) FROM change_log;").fetchone()[0]
+        if oldest is not None and oldest > seq + 1:
+            return None
+        rows = conn.execute(
+            "SELECT seq, user_id, kind, concert_id, payload, created_at FROM change_log "
+            "WHERE seq > ? ORDER BY seq LIMIT ?;",
+            (seq, limit),
+        ).fetchall()
+        changes = []
+        for row in rows:
+            change = dict(row)
+            change['payload'] = json.loads(change['payload']) if change['payload'] else {}
+            changes.append(change)
+        return changes
+
+    def _after_changes(self, count: int) -> None:
+        """累積變動數，達到 COMPACT_EVERY 時壓縮（在交易提交之後、於請求中呼叫，因此只做 PASSIVE checkpoint）"""
+        if not count:
+            return
+        with self._compact_lock:
+            self._pending_changes += count
+            if self._pending_changes < COMPACT_EVERY:
+                return
+            self._pending_changes = 0
+        self.compact(checkpoint='PASSIVE')
+
+    def compact(self, retain: int = CHANGE_LOG_RETAIN, checkpoint: str = 'TRUNCATE') -> None:
+        """
+        壓縮：change_log 只保留最新 retain 筆，並把 WAL 併回主資料庫檔
+
+        資料表本身就是最新狀態的快照，change_log 只用於增量同步，刪除舊紀錄不影響資料。
+        checkpoint='PASSIVE' 只併入目前能併入的部分，不等待其他連線；
+        'TRUNCATE'（預設，適合離峰或維護時手動執行）會透過 busy handler 等待正在讀取的連線，
+        最多 BUSY_TIMEOUT 秒，完成後把 WAL 檔截斷為 0。
+        """
+        if checkpoint not in CHECKPOINT_MODES:
+            raise ValueError(f"checkpoint 必須是 {', '.join(CHECKPOINT_MODES)} 之一")
+        with self.transaction() as conn:
+            conn.execute(
+                "DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?;", (retain,))
+        self._connect().execute(f"PRAGMA wal_checkpoint({checkpoint});").fetchall()